@@ -0,0 +1,187 @@
+"""调度与最短路性能基准
+
+在 100 / 1k / 10k 站点的合成路网上计时：
+    dijkstra_all（纯 Python，抽样若干起点后按站点数外推）、全源最短路矩阵构造、
+    calculate_nij_matrix、perform_dispatch 以及完整的 multi_vehicle_dispatch，
+记录墙钟时间、峰值内存（tracemalloc）和每步延迟（Instrumentation 逐步记录的 p50 / p95），
+结果保存为 JSON 基线，便于版本间比较。一次调度通常只有几步（车辆空载停在短缺站后不再移动），
+每步延迟在多个需求快照上分别调度后汇总，样本少于 MIN_STEP_SAMPLES 步时不给出分位数。墙钟时间在不开启 tracemalloc 时测量（跟踪会明显拖慢纯 Python 循环），
+峰值内存另外单独运行一次测得；每次运行前清空 priority 的行驶时间 / 静态项缓存，各函数都从冷缓存开始。
+
+用法：
+    python benchmarks/bench.py --sizes 100 1000 --save baselines/local.json
+    python benchmarks/bench.py --sizes 100 1000 --compare baselines/local.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mmc.core.instrument import Instrumentation  # noqa: E402
+from mmc.core.priority import STATIC_CACHE, TRAVEL_CACHE  # noqa: E402
+from mmc.core.shortest import ShortestPaths, build_graph, dijkstra_all  # noqa: E402
+from mmc.core.sim_dispatch_multi import calculate_nij_matrix, multi_vehicle_dispatch, perform_dispatch  # noqa: E402
+from synthetic import synthetic_city, synthetic_counts  # noqa: E402
+
+# dijkstra_all 抽样的起点数
+DIJKSTRA_SAMPLES = 20
+
+# 每步延迟分位数所需的最少步数，以及为凑够步数最多调度的快照数
+MIN_STEP_SAMPLES = 20
+MAX_STEP_RUNS = 50
+
+
+def clear_caches() -> None:
+    """清空进程内共享的行驶时间 / 静态项缓存，避免前一个被测函数预热后一个"""
+    TRAVEL_CACHE.clear()
+    STATIC_CACHE.clear()
+
+
+def measure(func: Callable, repeat: int = 1) -> Dict:
+    """运行 func 并返回墙钟时间、峰值内存和返回值
+
+    墙钟时间取 repeat 次不开启 tracemalloc 的运行中最快的一次，峰值内存在另外一次开启 tracemalloc 的运行中测得；
+    每次运行前都清空缓存。
+    """
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        clear_caches()
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+
+    clear_caches()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"wall": best, "peak_mb": peak / 2 ** 20, "result": result}
+
+
+def step_latencies(func: Callable[[Instrumentation, int], object]) -> Dict:
+    """用 Instrumentation 依次运行 func(instrument, k)（k 为快照序号），直到累计 MIN_STEP_SAMPLES 步
+
+    返回汇总的步数 step_samples 和每步耗时的 p50 / p95（毫秒）；
+    运行 MAX_STEP_RUNS 次仍不足 MIN_STEP_SAMPLES 步时分位数为 None。
+    """
+    seconds = []
+    for k in range(MAX_STEP_RUNS):
+        instrument = Instrumentation()
+        clear_caches()
+        func(instrument, k)
+        seconds.extend(record["seconds"] for record in instrument.steps)
+        if len(seconds) >= MIN_STEP_SAMPLES:
+            break
+    if len(seconds) < MIN_STEP_SAMPLES:
+        return {"step_samples": len(seconds), "step_p50_ms": None, "step_p95_ms": None}
+    p50, p95 = np.percentile(seconds, [50, 95]) * 1e3
+    return {"step_samples": len(seconds), "step_p50_ms": p50, "step_p95_ms": p95}
+
+
+def bench_size(n: int, num_vehicles: int, max_steps: int, seed: int) -> List[Dict]:
+    points, edges = synthetic_city(n, seed=seed)
+    names = list(points)
+    counts = synthetic_counts(names, seed=seed)
+    rows = []
+
+    def record(case: str, stats: Dict, **extra) -> None:
+        row = {"case": case, "n": n, "wall": stats["wall"], "peak_mb": stats["peak_mb"], **extra}
+        rows.append(row)
+        print(f"  {case:<24} n={n:<6} wall={row['wall']:.4f}s peak={row['peak_mb']:.1f}MB"
+              + "".join(f" {k}={'n/a' if v is None else format(v, '.4g')}" for k, v in extra.items()))
+
+    graph = build_graph(points, edges)
+    sources = names[:min(DIJKSTRA_SAMPLES, n)]
+    stats = measure(lambda: [dijkstra_all(graph, s) for s in sources])
+    record("dijkstra_all", stats, per_source=stats["wall"] / len(sources),
+           extrapolated=stats["wall"] / len(sources) * n)
+
+    stats = measure(lambda: ShortestPaths.compute(points, edges))
+    df_distance = stats.pop("result").matrix_frame()
+    record("shortest_matrix", stats)
+
+    Nc_list = [0] * num_vehicles
+    stats = measure(lambda: calculate_nij_matrix(df_distance, counts, Nc_list, top_k=1000))
+    record("calculate_nij_matrix", stats)
+
+    pairs = np.random.default_rng(seed).integers(0, n, (10000, 2))
+    pairs = [(names[i], names[j]) for i, j in pairs if i != j]
+
+    def dispatch_pairs():
+        bike_counts = dict(counts)
+        Nc = 0
+        for i, j in pairs:
+            Nc = perform_dispatch(i, j, Nc, bike_counts)[0]
+
+    stats = measure(dispatch_pairs)
+    record("perform_dispatch", stats, per_call_us=stats["wall"] / len(pairs) * 1e6)
+
+    stats = measure(lambda: multi_vehicle_dispatch(df_distance, dict(counts), num_vehicles, max_steps))
+    df_routes = stats.pop("result")
+    steps = int(df_routes["step"].max()) if not df_routes.empty else 0
+    # 每个快照 k 使用不同种子的站点数量，第 0 个即上面计时所用的 counts
+    latencies = step_latencies(
+        lambda instrument, k: multi_vehicle_dispatch(df_distance, synthetic_counts(names, seed=seed + k),
+                                                     num_vehicles, max_steps, instrument=instrument))
+    record("multi_vehicle_dispatch", stats, steps=steps, **latencies)
+    return rows
+
+
+def compare(rows: List[Dict], baseline_path: str) -> None:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {(r["case"], r["n"]): r for r in json.load(f)["results"]}
+    print(f"\n与基线 {baseline_path} 比较（比值 > 1 表示变慢）：")
+    for row in rows:
+        base = baseline.get((row["case"], row["n"]))
+        if base is None:
+            continue
+        ratio = row["wall"] / base["wall"] if base["wall"] > 0 else float("nan")
+        print(f"  {row['case']:<24} n={row['n']:<6} wall x{ratio:.2f}"
+              f"  peak {base['peak_mb']:.1f}MB -> {row['peak_mb']:.1f}MB")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="调度与最短路性能基准")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--vehicles", type=int, default=10)
+    parser.add_argument("--steps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="保存结果 JSON 的路径")
+    parser.add_argument("--compare", help="用于比较的基线 JSON 路径")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for n in args.sizes:
+        print(f"站点数 {n}")
+        rows.extend(bench_size(n, args.vehicles, args.steps, args.seed))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        meta = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+            "vehicles": args.vehicles,
+            "steps": args.steps,
+            "seed": args.seed
+        }
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "results": rows}, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        compare(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import numpy as np
+from scipy.spatial import Delaunay
+from typing import Dict, List, Tuple
+
+
+def synthetic_city(
+    n: int,
+    size: float = 3000.0,
+    seed: int = 0,
+    prune: float = 0.3
+) -> Tuple[Dict[str, Tuple[float, float]], List[Tuple[str, str]]]:
+    """生成平面路网：站点随机撒在 size×size 的区域内，边取自 Delaunay 三角剖分
+
+    三角剖分保证路网是平面且连通的；再删去生成树之外最长的 prune 比例的边，使路网更接近真实道路。
+
+    返回:
+        (points, edges)，格式与 calc_shortest 读取的站点坐标和相邻站点对一致
+    """
+    rng = np.random.default_rng(seed)
+    coords = rng.uniform(0, size, (n, 2))
+    names = [f"S{k}" for k in range(n)]
+
+    tri = Delaunay(coords)
+    simplices = tri.simplices
+    pairs = np.concatenate((simplices[:, [0, 1]], simplices[:, [1, 2]], simplices[:, [0, 2]]))
+    pairs = np.unique(np.sort(pairs, axis=1), axis=0)
+
+    # 只在生成树之外删边，保证连通
+    lengths = np.hypot(*(coords[pairs[:, 0]] - coords[pairs[:, 1]]).T)
+    order = np.argsort(lengths)
+    parent = np.arange(n)
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    in_tree = np.zeros(len(pairs), dtype=bool)
+    for e in order:
+        u, v = find(pairs[e, 0]), find(pairs[e, 1])
+        if u != v:
+            parent[u] = v
+            in_tree[e] = True
+    extra = np.flatnonzero(~in_tree)
+    drop = extra[np.argsort(-lengths[extra])[:int(prune * len(extra))]]
+    keep = np.ones(len(pairs), dtype=bool)
+    keep[drop] = False
+
+    points = {name: (float(x), float(y)) for name, (x, y) in zip(names, coords)}
+    edges = [(names[u], names[v]) for u, v in pairs[keep]]
+    return points, edges
+
+
+def synthetic_counts(names: List[str], seed: int = 0, low: int = -30, high: int = 40) -> Dict[str, int]:
+    """站点富余/短缺数量（正为富余，负为短缺），格式与 points_number.xlsx 读出的字典一致"""
+    rng = np.random.default_rng(seed)
+    return dict(zip(names, rng.integers(low, high, len(names)).tolist()))
+
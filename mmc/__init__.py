@@ -0,0 +1,5 @@
+"""共享单车调度模型
+
+命令行入口：python -m mmc <子命令>，子命令见 python -m mmc --help。
+库代码位于 mmc.core，导入时不读取任何文件，也不加载 matplotlib 等绘图依赖。
+"""
@@ -0,0 +1,5 @@
+from mmc.cli import main
+
+# 多进程在 Windows 上以 spawn 方式启动，入口必须放在 __main__ 保护下
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""命令行入口：python -m mmc <子命令> [参数]
+
+每个子命令对应 mmc.core 中的一个脚本模块（add_arguments 定义参数，run 执行），
+子命令用到的 pandas、scipy、matplotlib 等依赖只在执行时才导入。
+"""
+import argparse
+import time
+from importlib import import_module
+from typing import List, Optional
+
+# 子命令: (模块, 说明)
+COMMANDS = {
+    "shortest": ("calc_shortest", "计算所有站点之间的最短路径距离并写入缓存"),
+    "nij": ("case", "按时间段计算供需站点对的调度优先级 nij"),
+    "dispatch": ("dispatch_multi", "多车协同调度"),
+    "dispatch-single": ("dispatch", "单车调度"),
+    "batch": ("dispatch_batch", "在多个需求快照和参数组合上批量运行多车调度"),
+    "montecarlo": ("dispatch_montecarlo", "在随机需求样本上评估多车调度方案的稳健性"),
+    "tune": ("tune", "在需求快照上搜索 nij 权重 a、b、c（random / grid / 逐次减半）"),
+    "serve": ("serve", "常驻的多车调度规划服务（stdin JSON lines 或本地 HTTP）"),
+    "trends": ("case2", "各区域时间段单车数量改变趋势图"),
+}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="mmc", description="共享单车调度模型")
+    parser.add_argument("--timing", action="store_true", help="结束时输出总耗时")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, (module, help_text) in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=help_text, description=help_text)
+        import_module(f"mmc.core.{module}").add_arguments(sub)
+        sub.set_defaults(module=module)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    start = time.perf_counter()
+    args = build_parser().parse_args(argv)
+    import_module(f"mmc.core.{args.module}").run(args)
+    if args.timing:
+        print(f"总耗时 {time.perf_counter() - start:.3f}s")
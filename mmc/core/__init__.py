@@ -0,0 +1,44 @@
+"""调度模型核心模块
+
+常用函数可以直接从 mmc.core 导入，对应模块在首次访问时才加载：
+    from mmc.core import cached_shortest_paths, multi_vehicle_dispatch
+"""
+import os
+from importlib import import_module
+
+# 随代码一起提供的数据目录（mmc/data），命令行各子命令的默认输入输出路径都在这里
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+_EXPORTS = {
+    "cached_shortest_paths": "shortest",
+    "read_graph": "shortest",
+    "ShortestPaths": "shortest",
+    "attach_paths": "shortest",
+    "NijEngine": "priority",
+    "OriginIndex": "priority",
+    "multi_vehicle_dispatch": "sim_dispatch_multi",
+    "iter_dispatch": "sim_dispatch_multi",
+    "plot_vehicle_routes": "sim_dispatch_multi",
+    "event_dispatch": "events",
+    "hierarchical_dispatch": "zones",
+    "evaluate_plan": "montecarlo",
+    "tune_weights": "tuning",
+    "simulate_dispatch_from_nij": "sim_dispatch",
+    "Instrumentation": "instrument",
+    "LookaheadPlanner": "lookahead",
+    "Neighbourhood": "neighbours",
+    "ReplanService": "service",
+    "nij_by_time": "time_slots",
+    "run_scenarios": "batch",
+}
+
+__all__ = ["DATA_DIR", *_EXPORTS]
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
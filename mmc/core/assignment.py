@@ -0,0 +1,125 @@
+import numpy as np
+from typing import Tuple
+
+from .fleet import MAX_CAPACITY
+from .priority import NijEngine
+
+
+def station_slots(counts: np.ndarray, max_capacity: int = MAX_CAPACITY) -> np.ndarray:
+    """每个站点一步内最多可接纳的调度车数：富余/短缺量需要几车才能运完，至少为 1"""
+    return np.maximum(np.ceil(np.abs(counts) / max_capacity), 1).astype(np.int64)
+
+
+def assign_targets(
+    engine: NijEngine,
+    counts: np.ndarray,
+    loads: np.ndarray,
+    position: np.ndarray,
+    vehicles: np.ndarray,
+    max_capacity: int = MAX_CAPACITY,
+    neighbours=None
+) -> Tuple[np.ndarray, np.ndarray, int]:
+    """一步内为所有车辆同时分配目标站（车辆 × 站点的最大权匹配）
+
+    权重为车辆当前位置到目标站的 nij，可行性与逐车贪心选择相同；每个目标站最多分给
+    station_slots 辆车，避免多辆车同时追逐同一个短缺站。每辆车只需考虑自己 nij 最大的
+    len(vehicles) 个可行目标站（其余车辆最多占用其中 len(vehicles)-1 个），
+    匹配规模只与车辆数有关，与站点数无关。先让尽量多的车辆分到目标站，再使 nij 之和最大（见 max_weight_matching）；
+    nij 相同的候选按站点下标从小到大取，结果与车辆顺序无关。
+
+    给出 neighbours 时每辆车只在邻近站点中取候选，邻近站点中没有可行目标站时才考虑全部站点。
+
+    返回:
+        (目标站下标, nij, 访问过的候选目标站数)，前两项与 vehicles 一一对应，没有分到目标站的车辆为 (-1, -inf)；
+        访问数与 OriginIndex.scanned 的口径相同，供性能埋点统计
+    """
+    n_vehicles = len(vehicles)
+    targets = np.full(n_vehicles, -1, dtype=np.int64)
+    target_nij = np.full(n_vehicles, -np.inf)
+    if n_vehicles == 0:
+        return targets, target_nij, 0
+
+    # 每辆车的可行目标站中 nij 最大的 n_vehicles 个
+    width = min(n_vehicles, len(counts))
+    shortage = counts < 0
+    rows, cols, values = [], [], []
+    scanned = 0
+    for n, v in enumerate(vehicles):
+        origin = position[v]
+        if loads[v] < max_capacity and counts[origin] > 0:
+            feasible = engine.valid[origin]
+        elif loads[v] > 0:
+            feasible = engine.valid[origin] & shortage
+        else:
+            continue
+        top = np.zeros(0, dtype=np.int64)
+        if neighbours is not None:
+            local = neighbours[origin]
+            scanned += len(local)
+            local = local[feasible[local]]
+            local_scores = engine.static[origin, local] + engine.row_term()[origin] + engine.col_term()[local]
+            order = np.argsort(-local_scores, kind="stable")[:width]
+            top, top_scores = local[order], local_scores[order]
+        if len(top) == 0:
+            scores = np.where(feasible, engine.row_scores(origin), -np.inf)
+            scanned += len(scores)
+            top = _top_stable(scores, width)
+            top = top[scores[top] > -np.inf]
+            top_scores = scores[top]
+        if len(top) == 0:
+            continue
+        rows.append(np.full(len(top), n))
+        cols.append(top)
+        values.append(top_scores)
+    if not rows:
+        return targets, target_nij, scanned
+    rows, cols, values = np.concatenate(rows), np.concatenate(cols), np.concatenate(values)
+
+    # 候选站点按可接纳车数复制成若干列，复制数不超过把它列为候选的车辆数
+    stations, inverse, wanted = np.unique(cols, return_inverse=True, return_counts=True)
+    slots = np.minimum(station_slots(counts[stations], max_capacity), wanted)
+    column_station = np.repeat(np.arange(len(stations)), slots)
+    first_column = np.concatenate(([0], np.cumsum(slots)[:-1]))
+
+    score = np.full((n_vehicles, len(column_station)), -np.inf)
+    for s in range(slots.max()):
+        use = slots[inverse] > s
+        score[rows[use], first_column[inverse[use]] + s] = values[use]
+
+    assigned, column = max_weight_matching(score)
+    targets[assigned] = stations[column_station[column]]
+    target_nij[assigned] = score[assigned, column]
+    return targets, target_nij, scanned
+
+
+def _top_stable(scores: np.ndarray, width: int) -> np.ndarray:
+    """scores 最大的 width 个下标，按分数降序、分数相同时按下标升序（与稳定排序的前 width 个相同），O(N)"""
+    if width >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    kth = -np.partition(-scores, width - 1)[width - 1]
+    above = np.flatnonzero(scores > kth)
+    ties = np.flatnonzero(scores == kth)[:width - len(above)]
+    top = np.concatenate((above, ties))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+def max_weight_matching(score: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """行 × 列的最大权匹配，-inf 表示不可行
+
+    先使匹配上的可行位置数最多，再使其权重之和最大（权重可以为负）。
+
+    返回:
+        (行下标, 列下标)，只含可行的匹配
+    """
+    from scipy.optimize import linear_sum_assignment
+
+    finite = np.isfinite(score)
+    if not finite.any():
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    # 不可行的位置给一个足够大的代价：任意两个匹配的可行位置权重之和相差不超过 2 × 行数 × max|权重|，
+    # 代价超过该值时少匹配一个可行位置总是更差，不可行位置只有无法避免时才会被选中，随后丢弃
+    big = 2 * score.shape[0] * np.abs(score[finite]).max() + 1
+    cost = np.where(finite, -score, big)
+    rows, cols = linear_sum_assignment(cost)
+    keep = finite[rows, cols]
+    return rows[keep], cols[keep]
@@ -0,0 +1,107 @@
+import time
+import itertools
+import tempfile
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from .shortest import ShortestPaths, load_shared_matrix, shared_matrix_file
+from .sim_dispatch_multi import multi_vehicle_dispatch
+
+# 子进程内只读共享的距离矩阵（由 _init_worker 以内存映射方式加载，不随任务序列化）
+_WORKER: Dict = {}
+
+
+def counts_dict(df_counts: pd.DataFrame) -> Dict[str, float]:
+    """location/count 两列的站点数量表转换为字典，忽略 count 不是数值的行"""
+    df_counts = df_counts[pd.to_numeric(df_counts["count"], errors='coerce').notnull()]
+    return dict(zip(df_counts['location'], df_counts['count']))
+
+
+def read_counts(count_file: str, sheet_name: str) -> Dict[str, float]:
+    """读取 points_number.xlsx 中的一个 sheet"""
+    return counts_dict(pd.read_excel(count_file, sheet_name=sheet_name))
+
+
+def read_snapshots(count_file: str) -> Dict[str, Dict[str, float]]:
+    """读取 points_number.xlsx 的所有 sheet，每个 sheet 是一个需求快照"""
+    return {
+        sheet: counts_dict(df_counts)
+        for sheet, df_counts in pd.read_excel(count_file, sheet_name=None).items()
+    }
+
+
+def scenario_grid(**params) -> List[Dict]:
+    """由参数取值列表生成笛卡尔积场景，例如 scenario_grid(num_vehicles=[2, 3], a=[0.2, 0.6])"""
+    keys = list(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*params.values())]
+
+
+def imbalance(bike_counts: Dict[str, float]) -> float:
+    """站点失衡量：所有站点富余/短缺数量的绝对值之和"""
+    return float(sum(abs(v) for v in bike_counts.values()))
+
+
+def _init_worker(dist_path: str, names: List[str]) -> None:
+    _WORKER["df_distance"] = load_shared_matrix(dist_path, names)
+
+
+def _run_scenario(scenario: Dict, bike_counts: Dict[str, float]) -> Dict:
+    counts = dict(bike_counts)
+    before = imbalance(counts)
+    params = {k: v for k, v in scenario.items() if k != "snapshot"}
+
+    start = time.perf_counter()
+    df_routes = multi_vehicle_dispatch(_WORKER["df_distance"], counts, **params)
+    runtime = time.perf_counter() - start
+
+    after = imbalance(counts)
+    moved = 0
+    if not df_routes.empty:
+        moved = float(df_routes["moved_out"].sum() + df_routes["moved_in"].sum())
+    return {
+        **scenario,
+        "runtime": runtime,
+        "moves": len(df_routes),
+        "steps": int(df_routes["step"].max()) if not df_routes.empty else 0,
+        "bikes_moved": moved,
+        "imbalance_before": before,
+        "imbalance_after": after,
+        "rebalanced": before - after
+    }
+
+
+def run_scenarios(
+    distance: Union[ShortestPaths, pd.DataFrame],
+    snapshots: Dict[str, Dict[str, float]],
+    grid: List[Dict],
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """在进程池中并行运行 快照 × 参数网格 的所有多车调度场景
+
+    参数:
+        distance: 距离矩阵（ShortestPaths 缓存或 DataFrame），各进程以内存映射方式只读共享
+        snapshots: {快照名: 站点数量字典}，每个场景使用一份拷贝，原字典不会被修改
+        grid: 参数字典列表，键为 multi_vehicle_dispatch 的参数（num_vehicles、max_steps、a、b、c）
+        max_workers: 进程数，默认使用全部 CPU
+
+    返回:
+        每个场景一行的结果表，包含场景参数、运行时间和调度效果指标
+    """
+    tasks = [
+        ({"snapshot": name, **params}, counts)
+        for name, counts in snapshots.items()
+        for params in grid
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dist_path, names = shared_matrix_file(distance, tmp_dir)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(dist_path, names)
+        ) as pool:
+            futures = [pool.submit(_run_scenario, scenario, counts) for scenario, counts in tasks]
+            rows = [{"scenario": n, **future.result()} for n, future in enumerate(futures)]
+
+    return pd.DataFrame(rows)
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+# 距离矩阵内容哈希的缓存：{id(DataFrame): (弱引用, 哈希)}，DataFrame 被回收时自动删除
+_HASHES: Dict[int, Tuple[weakref.ref, str]] = {}
+
+
+def _nbytes(value) -> int:
+    """缓存值占用的字节数（数组或数组组成的元组）"""
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return getattr(value, "nbytes", 0)
+
+
+class LRUCache:
+    """按最近使用顺序淘汰的缓存（OrderedDict 实现），可在多次调用、多个线程之间共享
+
+    同时按条目数 maxsize 和总字节数 max_bytes 限制容量（None 表示不限制），超出时淘汰最久未使用的条目；
+    最近放入的一条总会保留，即使它本身超过 max_bytes。
+    """
+
+    def __init__(self, maxsize: Optional[int] = 8, max_bytes: Optional[int] = None):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value) -> None:
+        with self._lock:
+            if key in self._data:
+                self._bytes -= _nbytes(self._data.pop(key))
+            self._data[key] = value
+            self._bytes += _nbytes(value)
+            self._evict()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]):
+        """命中时直接返回，否则调用 compute() 计算并放入缓存"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _evict(self) -> None:
+        while len(self._data) > 1 and (
+            (self.maxsize is not None and len(self._data) > self.maxsize)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, value = self._data.popitem(last=False)
+            self._bytes -= _nbytes(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        """命中次数、未命中次数、条目数和占用字节数"""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "bytes": self._bytes}
+
+
+_MISSING = object()
+
+
+def matrix_hash(df_distance: pd.DataFrame) -> str:
+    """距离矩阵的内容哈希（数值和行列站点名）
+
+    同一个 DataFrame 对象只计算一次，之后按对象复用结果，因此缓存假定矩阵在使用期间不会被原地修改；
+    内容相同的不同对象（如各子进程各自加载的同一份矩阵）得到相同的哈希。
+    直接哈希矩阵本身的数据缓冲区（包括内存映射的缓存），不转换类型也不复制整个矩阵；
+    dtype 和形状计入哈希，数值相同但 dtype 不同的矩阵哈希不同。
+    """
+    key = id(df_distance)
+    cached = _HASHES.get(key)
+    if cached is not None and cached[0]() is df_distance:
+        return cached[1]
+
+    digest = hashlib.blake2b(digest_size=16)
+    values = df_distance.to_numpy()
+    if values.dtype == object:
+        # 各列类型不同时 to_numpy 得到对象数组，只能转换后再哈希
+        values = values.astype(np.float64)
+    digest.update(f"{values.dtype.str}{values.shape}".encode())
+    if values.flags.c_contiguous:
+        digest.update(values.data)
+    else:
+        # 非 C 连续存储时逐行复制，不一次复制整个矩阵；与连续存储时哈希的字节相同
+        for row in values:
+            digest.update(np.ascontiguousarray(row).data)
+    digest.update(names_hash(df_distance.index).encode())
+    digest.update(names_hash(df_distance.columns).encode())
+    result = digest.hexdigest()
+
+    _HASHES[key] = (weakref.ref(df_distance, lambda _, key=key: _HASHES.pop(key, None)), result)
+    return result
+
+
+def names_hash(names: Sequence) -> str:
+    """站点顺序的哈希，作为对齐后矩阵缓存键的一部分"""
+    digest = hashlib.blake2b(digest_size=16)
+    for name in names:
+        digest.update(str(name).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def readonly(array: np.ndarray) -> np.ndarray:
+    """缓存中的数组被多个引擎共享，设为只读防止被意外修改"""
+    array.flags.writeable = False
+    return array
@@ -1,109 +1,95 @@
-import pandas as pd
-import math
-import heapq
-import networkx as nx
-import matplotlib.pyplot as plt
-import matplotlib as mpl
-
-# 设置中文字体，解决乱码问题
-mpl.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'STHeiti'] 
-mpl.rcParams['axes.unicode_minus'] = False
-
-# 读取 Excel 数据
-points_path = r"D:\MMC\mmc\data\points.xlsx"
-edges_path = r"D:\MMC\mmc\data\edges.xlsx"
-df_points = pd.read_excel(points_path, sheet_name="Sheet2")
-df_edges = pd.read_excel(edges_path, sheet_name="Sheet1")
-
-points = {row["name"]: (row["x"], row["y"]) for _, row in df_points.iterrows()}
-edges = [(row["from"], row["to"]) for _, row in df_edges.iterrows()]
-
-# 计算距离
-def euclidean_distance(p1, p2):
-    return math.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
-
-def build_graph(points, edges):
-    graph = {name: [] for name in points}
-    for name1, name2 in edges:
-        dist = euclidean_distance(points[name1], points[name2])
-        graph[name1].append((name2, dist))
-        graph[name2].append((name1, dist))
-    return graph
-
-graph = build_graph(points, edges)
-
-# Dijkstra 算法：从一个点出发，对每一个点找最短距离，并进行比较，找所有最短路径
-def dijkstra_all(graph, start):
-    queue = [(0, start)]
-    distances = {node: float('inf') for node in graph}
-    previous = {node: None for node in graph}
-    distances[start] = 0
-
-    while queue:
-        current_dist, current_node = heapq.heappop(queue)
-
-        for neighbor, weight in graph[current_node]:
-            distance = current_dist + weight
-            if distance < distances[neighbor]:
-                distances[neighbor] = distance
-                previous[neighbor] = current_node
-                heapq.heappush(queue, (distance, neighbor))
-
-    return distances, previous
-
-# 所有两点之间最短路径距离
-all_shortest = []
-for start in points:
-    distances, _ = dijkstra_all(graph, start)
-    for end in points:
-        if start != end:
-            all_shortest.append({
-                "From": start,
-                "To": end,
-                "Distance": distances[end]
-            })
-
-df_shortest = pd.DataFrame(all_shortest)
-
-place_names = list(points.keys())
-distance_matrix = pd.DataFrame(index=place_names, columns=place_names)
-
-for start in place_names:
-    distances, _ = dijkstra_all(graph, start)
-    for end in place_names:
-        distance_matrix.loc[start, end] = round(distances[end], 2)
-
-'''可选：保存数据    
-output_path = r"D:\MMC\mmc\data\shortest_new.xlsx"
-df_shortest.to_excel(output_path, index=False)
-output_matrix_path = r"D:\MMC\mmc\data\shortest_matrix_new.xlsx"
-distance_matrix.to_excel(output_matrix_path)
-'''
-# 可视化：画点图和路径图
-# 这里逆时针旋转坐标系90度，使得图形能完整输出
+import os
+import argparse
+from typing import List, Optional
 
+from . import DATA_DIR
+
+
+# 可视化时可逆时针旋转坐标系90度，使得图形能完整输出
 def rotate_coords(points_dict):
     return {name: (-y, x) for name, (x, y) in points_dict.items()}
-# 如需旋转90度，可取消下行注释
-#points = rotate_coords(points)
 
-G = nx.Graph()
-for name, coord in points.items():
-    G.add_node(name, pos=coord)
 
-for name1, name2 in edges:
-    dist = euclidean_distance(points[name1], points[name2])
-    G.add_edge(name1, name2, weight=round(dist, 2))
+def _sheet(value: str):
+    """sheet 参数：纯数字按序号（从 0 开始），否则按名称"""
+    return int(value) if value.isdigit() else value
+
+
+def add_graph_arguments(parser: argparse.ArgumentParser) -> None:
+    """路网输入参数，各子命令共用"""
+    parser.add_argument("--points", default=os.path.join(DATA_DIR, "points.xlsx"), help="站点坐标文件")
+    parser.add_argument("--edges", default=os.path.join(DATA_DIR, "edges.xlsx"), help="相邻站点对文件")
+    parser.add_argument("--points-sheet", type=_sheet, default=0, help="站点坐标所在 sheet（名称或序号），默认第一个")
+    parser.add_argument("--edges-sheet", type=_sheet, default="Sheet1", help="相邻站点对所在 sheet（名称或序号）")
+    parser.add_argument("--cache-dir", help="二进制缓存目录，默认在 edges 文件旁的 shortest_cache")
+
+
+def add_format_argument(parser: argparse.ArgumentParser) -> None:
+    """结果表输出格式参数，默认由输出路径的扩展名判断（.csv / .parquet / .xlsx）"""
+    parser.add_argument("--format", choices=["csv", "parquet", "excel"],
+                        help="输出格式，默认由扩展名判断；parquet 需要安装 pyarrow")
+
+
+def load_shortest(args: argparse.Namespace):
+    """按 add_graph_arguments 的参数读取最短路缓存，points/edges 变化时自动重建"""
+    from .shortest import cached_shortest_paths
+
+    return cached_shortest_paths(
+        args.points, args.edges, args.cache_dir,
+        points_sheet=args.points_sheet, edges_sheet=args.edges_sheet
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--image", default=os.path.join(DATA_DIR, "shortest_network.png"),
+                        help="路网图输出路径（png/svg），为空字符串时不画图")
+    parser.add_argument("--rotate", action="store_true", help="画图时把坐标系逆时针旋转90度")
+    parser.add_argument("--long-out", help="可选：From/To/Distance 长表输出路径（.parquet / .csv / .xlsx）")
+    parser.add_argument("--matrix-out", help="可选：距离矩阵输出路径（.parquet / .csv / .xlsx）")
+    add_format_argument(parser)
+
+
+def run(args: argparse.Namespace) -> None:
+    from .output import write_table
+    from .shortest import read_graph
+
+    # 所有两点之间最短路径距离：稀疏邻接矩阵上一次性求全源最短路
+    # 结果同时写入 shortest_cache 二进制缓存，调度程序直接内存映射读取
+    shortest = load_shortest(args)
+    print(f"最短路矩阵：{len(shortest.names)} 个站点")
+
+    # 长表有 N² 行，按起点分块写出；站点较多时超过 Excel 行数上限，应使用 parquet 或 csv
+    if args.long_out:
+        rows = write_table(shortest.long_chunks(), args.long_out, args.format)
+        print(f"长表已保存：{args.long_out}（{rows} 行）")
+    if args.matrix_out:
+        # 第一列为站点名，读取时用 index_col=0
+        matrix = shortest.matrix_frame(decimals=2).reset_index(names="")
+        write_table(matrix, args.matrix_out, args.format)
+        print(f"距离矩阵已保存：{args.matrix_out}")
+
+    if args.image:
+        from .render import render_network, use_chinese_font
+
+        points, edges = read_graph(args.points, args.edges, args.points_sheet, args.edges_sheet)
+        if args.rotate:
+            points = rotate_coords(points)
+        # 路网图用 Agg 直接写入文件，不打开窗口；站点较多时自动省略站名
+        use_chinese_font()
+        render_network(points, edges, args.image, title="最短路径图", edge_labels=len(points) <= 200)
+        print(f"路网图已保存：{args.image}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="计算所有站点之间的最短路径距离")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
 
-pos = nx.get_node_attributes(G, 'pos')
-plt.figure(figsize=(10, 8))
-nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=200, font_size=5)
-labels = nx.get_edge_attributes(G, 'weight')
-nx.draw_networkx_edge_labels(G, pos, edge_labels=labels, font_size=5)
-plt.title("最短路径图")
-plt.axis("equal")
-plt.tight_layout()
-plt.show()
 
 """热力图，但是可观性一般
 G = nx.Graph()
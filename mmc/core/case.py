@@ -1,87 +1,52 @@
-import pandas as pd
-import math
-import matplotlib.pyplot as plt
+import os
+import argparse
+from typing import List, Optional
 
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'STHeiti']
-plt.rcParams['axes.unicode_minus'] = False
+from . import DATA_DIR
+from .calc_shortest import add_format_argument, add_graph_arguments, load_shortest
 
-# 参数设置（a + b + c = 1）
-a = 0.6
-b = 0.2
-c = 0.2
 
-df_distance = pd.read_excel(r"D:\MMC\mmc\data\shortest_matrix.xlsx", index_col=0)
-supply_path = r"D:\MMC\mmc\data\supply.xlsx"
-demand_path = r"D:\MMC\mmc\data\demand.xlsx"
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--supply", default=os.path.join(DATA_DIR, "supply.xlsx"), help="各时间段供给表")
+    parser.add_argument("--demand", default=os.path.join(DATA_DIR, "demand.xlsx"), help="各时间段需求表")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "nij_by_time.xlsx"),
+                        help="输出路径：.xlsx 时每个时间段一个 sheet，csv / parquet 时为目录，每个时间段一个文件")
+    add_format_argument(parser)
+    # 参数设置（a + b + c = 1）
+    parser.add_argument("-a", type=float, default=0.6)
+    parser.add_argument("-b", type=float, default=0.2)
+    parser.add_argument("-c", type=float, default=0.2)
+    parser.add_argument("--workers", type=int, help="进程数，默认使用全部 CPU")
 
-supply_sheets = pd.read_excel(supply_path, sheet_name=None)
-demand_sheets = pd.read_excel(demand_path, sheet_name=None)
 
-writer = pd.ExcelWriter(r"D:\MMC\mmc\data\nij_by_time.xlsx", engine='openpyxl', mode='w')
+def run(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from .output import TableSet
+    from .time_slots import nij_by_time
 
-for time_slot in supply_sheets:
-    print(f"处理时间段：{time_slot}")
-    df_supply = supply_sheets[time_slot]
-    df_demand = demand_sheets.get(time_slot)
+    # 距离矩阵从二进制缓存内存映射读取，points/edges 变化时自动重建
+    shortest = load_shortest(args)
 
-    if df_demand is None:
-        print(f"[警告] 时间段 {time_slot} 无匹配的需求数据，跳过")
-        continue
+    supply_sheets = pd.read_excel(args.supply, sheet_name=None)
+    demand_sheets = pd.read_excel(args.demand, sheet_name=None)
 
-    if 'location' not in df_supply or 'supply' not in df_supply:
-        print(f"[警告] supply sheet '{time_slot}' 缺少必要列")
-        continue
-    if 'location' not in df_demand or 'demand' not in df_demand:
-        print(f"[警告] demand sheet '{time_slot}' 缺少必要列")
-        continue
+    # 各时间段并行计算，每个时间段算完立即写入对应 sheet / 文件
+    with TableSet(args.output, args.format) as tables:
+        nij_by_time(
+            shortest, supply_sheets, demand_sheets, tables.write,
+            args.a, args.b, args.c, args.workers
+        )
 
-    supply_dict = dict(zip(df_supply['location'], df_supply['supply']))
-    demand_dict = dict(zip(df_demand['location'], df_demand['demand']))
+    print("所有时间段的 nij 计算完成，结果已保存。")
 
-    valid_supplies = [min(supply_dict[j], 20) for j in df_supply['location']
-                      if j in supply_dict and supply_dict[j] > 0]
-    valid_demands = [demand_dict[i] for i in df_demand['location']
-                     if i in demand_dict and demand_dict[i] > 0]
-    if not valid_supplies or not valid_demands:
-        print(f"[跳过] 时间段 {time_slot} 缺少有效供需点")
-        continue
 
-    avg_Njf = sum(valid_supplies) / len(valid_supplies)
-    avg_Nin = sum(valid_demands) / len(valid_demands)
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="按时间段计算供需站点对的调度优先级 nij")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
 
-    nij_list = []
-    for j in df_supply['location']:
-        for i in df_demand['location']:
-            try:
-                if supply_dict[j] <= 0 or demand_dict[i] <= 0:
-                    continue
-                tij = df_distance.loc[j, i] / 416.7  # 单位：米/分钟
-                Njf = min(supply_dict[j], 20)
-                Nin = demand_dict[i]
 
-                if tij > 0:
-                    nij = a / tij + b * Njf / avg_Njf + c * Nin / avg_Nin
-                    nij_list.append({
-                        'From': j,
-                        'To': i,
-                        'tij': tij,
-                        'Njf': Njf,
-                        'Nin': Nin,
-                        'nij': nij
-                    })
-            except KeyError:
-                continue
-
-    if nij_list:
-        df_nij = pd.DataFrame(nij_list)
-        df_nij = df_nij.dropna(subset=['nij'])
-        df_nij = df_nij[df_nij['nij'] > 0]
-        if not df_nij.empty:
-            df_nij.to_excel(writer, sheet_name=time_slot, index=False)
-        else:
-            print(f"[跳过] 时间段 {time_slot} 所有 nij 无效")
-    else:
-        print(f"[无结果] 时间段 {time_slot} nij_list 为空")
-
-writer.close()
-print("所有时间段的 nij 计算完成，结果已保存。")
+# 多进程在 Windows 上以 spawn 方式启动，主程序必须放在 __main__ 保护下
+if __name__ == "__main__":
+    main()
@@ -1,27 +1,11 @@
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.font_manager import FontProperties
-import matplotlib.gridspec as gridspec
-
-# 设置中文字体，解决乱码问题
-plt.rcParams['font.family'] = 'Microsoft YaHei'
-plt.rcParams['axes.unicode_minus'] = False
-
-file_path = r'D:\MMC\mmc\data\2.xlsx'
-df = pd.read_excel(file_path)
-df.columns = df.columns.str.strip()
-df.set_index(df.columns[0], inplace=True)
-df.dropna(axis=1, how='all', inplace=True)
-if '总数' in df.columns:
-    df.drop(columns='总数', inplace=True)
-
-df.index = df.index.map(lambda t: t.strftime('%H:%M'))
-df.index = pd.to_datetime(df.index, format='%H:%M')
-df = df.sort_index()
-df.index = df.index.strftime('%H:%M')
-
-groups = {
+import os
+import argparse
+from typing import Dict, List, Optional
+
+from . import DATA_DIR
+
+# 站点按功能分区
+GROUPS: Dict[str, List[str]] = {
     "校门": ["东门", "南门", "北门"],
     "食堂": ["一食堂", "二食堂", "三食堂"],
     "宿舍": ["梅苑1栋", "菊苑1栋"],
@@ -29,23 +13,69 @@ groups = {
     "运动生活": ["网球场", "体育馆", "校医院"]
 }
 
-fig = plt.figure(figsize=(18, 12))
-gs = gridspec.GridSpec(3, 2, figure=fig, hspace=1, wspace=0.3)
-
-# 创建子图
-for i, (group_name, locations) in enumerate(groups.items(), 1):
-    ax = fig.add_subplot(gs[i-1])
-    
-    for loc in locations:
-        if loc in df.columns:
-            ax.plot(df.index, df[loc], marker='o', label=loc)
-    plt.title(group_name, fontsize=14)
-    plt.xlabel("时间")
-    plt.ylabel("单车数量")
-    plt.xticks(rotation=45)
-    plt.grid(True)
-    plt.legend()
-
-plt.subplots_adjust(left=0.1, bottom=0.1, right=0.9, top=0.9)
-plt.suptitle("各区域时间段单车数量改变趋势", fontsize=20, y=0.98)
-plt.show()
\ No newline at end of file
+
+def read_trends(file_path: str):
+    """读取各站点不同时间段的单车数量表（2.xlsx），行索引为 HH:MM 时间，按时间排序"""
+    import pandas as pd
+
+    df = pd.read_excel(file_path)
+    df.columns = df.columns.str.strip()
+    df.set_index(df.columns[0], inplace=True)
+    df.dropna(axis=1, how='all', inplace=True)
+    if '总数' in df.columns:
+        df.drop(columns='总数', inplace=True)
+
+    df.index = df.index.map(lambda t: t.strftime('%H:%M'))
+    df.index = pd.to_datetime(df.index, format='%H:%M')
+    df = df.sort_index()
+    df.index = df.index.strftime('%H:%M')
+    return df
+
+
+def render_trends(df, output: str, groups: Dict[str, List[str]] = GROUPS) -> str:
+    """各分区单车数量随时间变化的折线图，用 Agg 直接写入文件"""
+    import matplotlib.gridspec as gridspec
+    from matplotlib.figure import Figure
+    from .render import save_figure, use_chinese_font
+
+    use_chinese_font()
+    fig = Figure(figsize=(18, 12))
+    gs = gridspec.GridSpec(3, 2, figure=fig, hspace=1, wspace=0.3)
+
+    # 创建子图
+    for i, (group_name, locations) in enumerate(groups.items(), 1):
+        ax = fig.add_subplot(gs[i-1])
+
+        for loc in locations:
+            if loc in df.columns:
+                ax.plot(df.index, df[loc], marker='o', label=loc)
+        ax.set_title(group_name, fontsize=14)
+        ax.set_xlabel("时间")
+        ax.set_ylabel("单车数量")
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.grid(True)
+        ax.legend()
+
+    fig.subplots_adjust(left=0.1, bottom=0.1, right=0.9, top=0.9)
+    fig.suptitle("各区域时间段单车数量改变趋势", fontsize=20, y=0.98)
+    return save_figure(fig, output, dpi=100)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--input", default=os.path.join(DATA_DIR, "2.xlsx"), help="各时间段站点单车数量表")
+    parser.add_argument("--image", default=os.path.join(DATA_DIR, "trends.png"))
+
+
+def run(args: argparse.Namespace) -> None:
+    render_trends(read_trends(args.input), args.image)
+    print(f"趋势图已保存：{args.image}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="各区域时间段单车数量改变趋势图")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
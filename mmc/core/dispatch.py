@@ -1,23 +1,56 @@
-import pandas as pd
-import math
-import matplotlib.pyplot as plt
-import sys
+import os
+import logging
+import argparse
+from typing import List, Optional
 
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'STHeiti']
-plt.rcParams['axes.unicode_minus'] = False
+from . import DATA_DIR
+from .calc_shortest import add_format_argument, add_graph_arguments, load_shortest
 
-from sim_dispatch import (
-    simulate_dispatch_from_nij
-)
 
-distance_file = r"D:\MMC\mmc\data\shortest_matrix.xlsx"
-count_file = r"D:\MMC\mmc\data\points_number.xlsx"
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--counts", default=os.path.join(DATA_DIR, "points_number.xlsx"), help="站点数量文件")
+    parser.add_argument("--sheet", default="Sheet1", help="站点数量所在 sheet")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "dispatch_result.xlsx"))
+    add_format_argument(parser)
+    parser.add_argument("--steps", type=int, default=10)
+    parser.add_argument("--nc-init", type=float, default=0, help="调度车初始载量")
+    parser.add_argument("--start", help="起点，默认按 nij 最大值自动选择")
+    parser.add_argument("-a", type=float, default=0.2)
+    parser.add_argument("-b", type=float, default=0.2)
+    parser.add_argument("-c", type=float, default=0.2)
+    parser.add_argument("-q", "--quiet", action="store_true", help="不在终端输出调度过程")
 
-df_distance = pd.read_excel(distance_file, index_col=0)
-df_counts = pd.read_excel(count_file, sheet_name="Sheet1")
-df_counts = df_counts[pd.to_numeric(df_counts["count"], errors='coerce').notnull()]
-bike_counts = dict(zip(df_counts['location'], df_counts['count']))
 
-result = simulate_dispatch_from_nij(df_distance, bike_counts, Nc_init=0, max_steps=10)
-result_df = pd.DataFrame(result)
-result_df.to_excel(r"D:\MMC\mmc\data\dispatch_result.xlsx", index=False)
\ No newline at end of file
+def run(args: argparse.Namespace) -> None:
+    import pandas as pd
+    from .batch import read_counts
+    from .output import write_table
+    from .sim_dispatch import simulate_dispatch_from_nij
+
+    # 在终端输出调度过程（调度循环通过 logging 记录每次调度）
+    if not args.quiet:
+        logging.basicConfig(format="%(message)s")
+        logging.getLogger("mmc.dispatch").setLevel(logging.DEBUG)
+
+    # 距离矩阵从二进制缓存内存映射读取，points/edges 变化时自动重建
+    df_distance = load_shortest(args).matrix_frame()
+    bike_counts = read_counts(args.counts, args.sheet)
+
+    result = simulate_dispatch_from_nij(
+        df_distance, bike_counts, args.a, args.b, args.c,
+        Nc_init=args.nc_init, max_steps=args.steps, start_point=args.start
+    )
+    result_df = pd.DataFrame(result)
+    write_table(result_df, args.output, args.format)
+    print(f"调度结果已保存：{args.output}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="单车调度")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
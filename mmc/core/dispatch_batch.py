@@ -0,0 +1,52 @@
+import os
+import argparse
+from typing import List, Optional
+
+from . import DATA_DIR
+from .calc_shortest import add_format_argument, add_graph_arguments, load_shortest
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--counts", default=os.path.join(DATA_DIR, "points_number.xlsx"),
+                        help="站点数量文件，每个 sheet 是一个需求快照")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "dispatch_batch.xlsx"))
+    add_format_argument(parser)
+    # 调度参数网格，可按需增减取值
+    parser.add_argument("--vehicles", type=int, nargs="+", default=[2, 3, 5])
+    parser.add_argument("--steps", type=int, nargs="+", default=[5, 20])
+    parser.add_argument("-a", type=float, nargs="+", default=[0.2, 0.6])
+    parser.add_argument("-b", type=float, nargs="+", default=[0.2])
+    parser.add_argument("-c", type=float, nargs="+", default=[0.2])
+    parser.add_argument("--workers", type=int, help="进程数，默认使用全部 CPU")
+
+
+def run(args: argparse.Namespace) -> None:
+    from .batch import read_snapshots, run_scenarios, scenario_grid
+    from .output import write_table
+
+    shortest = load_shortest(args)
+    snapshots = read_snapshots(args.counts)
+
+    grid = scenario_grid(
+        num_vehicles=args.vehicles,
+        max_steps=args.steps,
+        a=args.a,
+        b=args.b,
+        c=args.c
+    )
+
+    df_summary = run_scenarios(shortest, snapshots, grid, args.workers)
+    write_table(df_summary, args.output, args.format)
+    print(df_summary)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="在多个需求快照和参数组合上批量运行多车调度")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+# 多进程在 Windows 上以 spawn 方式启动，主程序必须放在 __main__ 保护下
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,113 @@
-import pandas as pd
-import matplotlib.pyplot as plt
-
-plt.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'STHeiti']
-plt.rcParams['axes.unicode_minus'] = False
-
-from sim_dispatch_multi import (
-    multi_vehicle_dispatch,
-    plot_vehicle_routes
-)
-
-distance_file = r"D:\MMC\mmc\data\shortest_matrix.xlsx"
-count_file = r"D:\MMC\mmc\data\points_number.xlsx"
-
-df_distance = pd.read_excel(distance_file, index_col=0)
-df_counts = pd.read_excel(count_file, sheet_name="Sheet3")
-df_counts = df_counts[pd.to_numeric(df_counts["count"], errors='coerce').notnull()]
-bike_counts = dict(zip(df_counts['location'], df_counts['count']))
-
-# 调用多车调度
-df_result = multi_vehicle_dispatch(
-    df_distance=df_distance,
-    bike_counts=bike_counts,
-    num_vehicles=3,
-    max_steps=5
-)
-
-result_path = r"D:\MMC\mmc\data\dispatch_result_multi.xlsx"
-coord_file = r"D:\MMC\mmc\data\points.xlsx"
-df_result.to_excel(result_path, index=False)
-plot_vehicle_routes(df_result, coord_file)
\ No newline at end of file
+import os
+import logging
+import argparse
+from typing import List, Optional
+
+from . import DATA_DIR
+from .calc_shortest import add_format_argument, add_graph_arguments, load_shortest
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--counts", default=os.path.join(DATA_DIR, "points_number.xlsx"), help="站点数量文件")
+    parser.add_argument("--sheet", default="Sheet3", help="站点数量所在 sheet")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "dispatch_result_multi.xlsx"))
+    add_format_argument(parser)
+    parser.add_argument("--coords", default=os.path.join(DATA_DIR, "points.xlsx"), help="画图用的坐标文件")
+    parser.add_argument("--image", default=os.path.join(DATA_DIR, "dispatch_routes_multi.png"),
+                        help="调度路线图输出路径（png/svg），为空字符串时不画图")
+    parser.add_argument("--vehicles", type=int, default=3)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--mode", choices=["steps", "events"], default="steps",
+                        help="steps：所有车辆按步同步调度；events：按实际行驶时间推进的离散事件模拟")
+    parser.add_argument("--horizon", type=float, help="events 模式的模拟时长（分钟），默认调度到无法继续")
+    parser.add_argument("--zones", help="分区分层调度：groups 使用 case2.GROUPS 功能分区，整数 k 表示按距离聚类为 k 个分区")
+    parser.add_argument("--workers", type=int, help="分区调度的进程数，默认使用全部 CPU")
+    parser.add_argument("-a", type=float, default=0.2)
+    parser.add_argument("-b", type=float, default=0.2)
+    parser.add_argument("-c", type=float, default=0.2)
+    parser.add_argument("--planner", choices=["greedy", "lookahead"], default="greedy")
+    parser.add_argument("--assignment", choices=["sequential", "matching"], default="sequential")
+    parser.add_argument("--neighbours", type=int, help="只在最近的 k 个站点中选择目标站（按最短路距离）")
+    parser.add_argument("-q", "--quiet", action="store_true", help="不在终端输出调度过程")
+
+
+def run(args: argparse.Namespace) -> None:
+    from .batch import read_counts
+    from .output import write_table
+    from .shortest import attach_paths
+    from .sim_dispatch_multi import multi_vehicle_dispatch, plot_vehicle_routes
+
+    # 在终端输出调度过程（调度循环通过 logging 记录每次调度）
+    if not args.quiet:
+        logging.basicConfig(format="%(message)s")
+        logging.getLogger("mmc.dispatch").setLevel(logging.DEBUG)
+
+    # 距离矩阵从二进制缓存内存映射读取，points/edges 变化时自动重建
+    shortest = load_shortest(args)
+    df_distance = shortest.matrix_frame()
+    bike_counts = read_counts(args.counts, args.sheet)
+
+    neighbours = None
+    if args.neighbours:
+        from .neighbours import Neighbourhood
+        neighbours = Neighbourhood.from_matrix(df_distance, k=args.neighbours)
+
+    if args.zones:
+        from .zones import cluster_zones, hierarchical_dispatch, zones_from_groups
+        if args.mode != "steps" or args.planner != "greedy" or args.assignment != "sequential" or neighbours is not None:
+            raise SystemExit("--zones 只支持 steps 模式的 greedy / sequential 调度")
+        if args.zones == "groups":
+            from .case2 import GROUPS
+            zones = zones_from_groups(GROUPS, df_distance)
+        else:
+            zones = cluster_zones(int(args.zones), df_distance)
+        df_result = hierarchical_dispatch(
+            shortest, bike_counts, zones, args.vehicles, args.steps, args.a, args.b, args.c,
+            max_workers=args.workers
+        )
+    elif args.mode == "events":
+        from .events import event_dispatch
+        if args.assignment != "sequential":
+            raise SystemExit("events 模式不支持 --assignment matching")
+        df_result, df_vehicles, summary = event_dispatch(
+            df_distance, bike_counts, args.vehicles, args.horizon,
+            a=args.a, b=args.b, c=args.c, planner=args.planner, neighbours=neighbours
+        )
+        print(df_vehicles.to_string(index=False))
+        print("，".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                       for key, value in summary.items()))
+    else:
+        # 调用多车调度
+        df_result = multi_vehicle_dispatch(
+            df_distance=df_distance,
+            bike_counts=bike_counts,
+            num_vehicles=args.vehicles,
+            max_steps=args.steps,
+            a=args.a,
+            b=args.b,
+            c=args.c,
+            planner=args.planner,
+            assignment=args.assignment,
+            neighbours=neighbours
+        )
+
+    df_result = attach_paths(df_result, shortest)
+    write_table(df_result, args.output, args.format)
+    print(f"调度结果已保存：{args.output}")
+
+    if args.image:
+        from .render import use_chinese_font
+        use_chinese_font()
+        plot_vehicle_routes(df_result, args.coords, shortest, output=args.image)
+        print(f"调度路线图已保存：{args.image}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="多车协同调度")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+import heapq
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple, Union
+
+from .fleet import RouteBuffer
+from .instrument import logger
+from .lookahead import LookaheadPlanner
+from .neighbours import Neighbourhood
+from .sim_dispatch_multi import _prepare_dispatch, _resolve_planner
+
+
+def event_dispatch(
+    df_distance: pd.DataFrame,
+    bike_counts: Dict[str, float],
+    num_vehicles: int = 3,
+    horizon: Optional[float] = None,
+    max_events: Optional[int] = None,
+    a: float = 0.2,
+    b: float = 0.2,
+    c: float = 0.2,
+    planner: Union[str, LookaheadPlanner] = "greedy",
+    neighbours: Optional[Neighbourhood] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame, Dict]:
+    """按实际行驶时间推进的离散事件多车调度
+
+    multi_vehicle_dispatch 每一步让所有车辆各调度一次，短途车辆要等待长途车辆；这里每辆车到达
+    目标站的时刻（出发时刻 + tij 分钟）作为它的下一个决策事件放入按时间排序的堆中，
+    总是先处理最早到达的车辆，计算量与调度事件数成正比。
+
+    目标站选择和装卸规则与 multi_vehicle_dispatch 相同，起点在 0 时刻按相同规则分配并装车（计入 0 时刻的失衡量变化）。
+    调度在车辆出发时就确定下来，目标站的数量立即按卸车/取车结果更新（相当于预约，
+    其他车辆不会再去补同一个缺口）；统计时出发站的变化计在出发时刻，目标站的变化计在到达时刻。
+    没有可行目标站的车辆原地等待，其他车辆完成一次调度后再重新决策；所有车辆都在等待时模拟结束。
+
+    参数:
+        horizon: 模拟时长（分钟），晚于该时刻的决策不再执行；None 表示一直调度到无法继续
+        max_events: 调度次数上限
+        planner: "greedy"、"lookahead" 或 LookaheadPlanner 实例，同 multi_vehicle_dispatch
+        neighbours: 邻近站点表，同 multi_vehicle_dispatch
+
+    返回:
+        (routes, vehicles, summary)
+        routes: 调度记录，列同 multi_vehicle_dispatch（step 为该车的第几次调度），另有 depart / arrive 时刻（分钟）
+        vehicles: 每辆车的调度次数、搬运数量、行驶时间、等待时间和利用率（行驶时间 / 模拟时长）；
+            给出 horizon 时只统计 horizon 之前的行驶时间，利用率不超过 1
+        summary: 调度前后失衡量（各站 |数量| 之和）、模拟时长 makespan（给出 horizon 时等于 horizon，
+            否则为最后一次到达的时刻）、最后一次到达的时刻 last_arrival（horizon 之前出发的车辆可能在其后到达）和
+            time_to_rebalance（最后一次使失衡量减少的时刻：起点装车为 0，调度为到达目标站的时刻，可能晚于 horizon）
+    """
+    planner = _resolve_planner(planner)
+    fleet, engine, index = _prepare_dispatch(df_distance, bike_counts, num_vehicles, a, b, c, neighbours)
+    counts, loads, position = fleet.counts, fleet.loads, fleet.position
+    locations = fleet.locations
+    cap = fleet.max_capacity
+    initial = np.abs([bike_counts[name] for name in locations])
+    before = float(initial.sum())
+
+    # 事件堆：(可决策时刻, 序号, 车辆)，序号保证同一时刻按入堆顺序处理
+    queue = [(0.0, v, v) for v in range(num_vehicles)]
+    heapq.heapify(queue)
+    seq = num_vehicles
+    waiting = []  # 没有可行目标站、等待状态变化的车辆
+
+    routes = RouteBuffer(capacity=max(num_vehicles * 8, 64), dtype=counts.dtype)
+    depart_times, arrive_times = [], []
+    moves = np.zeros(num_vehicles, dtype=np.int64)
+    busy = np.zeros(num_vehicles)
+    # 失衡量变化 (时刻, 变化量)，起点装车发生在 0 时刻
+    changes = [(0.0, float(delta)) for delta in (np.abs(counts) - initial)[np.abs(counts) != initial]]
+
+    while queue:
+        if max_events is not None and routes.size >= max_events:
+            break
+        now, _, v = heapq.heappop(queue)
+        if horizon is not None and now > horizon:
+            break
+        origin = position[v]
+
+        # 可行性与 multi_vehicle_dispatch 相同：当前点可取车则所有目标站都可行，否则只能去短缺站卸车
+        allowed = None
+        if not (loads[v] < cap and counts[origin] > 0):
+            if loads[v] <= 0:
+                waiting.append(v)
+                continue
+            allowed = lambda cand: counts[cand] < 0
+        if planner is None:
+            k, best_nij = index.best(origin, allowed)
+        else:
+            k, best_nij = planner.best(engine, counts, loads, v, origin)
+        if k < 0:
+            waiting.append(v)
+            continue
+
+        origin_before, target_before = abs(counts[origin]), abs(counts[k])
+        moved_out, moved_in = fleet.dispatch(v, origin, k)
+        arrive = now + float(engine.tij[origin, k])
+        changes.append((now, float(abs(counts[origin]) - origin_before)))
+        changes.append((arrive, float(abs(counts[k]) - target_before)))
+        engine.update_counts_at(np.array([origin, k]), counts[[origin, k]])
+        engine.update_loads(loads)
+
+        moves[v] += 1
+        busy[v] += (arrive if horizon is None else min(arrive, horizon)) - now
+        routes.append(moves[v], v, origin, k, moved_out, moved_in, loads[v], best_nij)
+        depart_times.append(now)
+        arrive_times.append(arrive)
+        logger.debug("%.1f 分钟 车辆%s调度：%s -> %s，%.1f 分钟到达, moved_in： %s，Nc_new：%s",
+                     now, v, locations[origin], locations[k], arrive, moved_in, loads[v])
+
+        heapq.heappush(queue, (arrive, seq, v))
+        seq += 1
+        # 状态已改变，等待中的车辆在当前时刻重新决策
+        for w in waiting:
+            heapq.heappush(queue, (now, seq, w))
+            seq += 1
+        waiting = []
+
+    fleet.write_back(bike_counts)
+
+    df_routes = routes.to_frame(locations)
+    if not df_routes.empty:
+        order = np.argsort(routes.vehicle[:routes.size], kind="stable")
+        df_routes["depart"] = np.asarray(depart_times)[order]
+        df_routes["arrive"] = np.asarray(arrive_times)[order]
+
+    last_arrival = max(arrive_times, default=0.0)
+    makespan = last_arrival if horizon is None else float(horizon)
+    reduced = [t for t, delta in changes if delta < 0]
+    df_vehicles = pd.DataFrame({
+        "vehicle_id": np.arange(num_vehicles),
+        "moves": moves,
+        "bikes_moved": (np.bincount(routes.vehicle[:routes.size], routes.moved_out[:routes.size]
+                                    + routes.moved_in[:routes.size], minlength=num_vehicles)),
+        "busy_minutes": busy,
+        "idle_minutes": makespan - busy,
+        "utilisation": busy / makespan if makespan > 0 else np.zeros(num_vehicles)
+    })
+    summary = {
+        "events": routes.size,
+        "imbalance_before": before,
+        "imbalance_after": float(np.abs(counts).sum()),
+        "makespan": makespan,
+        "last_arrival": last_arrival,
+        "time_to_rebalance": max(reduced, default=0.0)
+    }
+    return df_routes, df_vehicles, summary
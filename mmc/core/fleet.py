@@ -0,0 +1,167 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, Sequence, Tuple, Union
+
+# 调度车最大载量
+MAX_CAPACITY = 20
+
+
+class Fleet:
+    """数组形式的车队与站点状态
+
+    站点用整数下标表示，站点数量 counts、车辆载量 loads 和车辆位置 position 都是 NumPy 数组，
+    调度循环中不再做字符串键查找，也不为每辆车维护字典。
+    """
+
+    __slots__ = ("locations", "index", "counts", "loads", "position", "max_capacity")
+
+    def __init__(
+        self,
+        locations: Sequence[str],
+        bike_counts: Dict[str, float],
+        num_vehicles: int,
+        max_capacity: int = MAX_CAPACITY
+    ):
+        self.locations = list(locations)
+        self.index = {name: k for k, name in enumerate(self.locations)}
+        # 数量为整数时保存为整型数组，含小数（如平均值）时为浮点数组
+        self.counts = np.array([bike_counts[name] for name in self.locations])
+        if not np.issubdtype(self.counts.dtype, np.number):
+            self.counts = self.counts.astype(np.float64)
+        self.loads = np.zeros(num_vehicles, dtype=self.counts.dtype)
+        self.position = np.full(num_vehicles, -1, dtype=np.int64)
+        self.max_capacity = max_capacity
+
+    def select_starting_points(self) -> None:
+        """与 sim_dispatch_multi.select_starting_points 相同：按数量从大到小轮流分配起点并装车"""
+        order = np.argsort(-self.counts, kind="stable")
+        for v in range(len(self.loads)):
+            station = order[v % len(order)]
+            self.position[v] = station
+            load = min(self.counts[station], self.max_capacity)
+            self.loads[v] = load
+            self.counts[station] -= load
+
+    def dispatch(self, v: int, i: int, j: int) -> Tuple[float, float]:
+        """车辆 v 从站点 i 调度到站点 j，规则与 perform_dispatch 相同
+
+        返回:
+            (取车数量, 卸车数量)
+        """
+        counts = self.counts
+        cap = self.max_capacity
+        Nc = self.loads[v]
+        moved_out = moved_in = 0
+        can_pickup = Nc < cap
+
+        for k in (i, j):
+            if can_pickup and counts[k] > 0:  # 取车
+                moved_out = min(counts[k], cap - Nc)
+                counts[k] -= moved_out
+                Nc += moved_out
+            elif counts[k] < 0 and Nc > 0:  # 卸车
+                moved_in = min(-counts[k], Nc)
+                counts[k] += moved_in
+                Nc -= moved_in
+
+        self.loads[v] = Nc
+        self.position[v] = j
+        return moved_out, moved_in
+
+    def write_back(self, bike_counts: Dict[str, float]) -> None:
+        """把站点数量写回字典（保持原来原地修改 bike_counts 的行为）"""
+        for name, value in zip(self.locations, self.counts.tolist()):
+            bike_counts[name] = value
+
+
+def dispatch_batch(
+    counts: np.ndarray,
+    loads: np.ndarray,
+    i: Union[int, np.ndarray],
+    j: Union[int, np.ndarray],
+    max_capacity: int = MAX_CAPACITY
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Fleet.dispatch 的批量版本：同时在 B 个独立状态上执行一次调度（原地修改）
+
+    参数:
+        counts: 各状态的站点数量 (B, N)
+        loads: 各状态下调度车载量 (B,)
+        i, j: 各状态的出发站、目标站下标 (B,)，也可以是所有状态共用的单个下标
+
+    返回:
+        (取车数量, 卸车数量)，形状均为 (B,)
+    """
+    rows = np.arange(len(loads))
+    can_pickup = loads < max_capacity
+    moved_out = np.zeros_like(loads)
+    moved_in = np.zeros_like(loads)
+
+    for k in (i, j):
+        current = counts[rows, k]
+        pickup = can_pickup & (current > 0)  # 取车
+        unload = ~pickup & (current < 0) & (loads > 0)  # 卸车
+        out = np.where(pickup, np.minimum(current, max_capacity - loads), 0)
+        inn = np.where(unload, np.minimum(-current, loads), 0)
+        counts[rows, k] = current - out + inn
+        loads += out - inn
+        moved_out = np.where(pickup, out, moved_out)
+        moved_in = np.where(unload, inn, moved_in)
+
+    return moved_out, moved_in
+
+
+class RouteBuffer:
+    """按列预分配的调度记录缓冲区，容量不足时倍增，只在最后生成 DataFrame"""
+
+    __slots__ = ("step", "vehicle", "origin", "target", "moved_out", "moved_in", "load", "nij", "size")
+
+    def __init__(self, capacity: int = 64, dtype=np.int64):
+        capacity = max(int(capacity), 1)
+        self.step = np.empty(capacity, dtype=np.int64)
+        self.vehicle = np.empty(capacity, dtype=np.int64)
+        self.origin = np.empty(capacity, dtype=np.int64)
+        self.target = np.empty(capacity, dtype=np.int64)
+        self.moved_out = np.empty(capacity, dtype=dtype)
+        self.moved_in = np.empty(capacity, dtype=dtype)
+        self.load = np.empty(capacity, dtype=dtype)
+        self.nij = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+
+    def _grow(self) -> None:
+        for name in self.__slots__[:-1]:
+            column = getattr(self, name)
+            grown = np.empty(len(column) * 2, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, step, vehicle, origin, target, moved_out, moved_in, load, nij) -> None:
+        if self.size == len(self.step):
+            self._grow()
+        n = self.size
+        self.step[n] = step
+        self.vehicle[n] = vehicle
+        self.origin[n] = origin
+        self.target[n] = target
+        self.moved_out[n] = moved_out
+        self.moved_in[n] = moved_in
+        self.load[n] = load
+        self.nij[n] = nij
+        self.size = n + 1
+
+    def to_frame(self, locations: Sequence[str]) -> pd.DataFrame:
+        """生成与原 multi_vehicle_dispatch 相同格式的结果表（按车辆、再按时间排列）"""
+        n = self.size
+        if n == 0:
+            return pd.DataFrame()
+        order = np.argsort(self.vehicle[:n], kind="stable")
+        names = np.asarray(locations, dtype=object)
+        return pd.DataFrame({
+            "vehicle_id": self.vehicle[:n][order],
+            "step": self.step[:n][order],
+            "from": names[self.origin[:n][order]],
+            "moved_out": self.moved_out[:n][order],
+            "to": names[self.target[:n][order]],
+            "moved_in": self.moved_in[:n][order],
+            "Nc_after": self.load[:n][order],
+            "nij": self.nij[:n][order]
+        })
@@ -0,0 +1,62 @@
+import time
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# 调度过程日志（替代循环中的 print），需要时由调用方配置 logging 级别
+logger = logging.getLogger("mmc.dispatch")
+
+
+class Instrumentation:
+    """调度循环的可选性能埋点：计时器、计数器和逐步记录
+
+    调度函数的 instrument 参数为 None 时不做任何计时，埋点只剩一次布尔判断；
+    传入实例后按阶段累计耗时（priority 优先级更新、candidates 候选筛选、dispatch 执行调度），
+    并在每一步结束时生成一条记录，交给 callback 并写入 debug 日志。
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[Dict], None]] = None,
+        clock: Callable[[], float] = time.perf_counter,
+        keep_steps: bool = True
+    ):
+        self.callback = callback
+        self.clock = clock
+        self.keep_steps = keep_steps
+        self.timers: Dict[str, float] = defaultdict(float)
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.steps: List[Dict] = []
+
+    def add_time(self, name: str, seconds: float) -> None:
+        self.timers[name] += seconds
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    @contextmanager
+    def timer(self, name: str):
+        """计时上下文，用于循环之外的粗粒度计时"""
+        start = self.clock()
+        try:
+            yield
+        finally:
+            self.timers[name] += self.clock() - start
+
+    def step(self, record: Dict) -> None:
+        """记录一步的统计信息"""
+        if self.keep_steps:
+            self.steps.append(record)
+        if self.callback is not None:
+            self.callback(record)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("step %s: %s", record.get("step"), record)
+
+    def summary(self) -> Dict:
+        """累计耗时与计数汇总"""
+        return {
+            "timers": dict(self.timers),
+            "counters": dict(self.counters),
+            "steps": len(self.steps)
+        }
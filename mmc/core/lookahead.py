@@ -0,0 +1,107 @@
+import numpy as np
+from typing import Tuple
+
+from .fleet import MAX_CAPACITY, dispatch_batch
+from .priority import NijEngine
+
+
+class LookaheadPlanner:
+    """k 步前瞻（束搜索）的调度规划，作为每次只取 nij 最大目标站的贪心选择的替代
+
+    为一辆车选择下一站时，从当前站点出发展开 depth 步的调度序列：每一层每条束按 nij
+    取前 beam_width 个可行目标站，用 dispatch_batch 在 (束数 × 站点数) 的数组上批量模拟调度，
+    按累计消除的不平衡量（各站 |数量| 之和的减少量）除以累计行驶时间（分钟）保留前 beam_width 条束。
+    最终返回所有展开过的序列中效率最高者的第一步；效率相同时保留 nij 排序靠前的第一步。
+
+    只模拟当前这辆车的后续调度，其他车辆的载量和位置视为不变。
+    """
+
+    def __init__(self, depth: int = 3, beam_width: int = 8, max_capacity: int = MAX_CAPACITY):
+        if depth < 1 or beam_width < 1:
+            raise ValueError("depth 和 beam_width 必须为正整数")
+        self.depth = depth
+        self.beam_width = beam_width
+        self.max_capacity = max_capacity
+
+    def _candidates(self, scores: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """每条束 nij 最大的 beam_width 个目标站，返回 (束下标, 目标站下标)，按束、再按 nij 降序"""
+        width = min(self.beam_width, scores.shape[1])
+        if width < scores.shape[1]:
+            top = np.argpartition(-scores, width - 1, axis=1)[:, :width]
+        else:
+            top = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        values = np.take_along_axis(scores, top, axis=1)
+        order = np.lexsort((top, -values), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        beam, slot = np.nonzero(values > -np.inf)
+        return beam, top[beam, slot]
+
+    def best(
+        self,
+        engine: NijEngine,
+        counts: np.ndarray,
+        loads: np.ndarray,
+        v: int,
+        origin: int
+    ) -> Tuple[int, float]:
+        """为车辆 v 选择从 origin 出发的下一站
+
+        参数:
+            engine: 提供静态项和 nij 公式的优先级引擎
+            counts, loads: 当前站点数量和所有车辆载量
+
+        返回:
+            (目标站下标, 该调度对在引擎当前状态下的 nij)，没有可行目标站时返回 (-1, -inf)
+        """
+        cap = self.max_capacity
+        others = np.delete(loads, v)
+        base_col = engine.col_for(others, counts)
+
+        # 束状态：站点数量、该车载量、所在站点、第一步目标站、累计消除量与行驶时间
+        state = counts[None, :].copy()
+        load = loads[v:v + 1].copy()
+        pos = np.array([origin])
+        first = np.array([-1])
+        removed = np.zeros(1)
+        minutes = np.zeros(1)
+        best_first, best_rate = -1, -np.inf
+
+        for level in range(self.depth):
+            rows = np.arange(len(pos))
+            scores = engine.batch_scores(pos, state, load, others, counts, base_col)
+            # 可行性与贪心选择相同：可取车时所有目标站可行，否则只能去短缺站卸车
+            at_origin = state[rows, pos]
+            pickup = (load < cap) & (at_origin > 0)
+            unload = ~pickup & (load > 0)
+            feasible = pickup[:, None] | (unload[:, None] & (state < 0))
+            scores = np.where(feasible & engine.valid[pos], scores, -np.inf)
+
+            parent, target = self._candidates(scores)
+            if len(parent) == 0:
+                break
+
+            origin_before = state[parent, pos[parent]]
+            target_before = state[parent, target]
+            child = state[parent]
+            child_load = load[parent].copy()
+            dispatch_batch(child, child_load, pos[parent], target, cap)
+            rows = np.arange(len(parent))
+            gain = (np.abs(origin_before) + np.abs(target_before)
+                    - np.abs(child[rows, pos[parent]]) - np.abs(child[rows, target]))
+            child_removed = removed[parent] + gain
+            child_minutes = minutes[parent] + engine.tij[pos[parent], target]
+            child_first = target if level == 0 else first[parent]
+            rate = child_removed / np.maximum(child_minutes, 1e-9)
+
+            # 按效率保留前 beam_width 条束，效率相同时保持 nij 排序
+            keep = np.argsort(-rate, kind="stable")[:self.beam_width]
+            if best_first < 0 or rate[keep[0]] > best_rate:
+                best_first, best_rate = int(child_first[keep[0]]), rate[keep[0]]
+
+            state, load, pos = child[keep], child_load[keep], target[keep]
+            first, removed, minutes = child_first[keep], child_removed[keep], child_minutes[keep]
+
+        if best_first < 0:
+            return -1, -np.inf
+        return best_first, float(engine.row_scores(origin)[best_first])
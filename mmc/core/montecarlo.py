@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .fleet import MAX_CAPACITY, Fleet, dispatch_batch
+
+# 汇总表中各指标分布的分位数
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def sample_around(
+    bike_counts: Dict[str, float],
+    n_samples: int = 1000,
+    rel_std: float = 0.2,
+    abs_std: float = 1.0,
+    integer: bool = False,
+    seed: Optional[int] = 0
+) -> pd.DataFrame:
+    """在一个需求快照（如 points_number.xlsx 的一个 sheet）附近独立抽样各站点数量
+
+    每个站点的数量服从以快照值为均值、标准差为 rel_std * |快照值| + abs_std 的正态分布。
+
+    参数:
+        integer: 是否四舍五入为整数
+
+    返回:
+        样本表 (n_samples × 站点)，列为站点名
+    """
+    names = list(bike_counts)
+    base = np.array([bike_counts[name] for name in names], dtype=np.float64)
+    rng = np.random.default_rng(seed)
+    samples = base + rng.standard_normal((n_samples, len(names))) * (rel_std * np.abs(base) + abs_std)
+    if integer:
+        samples = np.rint(samples)
+    return pd.DataFrame(samples, columns=names)
+
+
+def sample_from_trends(
+    df_trends: pd.DataFrame,
+    bike_counts: Dict[str, float],
+    n_samples: int = 1000,
+    scale: float = 1.0,
+    integer: bool = False,
+    seed: Optional[int] = 0
+) -> pd.DataFrame:
+    """按各时间段单车数量表（2.xlsx，见 case2.read_trends）中相邻时间段的变化量抽样
+
+    把相邻时间段之间各站点数量的变化看作需求波动，样本 = 快照值 + 与历史变化量协方差相同的
+    正态扰动（标准正态向量乘以中心化的变化量矩阵），保留站点之间的相关性（如同时涨落的食堂）。
+    快照中有、趋势表中没有的站点扰动为 0。
+
+    参数:
+        scale: 扰动幅度的倍数
+    """
+    names = list(bike_counts)
+    base = np.array([bike_counts[name] for name in names], dtype=np.float64)
+    changes = df_trends.reindex(columns=names).diff().iloc[1:].fillna(0.0).to_numpy(dtype=np.float64)
+    changes -= changes.mean(axis=0)
+    rng = np.random.default_rng(seed)
+    noise = rng.standard_normal((n_samples, len(changes))) @ changes / np.sqrt(max(len(changes) - 1, 1))
+    samples = base + scale * noise
+    if integer:
+        samples = np.rint(samples)
+    return pd.DataFrame(samples, columns=names)
+
+
+def starting_points(
+    bike_counts: Dict[str, float],
+    num_vehicles: int,
+    max_capacity: int = MAX_CAPACITY
+) -> List[str]:
+    """multi_vehicle_dispatch 在快照 bike_counts 上为各车辆选择的起点站（Fleet.select_starting_points）"""
+    fleet = Fleet(list(bike_counts), bike_counts, num_vehicles, max_capacity)
+    fleet.select_starting_points()
+    return [fleet.locations[k] for k in fleet.position]
+
+
+def _plan_order(df_routes: pd.DataFrame) -> pd.DataFrame:
+    """调度记录按执行顺序排列：events 模式按出发时刻，其余按步、车辆"""
+    keys = ["depart", "vehicle_id"] if "depart" in df_routes.columns else ["step", "vehicle_id"]
+    return df_routes.sort_values(keys, kind="stable")
+
+
+def replay_plan(
+    df_routes: pd.DataFrame,
+    samples: np.ndarray,
+    locations: Sequence[str],
+    starts: Sequence[str],
+    max_capacity: int = MAX_CAPACITY
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """在所有样本上同时重放一个调度方案（原地修改 samples）
+
+    所有车辆（包括没有调度记录的车辆）先按编号依次在各自起点站装车，规则与 Fleet.select_starting_points 相同
+    （装车量为 min(站点数量, 车容量)，站点数量为负时载量也为负），之后按执行顺序重放每条记录，
+    取车/卸车数量按 perform_dispatch 的规则由各样本当时的站点数量和载量决定（dispatch_batch），
+    路线本身固定不变。
+
+    参数:
+        df_routes: multi_vehicle_dispatch / event_dispatch 的结果表
+        samples: 各样本的站点数量 (S, N)，列顺序与 locations 一致
+        locations: 站点名
+        starts: 制定方案时各车辆的起点站（按车辆编号），见 starting_points
+
+    返回:
+        (samples, loads, moved, loaded_at_start)：重放后的站点数量 (S, N)、车辆载量 (V, S)、
+        各样本按调度记录搬运的单车总数 (S,)（不含起点装车）和起点装车数量之和 (S,)
+    """
+    index = {name: k for k, name in enumerate(locations)}
+    stations = set(starts)
+    if not df_routes.empty:
+        stations |= set(df_routes["from"]) | set(df_routes["to"])
+        if df_routes["vehicle_id"].max() >= len(starts):
+            raise ValueError(f"调度方案中的车辆数超过起点数：{len(starts)}")
+    missing = stations - set(index)
+    if missing:
+        raise ValueError(f"样本中缺少调度方案经过的站点：{sorted(missing)}")
+
+    n_samples = len(samples)
+    loads = np.zeros((len(starts), n_samples), dtype=samples.dtype)
+    moved = np.zeros(n_samples, dtype=samples.dtype)
+    loaded_at_start = np.zeros(n_samples, dtype=samples.dtype)
+    for v, name in enumerate(starts):
+        k = index[name]
+        loads[v] = np.minimum(samples[:, k], max_capacity)
+        samples[:, k] -= loads[v]
+        loaded_at_start += np.abs(loads[v])
+
+    if not df_routes.empty:
+        df_routes = _plan_order(df_routes)
+        vehicles = df_routes["vehicle_id"].to_numpy()
+        origins = df_routes["from"].map(index).to_numpy()
+        targets = df_routes["to"].map(index).to_numpy()
+        for v, i, j in zip(vehicles, origins, targets):
+            moved_out, moved_in = dispatch_batch(samples, loads[v], i, j, max_capacity)
+            moved += moved_out + moved_in
+    return samples, loads, moved, loaded_at_start
+
+
+def check_replay(
+    df_routes: pd.DataFrame,
+    bike_counts: Dict[str, float],
+    residual: Dict[str, float],
+    starts: Sequence[str],
+    max_capacity: int = MAX_CAPACITY
+) -> None:
+    """在制定方案所用的快照上重放方案，确认结果与调度后的站点数量完全一致，否则抛出 ValueError
+
+    参数:
+        bike_counts: 调度前的站点数量
+        residual: 调度后的站点数量（multi_vehicle_dispatch 原地修改后的 bike_counts）
+    """
+    locations = list(bike_counts)
+    counts = np.array([[bike_counts[name] for name in locations]], dtype=np.float64)
+    counts, _, _, _ = replay_plan(df_routes, counts, locations, starts, max_capacity)
+    expected = np.array([residual[name] for name in locations], dtype=np.float64)
+    if not np.array_equal(counts[0], expected):
+        raise ValueError("重放结果与调度结果不一致：剩余失衡量 "
+                         f"{np.abs(counts[0]).sum():.4g}，调度结果 {np.abs(expected).sum():.4g}")
+
+
+def evaluate_plan(
+    df_routes: pd.DataFrame,
+    samples: pd.DataFrame,
+    starts: Sequence[str],
+    max_capacity: int = MAX_CAPACITY
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """在一批需求样本上评估一个调度方案的稳健性（蒙特卡洛）
+
+    所有样本放在一个 (样本数 × 站点数) 的数组中同时重放（见 replay_plan），
+    每条调度记录只做一次向量化计算，上千个样本也只需数秒以内。
+
+    参数:
+        df_routes: 调度方案（调度结果表）
+        samples: 样本表 (S × 站点)，列为站点名，见 sample_around / sample_from_trends
+        starts: 各车辆的起点站，见 starting_points（分区调度的方案见 zones.zone_starting_points）
+
+    返回:
+        (per_sample, per_station, summary)
+        per_sample: 每个样本一行，imbalance_before（不调度时的失衡量）、imbalance_after（调度后各站 |数量| 之和）、
+            unmet_demand（调度后仍短缺的数量之和）、surplus_left（仍富余的数量之和）、
+            bikes_on_trucks（结束时仍在车上的数量）、bikes_moved（调度记录中取车和卸车数量之和）、
+            bikes_loaded_at_start（起点装车数量之和，不计入 bikes_moved）
+        per_station: 每个站点调度后数量的均值、仍短缺的概率 shortage_probability 和平均短缺量 mean_unmet
+        summary: per_sample 各指标分布的均值、标准差和 QUANTILES 分位数
+    """
+    locations = list(samples.columns)
+    counts = samples.to_numpy(dtype=np.float64, copy=True)
+    before = np.abs(counts).sum(axis=1)
+    counts, loads, moved, loaded_at_start = replay_plan(df_routes, counts, locations, starts, max_capacity)
+
+    shortage = np.maximum(-counts, 0)
+    per_sample = pd.DataFrame({
+        "imbalance_before": before,
+        "imbalance_after": np.abs(counts).sum(axis=1),
+        "unmet_demand": shortage.sum(axis=1),
+        "surplus_left": np.maximum(counts, 0).sum(axis=1),
+        "bikes_on_trucks": loads.sum(axis=0),
+        "bikes_moved": moved,
+        "bikes_loaded_at_start": loaded_at_start
+    })
+    per_station = pd.DataFrame({
+        "location": locations,
+        "mean_after": counts.mean(axis=0),
+        "shortage_probability": (counts < 0).mean(axis=0),
+        "mean_unmet": shortage.mean(axis=0)
+    })
+
+    summary = per_sample.agg(["mean", "std"]).T
+    for q in QUANTILES:
+        summary[f"p{round(q * 100)}"] = per_sample.quantile(q)
+    return per_sample, per_station, summary
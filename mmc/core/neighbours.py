@@ -0,0 +1,126 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .priority import distance_array
+
+
+class Neighbourhood:
+    """每个站点的邻近站点表：k 个最近的站点和/或半径内的站点
+
+    a / tij 在 nij 中占主导，远处的站点几乎不会被选中；调度时先只在邻近站点中找可行目标站，
+    找不到时再退回全部站点。邻近表以 CSR 形式保存（indptr, indices），站点顺序与 locations 一致。
+    """
+
+    __slots__ = ("locations", "indptr", "indices")
+
+    def __init__(self, locations: Sequence[str], indptr: np.ndarray, indices: np.ndarray):
+        self.locations = list(locations)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+
+    def __getitem__(self, origin: int) -> np.ndarray:
+        """站点 origin 的邻近站点下标（不含自身）"""
+        return self.indices[self.indptr[origin]:self.indptr[origin + 1]]
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    @classmethod
+    def _from_lists(cls, locations: Sequence[str], rows: List[np.ndarray]) -> "Neighbourhood":
+        sizes = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+        indptr = np.concatenate(([0], np.cumsum(sizes)))
+        indices = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        return cls(locations, indptr, indices)
+
+    @classmethod
+    def from_matrix(
+        cls,
+        df_distance: pd.DataFrame,
+        locations: Optional[Sequence[str]] = None,
+        k: Optional[int] = None,
+        radius: Optional[float] = None
+    ) -> "Neighbourhood":
+        """按最短路距离矩阵取邻近站点（k 近邻，radius 内，或两者同时满足）
+
+        参数:
+            df_distance: 站点间距离矩阵，缺失值视为不可达
+            locations: 站点顺序，默认取矩阵的行索引
+        """
+        _check_args(k, radius)
+        locations = list(df_distance.index) if locations is None else list(locations)
+        dist = distance_array(df_distance, locations)
+        dist = np.where(np.isnan(dist), np.inf, dist)
+        np.fill_diagonal(dist, np.inf)
+
+        if k is not None and k < len(locations) - 1:
+            nearest = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            values = np.take_along_axis(dist, nearest, axis=1)
+            keep = values < np.inf if radius is None else values <= radius
+            return cls._from_lists(locations, [row[mask] for row, mask in zip(nearest, keep)])
+
+        keep = dist < np.inf if radius is None else dist <= radius
+        indptr = np.concatenate(([0], np.cumsum(keep.sum(axis=1))))
+        return cls(locations, indptr, np.nonzero(keep)[1])
+
+    @classmethod
+    def from_points(
+        cls,
+        points: Dict[str, Tuple[float, float]],
+        locations: Optional[Sequence[str]] = None,
+        k: Optional[int] = None,
+        radius: Optional[float] = None
+    ) -> "Neighbourhood":
+        """按站点坐标（直线距离）用 KD 树取邻近站点，不需要距离矩阵
+
+        参数:
+            points: {站点: (x, y)}，与 read_graph 返回的坐标相同
+            locations: 站点顺序，默认取 points 的顺序
+        """
+        from scipy.spatial import cKDTree
+
+        _check_args(k, radius)
+        locations = list(points) if locations is None else list(locations)
+        coords = np.asarray([points[name] for name in locations], dtype=np.float64)
+        tree = cKDTree(coords)
+        n = len(locations)
+
+        if k is not None:
+            count = min(k + 1, n)
+            bound = np.inf if radius is None else radius
+            dist, nearest = tree.query(coords, k=count, distance_upper_bound=bound)
+            nearest = nearest.reshape(n, count)
+            keep = np.isfinite(dist.reshape(n, count)) & (nearest != np.arange(n)[:, None])
+            # 自身不在结果中时（重合站点较多）多出的一个候选也去掉，保持每站最多 k 个
+            return cls._from_lists(locations, [row[mask][:k] for row, mask in zip(nearest, keep)])
+
+        rows = tree.query_ball_point(coords, radius)
+        return cls._from_lists(
+            locations,
+            [np.asarray(sorted(set(r) - {s}), dtype=np.int64) for s, r in enumerate(rows)]
+        )
+
+    def reordered(self, locations: Sequence[str]) -> "Neighbourhood":
+        """按新的站点顺序重新编号，邻近关系不变；新顺序中没有的站点从邻近表中去掉"""
+        locations = list(locations)
+        if locations == self.locations:
+            return self
+        new_index = {name: k for k, name in enumerate(locations)}
+        mapping = np.asarray([new_index.get(name, -1) for name in self.locations], dtype=np.int64)
+        old_index = {name: k for k, name in enumerate(self.locations)}
+        rows = []
+        for name in locations:
+            old = old_index.get(name)
+            if old is None:
+                rows.append(np.zeros(0, dtype=np.int64))
+                continue
+            row = mapping[self[old]]
+            rows.append(row[row >= 0])
+        return self._from_lists(locations, rows)
+
+
+def _check_args(k: Optional[int], radius: Optional[float]) -> None:
+    if k is None and radius is None:
+        raise ValueError("k 和 radius 至少指定一个")
+    if k is not None and k < 1:
+        raise ValueError("k 必须为正整数")
@@ -0,0 +1,189 @@
+import os
+import re
+import pandas as pd
+from typing import Dict, Iterable, Optional, Union
+
+# Excel 单个 sheet 的最大行数（含表头）
+EXCEL_MAX_ROWS = 1048576
+
+# 扩展名与输出格式的对应关系
+EXTENSIONS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".xlsx": "excel",
+}
+FORMATS = ("csv", "parquet", "excel")
+
+
+def format_from_path(path: str) -> str:
+    """按扩展名判断输出格式，无法判断时使用 csv"""
+    return EXTENSIONS.get(os.path.splitext(path)[1].lower(), "csv")
+
+
+class TableWriter:
+    """分块写出一张表：每次 write 追加一批行，close 后文件完整
+
+    可以作为上下文管理器使用：
+        with open_writer("result.parquet") as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        self._write(df)
+        self.rows += len(df)
+
+    def _write(self, df: pd.DataFrame) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "TableWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class CsvWriter(TableWriter):
+    """CSV：第一块写表头，之后的块直接追加（UTF-8 带 BOM，Excel 打开中文不乱码）"""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._file = open(path, "w", encoding="utf-8-sig", newline="")
+        self._header = True
+
+    def _write(self, df: pd.DataFrame) -> None:
+        df.to_csv(self._file, index=False, header=self._header)
+        self._header = False
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class ParquetWriter(TableWriter):
+    """Parquet：每块写成一个 row group，需要可选依赖 pyarrow"""
+
+    def __init__(self, path: str, compression: str = "snappy"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet 输出需要安装 pyarrow：pip install pyarrow") from e
+        super().__init__(path)
+        self._pa, self._pq = pa, pq
+        self._compression = compression
+        self._writer = None
+
+    def _write(self, df: pd.DataFrame) -> None:
+        table = self._pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._writer = self._pq.ParquetWriter(self.path, table.schema, compression=self._compression)
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+class ExcelWriter(TableWriter):
+    """Excel：面向人工查看的输出，行数超过 Excel 上限时报错，大表请用 csv / parquet"""
+
+    def __init__(self, path: str, sheet_name: str = "Sheet1", book: Optional[pd.ExcelWriter] = None):
+        super().__init__(path)
+        self._own_book = book is None
+        self._book = pd.ExcelWriter(path, engine="openpyxl", mode="w") if book is None else book
+        self._sheet = sheet_name
+
+    def _write(self, df: pd.DataFrame) -> None:
+        if self.rows + len(df) + 1 > EXCEL_MAX_ROWS:
+            raise ValueError(f"sheet '{self._sheet}' 超过 Excel 最大行数 {EXCEL_MAX_ROWS}，请改用 csv 或 parquet 格式")
+        df.to_excel(self._book, sheet_name=self._sheet, index=False,
+                    header=self.rows == 0, startrow=0 if self.rows == 0 else self.rows + 1)
+
+    def close(self) -> None:
+        if self._own_book:
+            self._book.close()
+
+
+def open_writer(path: str, fmt: Optional[str] = None, sheet_name: str = "Sheet1") -> TableWriter:
+    """按格式（csv / parquet / excel，默认由扩展名判断）打开一张表的分块写出器"""
+    fmt = fmt or format_from_path(path)
+    if fmt == "csv":
+        return CsvWriter(path)
+    if fmt == "parquet":
+        return ParquetWriter(path)
+    if fmt == "excel":
+        return ExcelWriter(path, sheet_name)
+    raise ValueError(f"未知的输出格式：{fmt}，可选 {FORMATS}")
+
+
+def write_table(
+    data: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    path: str,
+    fmt: Optional[str] = None,
+    sheet_name: str = "Sheet1"
+) -> int:
+    """写出一张表，data 可以是 DataFrame 或按块产出 DataFrame 的迭代器，返回写出的行数"""
+    chunks = [data] if isinstance(data, pd.DataFrame) else data
+    with open_writer(path, fmt, sheet_name) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+    return writer.rows
+
+
+class TableSet:
+    """一组命名的表（如每个时间段一张 nij 表）
+
+    excel 格式写入同一个工作簿的不同 sheet；csv / parquet 格式把 path 当作目录，
+    每张表写成 <path>/<表名>.<扩展名>，各表可以按完成顺序分别写出。
+    """
+
+    SUFFIX = {"csv": ".csv", "parquet": ".parquet"}
+
+    def __init__(self, path: str, fmt: Optional[str] = None):
+        self.path = path
+        self.fmt = fmt or format_from_path(path)
+        if self.fmt not in FORMATS:
+            raise ValueError(f"未知的输出格式：{self.fmt}，可选 {FORMATS}")
+        self.paths: Dict[str, str] = {}
+        self._book = None
+        if self.fmt == "excel":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._book = pd.ExcelWriter(path, engine="openpyxl", mode="w")
+        else:
+            os.makedirs(path, exist_ok=True)
+
+    def writer(self, name: str) -> TableWriter:
+        """打开名为 name 的表"""
+        if self._book is not None:
+            self.paths[name] = self.path
+            return ExcelWriter(self.path, name, book=self._book)
+        # 表名（如 7:00-9:00）中文件名不允许的字符替换为下划线
+        filename = re.sub(r'[\\/:*?"<>|]', "_", str(name))
+        path = os.path.join(self.path, f"{filename}{self.SUFFIX[self.fmt]}")
+        self.paths[name] = path
+        return open_writer(path, self.fmt)
+
+    def write(self, name: str, df: pd.DataFrame) -> None:
+        """整张表一次写出"""
+        with self.writer(name) as writer:
+            writer.write(df)
+
+    def close(self) -> None:
+        if self._book is not None:
+            self._book.close()
+
+    def __enter__(self) -> "TableSet":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,455 @@
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .cache import LRUCache, matrix_hash, names_hash, readonly
+
+# 调度车行驶速度（米/分钟）
+SPEED = 416.7
+
+# 进程内共享的行驶时间矩阵和静态项缓存，同一距离矩阵在多次调度、参数扫描之间只计算一次；
+# 每个进程（包括进程池的各个子进程）各有一份，字节上限按多进程同时运行估计，
+# 单个条目超过上限时只保留最近的一条（如 1 万站点的静态项约 0.9 GiB）
+TRAVEL_CACHE = LRUCache(maxsize=4, max_bytes=256 << 20)
+STATIC_CACHE = LRUCache(maxsize=8, max_bytes=512 << 20)
+
+
+def distance_array(df_distance: pd.DataFrame, locations: Sequence[str]) -> np.ndarray:
+    """将距离矩阵按站点顺序对齐为稠密浮点数组，缺失的站点对记为 NaN"""
+    return distance_array_between(df_distance, locations, locations)
+
+
+def distance_array_between(
+    df_distance: pd.DataFrame,
+    from_locations: Sequence[str],
+    to_locations: Sequence[str]
+) -> np.ndarray:
+    """取出 出发站 × 目标站 的距离子矩阵，缺失的站点对记为 NaN"""
+    aligned = df_distance.reindex(index=list(from_locations), columns=list(to_locations))
+    return aligned.to_numpy(dtype=np.float64)
+
+
+def travel_times(
+    df_distance: pd.DataFrame,
+    locations: Optional[Sequence[str]] = None,
+    speed: float = SPEED
+) -> np.ndarray:
+    """按站点顺序对齐的行驶时间矩阵 tij（分钟），缺失的站点对为 NaN
+
+    结果按 (矩阵哈希, 站点顺序, 速度) 缓存在 TRAVEL_CACHE 中，返回的数组是只读的共享数组。
+    locations 默认取矩阵的行索引。
+    """
+    locations = list(df_distance.index) if locations is None else list(locations)
+    key = (matrix_hash(df_distance), names_hash(locations), speed)
+    return TRAVEL_CACHE.get_or_compute(
+        key, lambda: readonly(distance_array(df_distance, locations) / speed))
+
+
+def static_terms(
+    df_distance: pd.DataFrame,
+    locations: Optional[Sequence[str]] = None,
+    a: float = 0.2,
+    speed: float = SPEED
+) -> Tuple[np.ndarray, np.ndarray]:
+    """nij 中只与距离有关的静态项 a / tij 及有效站点对掩码
+
+    返回:
+        (static, valid)：static 在无效站点对（缺失距离、对角线）上为 -inf；两者都是只读的共享数组
+    静态项只依赖 a，缓存键为 (矩阵哈希, 站点顺序, 速度, a)，只改变 b、c 的参数扫描共用同一份结果。
+    """
+    locations = list(df_distance.index) if locations is None else list(locations)
+    key = (matrix_hash(df_distance), names_hash(locations), speed, a)
+
+    def compute() -> Tuple[np.ndarray, np.ndarray]:
+        tij = travel_times(df_distance, locations, speed)
+        valid = ~np.isnan(tij)
+        np.fill_diagonal(valid, False)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            static = a / tij
+        return readonly(np.where(valid, static, -np.inf)), readonly(valid)
+
+    return STATIC_CACHE.get_or_compute(key, compute)
+
+
+class NijEngine:
+    """基于矩阵的调度优先级 nij 计算引擎
+
+    nij 可以拆成只与距离有关的静态项和只与站点数量、载量有关的行/列项：
+        nij[i, j] = a / tij + row[i] + col[j]
+    距离矩阵只在构造时转换一次（tij 和静态项取自 travel_times / static_terms 的缓存，
+    同一矩阵上的多次调度共用），之后每一步都只做 NumPy 广播运算。
+
+    mode="multi" 对应 sim_dispatch_multi 的公式（在 Nc_list 上取使 nij 最大的 Nc），
+    mode="single" 对应 sim_dispatch 的单车公式。
+    """
+
+    def __init__(
+        self,
+        df_distance: pd.DataFrame,
+        locations: Sequence[str],
+        a: float = 0.2,
+        b: float = 0.2,
+        c: float = 0.2,
+        mode: str = "multi",
+        speed: float = SPEED
+    ):
+        if mode not in ("multi", "single"):
+            raise ValueError(f"未知的 nij 模式：{mode}")
+        self.locations = list(locations)
+        self.index = {name: k for k, name in enumerate(self.locations)}
+        self.a, self.b, self.c = a, b, c
+        self.mode = mode
+
+        self.tij = travel_times(df_distance, self.locations, speed)  # 时间（分钟）
+        self.static, self.valid = static_terms(df_distance, self.locations, a, speed)
+
+        self.counts = np.zeros(len(self.locations))
+        self.loads = np.zeros(1)
+        self.version = 0  # 行/列项每次变化时递增，供 OriginIndex 做惰性失效
+        self._rebuild()
+
+    def counts_vector(self, bike_counts: Dict[str, float]) -> np.ndarray:
+        """按引擎的站点顺序把站点数量字典转换为向量"""
+        return np.asarray([bike_counts[name] for name in self.locations])
+
+    def set_counts(self, bike_counts: Union[Dict[str, float], np.ndarray]) -> None:
+        """整体替换站点数量（字典或按站点顺序排列的数组）并重新计算行/列项"""
+        if isinstance(bike_counts, dict):
+            self.counts = self.counts_vector(bike_counts)
+        else:
+            self.counts = np.array(bike_counts)
+        self._rebuild()
+
+    def set_loads(self, Nc_list: Sequence[float]) -> None:
+        """整体替换调度车载量并重新计算行/列项"""
+        self.loads = np.array(Nc_list).reshape(-1)
+        self._rebuild()
+
+    def update_counts(self, bike_counts: Dict[str, float], stations: Iterable[str]) -> None:
+        """增量更新：只重新计算给定站点对应的行/列项
+
+        perform_dispatch 每次只改变两个站点的数量，所以每一步的代价是
+        O(车辆数 × 变化站点数)，而不是重新计算整个 N×N 矩阵。
+        """
+        idx = np.fromiter({self.index[name] for name in stations}, dtype=np.intp)
+        values = np.asarray([bike_counts[self.locations[k]] for k in idx])
+        self.update_counts_at(idx, values)
+
+    def update_counts_at(self, idx: np.ndarray, values: np.ndarray) -> None:
+        """按站点下标增量更新数量，idx 中不能有重复下标"""
+        idx = np.asarray(idx, dtype=np.intp)
+        if len(idx) == 0:
+            return
+        values = np.asarray(values)
+        if not np.can_cast(values.dtype, self.counts.dtype, casting="same_kind"):
+            self.counts = self.counts.astype(np.result_type(self.counts, values))
+        self.counts[idx] = values
+        self._row[idx] = self._row_values(self.counts[idx])
+        if len(self.loads):
+            self._load_terms[:, idx] = self._terms(self.loads, self.counts[idx])
+            self._col[idx] = self._load_terms[:, idx].max(axis=0)
+        self.version += 1
+
+    def update_loads(self, Nc_list: Sequence[float]) -> None:
+        """增量更新：只重新计算载量发生变化的车辆对应的项，O(变化车辆数 × N)"""
+        loads = np.array(Nc_list).reshape(-1)
+        if len(loads) != len(self.loads):
+            self.loads = loads
+            self._rebuild()
+            return
+        changed = np.flatnonzero(loads != self.loads)
+        if len(changed) == 0:
+            return
+        self.loads = loads
+        self._load_terms[changed] = self._terms(loads[changed], self.counts)
+        self._col = self._load_terms.max(axis=0)
+        self.version += 1
+
+    def _row_values(self, counts: np.ndarray) -> np.ndarray:
+        """只与出发站有关的项（单车公式中的 b*Ni/25）"""
+        if self.mode == "single":
+            return self.b * counts / 25
+        return np.zeros(len(counts))
+
+    def _terms(self, loads: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        """每辆车（行）对每个目标站（列）的载量相关项"""
+        Nj = np.asarray(counts, dtype=np.float64)[None, :]
+        Nc = np.asarray(loads, dtype=np.float64)[:, None]
+        return self._load_formula(Nc, Nj)
+
+    def _load_formula(self, Nc: np.ndarray, Nj: np.ndarray) -> np.ndarray:
+        """载量相关项的公式，Nc 与 Nj 按 NumPy 规则广播"""
+        if self.mode == "single":
+            return -self.b * Nj / 25 + self.c * (2 * Nj / (Nc + 0.001)) / 25
+        return self.b * (Nc - Nj) / 25 + self.c * (2 * Nj / (Nc + 0.001)) / 25
+
+    def _rebuild(self) -> None:
+        self._row = self._row_values(self.counts)
+        self._load_terms = self._terms(self.loads, self.counts)
+        if len(self.loads):
+            self._col = self._load_terms.max(axis=0)
+        else:
+            self._col = np.full(len(self.locations), -np.inf)
+        self.version += 1
+
+    def row_term(self) -> np.ndarray:
+        """只与出发站有关的项"""
+        return self._row
+
+    def col_term(self) -> np.ndarray:
+        """只与目标站有关的项，多车时在所有 Nc 上取最大值"""
+        return self._col
+
+    def row_scores(self, origin: int) -> np.ndarray:
+        """从出发站 origin 到所有站点的 nij，无效站点对为 -inf，O(N)"""
+        return self.static[origin] + self._row[origin] + self._col
+
+    def col_for(self, loads: Sequence[float], counts: np.ndarray) -> np.ndarray:
+        """给定载量和站点数量时的列项（不改变引擎状态），没有车辆时为 -inf"""
+        loads = np.asarray(loads, dtype=np.float64).reshape(-1)
+        if len(loads) == 0:
+            return np.full(len(counts), -np.inf)
+        return self._terms(loads, counts).max(axis=0)
+
+    def batch_scores(
+        self,
+        origins: np.ndarray,
+        counts: np.ndarray,
+        loads: np.ndarray,
+        other_loads: Sequence[float],
+        base_counts: np.ndarray,
+        base_col: np.ndarray
+    ) -> np.ndarray:
+        """一次计算 B 个假设状态下某辆车从各自出发站到所有站点的 nij（B×N）
+
+        参数:
+            origins: 各状态下该车所在站点 (B,)
+            counts: 各状态的站点数量 (B, N)
+            loads: 各状态下该车的载量 (B,)
+            other_loads: 其他车辆的载量，在所有状态中相同
+            base_counts, base_col: 基准站点数量及其对应的其他车辆列项 col_for(other_loads, base_counts)
+
+        各状态与基准只在少数站点上不同，其他车辆的列项只在这些站点上重算。
+        """
+        rows = np.arange(len(origins))
+        col = self._load_formula(np.asarray(loads, dtype=np.float64)[:, None], counts.astype(np.float64))
+        if len(other_loads):
+            others = np.repeat(base_col[None, :], len(origins), axis=0)
+            bi, ji = np.nonzero(counts != base_counts[None, :])
+            if len(bi):
+                others[bi, ji] = self.col_for(other_loads, counts[bi, ji])
+            col = np.maximum(col, others)
+        return self.static[origins] + self._row_values(counts[rows, origins])[:, None] + col
+
+    def matrix(self) -> np.ndarray:
+        """返回 N×N 的 nij 矩阵，无效站点对（含对角线）为 -inf"""
+        nij = self.static + self._row[:, None] + self._col[None, :]
+        nij[~self.valid] = -np.inf
+        return nij
+
+    def top_k(self, k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """返回 nij 最大的 k 个站点对 (出发站下标, 目标站下标, nij)，按 nij 降序
+
+        k 为 None 时返回全部有效站点对。先用 argpartition 取出前 k 个，
+        只对这 k 个排序；nij 相同时按 (i, j) 的原始顺序排列。
+        """
+        n = len(self.locations)
+        flat = self.matrix().ravel()
+        candidates = np.flatnonzero(self.valid.ravel())
+        if k is not None:
+            k = max(int(k), 0)
+            if k == 0:
+                candidates = candidates[:0]
+            elif k < len(candidates):
+                values = -flat[candidates]
+                kth = values[np.argpartition(values, k - 1)[k - 1]]
+                # 与第 k 个值相等的站点对全部保留，保证并列时仍按 (i, j) 顺序取舍
+                candidates = candidates[values <= kth]
+        order = np.lexsort((candidates, -flat[candidates]))
+        candidates = candidates[order][:k]
+        return candidates // n, candidates % n, flat[candidates]
+
+    def records(self, k: Optional[int] = None) -> List[Dict]:
+        """以原 calculate_nij_matrix 的字典格式返回前 k 个站点对"""
+        from_idx, to_idx, nij = self.top_k(k)
+        tij = self.tij[from_idx, to_idx].tolist()
+        Ni = self.counts[from_idx].tolist()
+        Nj = self.counts[to_idx].tolist()
+        nij = nij.tolist()
+        result = []
+        for n, (i, j) in enumerate(zip(from_idx.tolist(), to_idx.tolist())):
+            record = {
+                "from": self.locations[i], "to": self.locations[j],
+                "tij": tij[n], "Ni": Ni[n], "Nj": Nj[n]
+            }
+            if self.mode == "single":
+                record["Nc"] = self.loads[0].item()
+            record["nij"] = nij[n]
+            result.append(record)
+        return result
+
+
+class OriginIndex:
+    """按出发站组织的 nij 优先级索引
+
+    每个出发站的目标站按静态项 a/tij 降序排列（首次查询该站时才排序并缓存），
+    列项按降序维护一份全局顺序，引擎的行/列项变化后惰性重建。
+    查询时同时沿两份有序表分块前进（阈值算法），一旦已找到的最优值
+    严格大于未访问候选的上界就停止，通常只需访问很少几个目标站。
+
+    给出 neighbours（neighbours.Neighbourhood，按引擎的站点顺序）时，先只在出发站的
+    邻近站点中选择，邻近站点中没有可行目标站时才在全部站点中查找。
+    """
+
+    def __init__(self, engine: NijEngine, block: int = 8, neighbours=None):
+        self.engine = engine
+        self.block = block
+        self.neighbours = neighbours
+        self._rows: Dict[int, np.ndarray] = {}
+        self._col_order = None
+        self._version = None
+        self.scanned = 0  # 累计访问过的候选目标站数，供性能埋点统计
+
+    def row_order(self, origin: int) -> np.ndarray:
+        """出发站 origin 的有效目标站，按静态项降序"""
+        order = self._rows.get(origin)
+        if order is None:
+            static = self.engine.static[origin]
+            order = np.argsort(-static, kind="stable")
+            order = order[static[order] > -np.inf].astype(np.int32)
+            self._rows[origin] = order
+        return order
+
+    def col_order(self) -> np.ndarray:
+        """所有站点按列项降序，列项变化后才重新排序"""
+        if self._version != self.engine.version:
+            self._col_order = np.argsort(-self.engine.col_term(), kind="stable")
+            self._version = self.engine.version
+        return self._col_order
+
+    def best(
+        self,
+        origin: int,
+        allowed: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    ) -> Tuple[int, float]:
+        """查找从 origin 出发 nij 最大的可行目标站
+
+        参数:
+            origin: 出发站下标
+            allowed: 可选的可行性判断，输入候选目标站下标数组，返回布尔数组
+        
+        返回:
+            (目标站下标, nij)，没有可行目标站时返回 (-1, -inf)
+        """
+        if self.neighbours is not None:
+            best_j, best_score = self._local_best(origin, allowed)
+            if best_j >= 0:
+                return best_j, best_score
+
+        static = self.engine.static[origin]
+        row = self.engine.row_term()[origin]
+        col = self.engine.col_term()
+        by_static = self.row_order(origin)
+        by_col = self.col_order()
+
+        best_j, best_score = -1, -np.inf
+        depth, block = 0, self.block
+        while depth < len(by_static):
+            end = depth + block
+            cand = np.concatenate((by_static[depth:end], by_col[depth:end]))
+            self.scanned += len(cand)
+            score = static[cand] + row + col[cand]
+            keep = static[cand] > -np.inf
+            if allowed is not None:
+                keep &= allowed(cand)
+            if keep.any():
+                cand, score = cand[keep], score[keep]
+                top = score.max()
+                j = int(cand[score == top].min())
+                if top > best_score or (top == best_score and j < best_j):
+                    best_j, best_score = j, top
+
+            # 未访问的目标站在两份有序表中都排在当前深度之后，nij 不会超过该上界
+            last = min(end, len(by_static)) - 1
+            threshold = static[by_static[last]] + row + col[by_col[min(end, len(by_col)) - 1]]
+            if best_score > threshold:
+                break
+            depth = end
+            block *= 2
+
+        return best_j, best_score
+
+    def _local_best(
+        self,
+        origin: int,
+        allowed: Optional[Callable[[np.ndarray], np.ndarray]] = None
+    ) -> Tuple[int, float]:
+        """只在 origin 的邻近站点中查找 nij 最大的可行目标站，O(邻近站点数)"""
+        cand = self.neighbours[origin]
+        self.scanned += len(cand)
+        static = self.engine.static[origin]
+        keep = static[cand] > -np.inf
+        if allowed is not None:
+            keep &= allowed(cand)
+        if not keep.any():
+            return -1, -np.inf
+        cand = cand[keep]
+        score = static[cand] + self.engine.row_term()[origin] + self.engine.col_term()[cand]
+        top = score.max()
+        return int(cand[score == top].min()), top
+
+
+def slot_nij_table(
+    df_distance: pd.DataFrame,
+    supply: Dict[str, float],
+    demand: Dict[str, float],
+    supply_locations: Sequence[str],
+    demand_locations: Sequence[str],
+    a: float = 0.6,
+    b: float = 0.2,
+    c: float = 0.2,
+    max_capacity: int = 20,
+    speed: float = SPEED
+) -> Optional[pd.DataFrame]:
+    """单个时间段的供需 nij 表（case.py 的公式），对 供给点 × 需求点 子矩阵一次性计算
+
+    nij = a / tij + b * Njf / avg_Njf + c * Nin / avg_Nin，其中 Njf 为供给量（不超过车容量），
+    Nin 为需求量。只保留供给、需求都为正、tij > 0 且 nij > 0 的站点对，行顺序与逐对循环一致。
+    tij 和 a / tij 取自整个距离矩阵的缓存，各时间段只按供给点、需求点取子矩阵。
+
+    返回:
+        From/To/tij/Njf/Nin/nij 表；没有有效供给点或需求点时返回 None
+    """
+    supply_locations = np.asarray(supply_locations, dtype=object)
+    demand_locations = np.asarray(demand_locations, dtype=object)
+    s = np.asarray([supply[loc] for loc in supply_locations], dtype=np.float64)
+    d = np.asarray([demand[loc] for loc in demand_locations], dtype=np.float64)
+    s_pos, d_pos = s > 0, d > 0
+    if not s_pos.any() or not d_pos.any():
+        return None
+
+    Njf = np.minimum(s[s_pos], max_capacity)
+    Nin = d[d_pos]
+    avg_Njf = Njf.mean()
+    avg_Nin = Nin.mean()
+
+    rows, cols = supply_locations[s_pos], demand_locations[d_pos]
+    ri = df_distance.index.get_indexer(rows)
+    ci = df_distance.index.get_indexer(cols)
+    # 不在矩阵中的站点距离为 NaN，与按站点名 reindex 的结果相同
+    missing = (ri < 0)[:, None] | (ci < 0)[None, :]
+    sub = np.ix_(np.maximum(ri, 0), np.maximum(ci, 0))
+    tij = np.where(missing, np.nan, travel_times(df_distance, speed=speed)[sub])
+    static = np.where(missing, -np.inf, static_terms(df_distance, a=a, speed=speed)[0][sub])
+    nij = static + b * Njf[:, None] / avg_Njf + c * Nin[None, :] / avg_Nin
+    keep = (tij > 0) & (nij > 0)
+
+    ii, jj = np.nonzero(keep)
+    return pd.DataFrame({
+        'From': rows[ii],
+        'To': cols[jj],
+        'tij': tij[ii, jj],
+        'Njf': Njf[ii],
+        'Nin': Nin[jj],
+        'nij': nij[ii, jj]
+    })
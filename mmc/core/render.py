@@ -0,0 +1,261 @@
+import os
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .shortest import ShortestPaths
+
+if TYPE_CHECKING:
+    from matplotlib.figure import Figure
+
+# 车辆数不超过该值时画图例、站点数不超过该值时标注站名，否则图上文字过多且渲染很慢
+LEGEND_MAX = 20
+LABEL_MAX = 200
+
+# 子进程内共享的坐标和最短路（由 _init_worker 加载，不随任务序列化）
+_WORKER: Dict = {}
+
+# 坐标文件缓存：{(绝对路径, sheet): (修改时间, Coordinates)}
+_COORD_CACHE: Dict[Tuple[str, object], Tuple[float, "Coordinates"]] = {}
+
+
+def use_chinese_font() -> None:
+    """设置中文字体，解决图中中文乱码问题"""
+    import matplotlib
+
+    matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'STHeiti']
+    matplotlib.rcParams['axes.unicode_minus'] = False
+
+
+class Coordinates:
+    """站点坐标数组：按站名查下标，坐标保存为 N×2 数组，画图时整体索引"""
+
+    __slots__ = ("names", "index", "xy")
+
+    def __init__(self, points: Dict[str, Tuple[float, float]]):
+        self.names = list(points)
+        self.index = {name: k for k, name in enumerate(self.names)}
+        self.xy = np.asarray([points[name] for name in self.names], dtype=np.float64).reshape(-1, 2)
+
+    @classmethod
+    def from_frame(cls, df_coords: pd.DataFrame) -> "Coordinates":
+        """由包含 name, x, y 三列的表构造"""
+        return cls(dict(zip(df_coords["name"], zip(df_coords["x"], df_coords["y"]))))
+
+    def lookup(self, names: Iterable[str]) -> np.ndarray:
+        """站名转换为下标数组"""
+        return np.fromiter((self.index[name] for name in names), dtype=np.int64)
+
+
+def load_coordinates(coord_file: str, sheet_name=0) -> Coordinates:
+    """读取坐标 Excel（name, x, y 三列），文件未修改时直接返回缓存"""
+    key = (os.path.abspath(coord_file), sheet_name)
+    mtime = os.path.getmtime(coord_file)
+    cached = _COORD_CACHE.get(key)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    coords = Coordinates.from_frame(pd.read_excel(coord_file, sheet_name=sheet_name))
+    _COORD_CACHE[key] = (mtime, coords)
+    return coords
+
+
+def route_segments(
+    df_routes: pd.DataFrame,
+    coords: Coordinates,
+    shortest: Optional[ShortestPaths] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """调度记录展开为线段
+
+    返回:
+        (segments, vehicle, stations)：线段端点坐标 (M, 2, 2)、每条线段所属车辆 (M,)、
+        经过的站点下标（去重）
+    """
+    if df_routes.empty:
+        return np.zeros((0, 2, 2)), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    start = coords.lookup(df_routes["from"])
+    end = coords.lookup(df_routes["to"])
+    vehicle = df_routes["vehicle_id"].to_numpy()
+
+    if shortest is not None:
+        # 按实际道路经过的中间站点展开每一段调度
+        legs, owners = [], []
+        for i, j, v in zip(df_routes["from"], df_routes["to"], vehicle):
+            path = shortest.path(i, j) or [i, j]
+            stations = coords.lookup(path)
+            legs.append(stations)
+            owners.append(np.full(len(stations) - 1, v))
+        start = np.concatenate([leg[:-1] for leg in legs])
+        end = np.concatenate([leg[1:] for leg in legs])
+        vehicle = np.concatenate(owners)
+
+    segments = np.stack((coords.xy[start], coords.xy[end]), axis=1)
+    return segments, vehicle, np.unique(np.concatenate((start, end)))
+
+
+def draw_routes(
+    ax,
+    df_routes: pd.DataFrame,
+    coords: Coordinates,
+    shortest: Optional[ShortestPaths] = None,
+    title: str = "Shared Bike Dispatch Routes",
+    labels: Optional[bool] = None
+) -> None:
+    """在 ax 上画出所有调度车经过的路径：每辆车一种颜色，所有线段放在一个 LineCollection 中"""
+    import matplotlib
+    from matplotlib.collections import LineCollection
+    from matplotlib.lines import Line2D
+
+    segments, vehicle, stations = route_segments(df_routes, coords, shortest)
+    vehicles, color_index = np.unique(vehicle, return_inverse=True)
+    cmap = matplotlib.colormaps["tab20" if len(vehicles) > 10 else "tab10"]
+    colors = cmap(color_index % cmap.N)
+
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=1.5))
+    xy = coords.xy[stations]
+    ax.scatter(xy[:, 0], xy[:, 1], s=12, c="black", zorder=3)
+
+    if labels is None:
+        labels = len(stations) <= LABEL_MAX
+    if labels:
+        for k, (x, y) in zip(stations, xy):
+            ax.text(x + 10, y + 10, coords.names[k], fontsize=8)
+    if 0 < len(vehicles) <= LEGEND_MAX:
+        handles = [Line2D([], [], color=cmap(n % cmap.N), marker="o", label=f"Vehicle {v}")
+                   for n, v in enumerate(vehicles)]
+        ax.legend(handles=handles)
+
+    ax.autoscale_view()
+    ax.set_xlabel("x")
+    ax.set_ylabel("y")
+    ax.set_title(title)
+    ax.grid(True)
+
+
+def draw_network(
+    ax,
+    points: Dict[str, Tuple[float, float]],
+    edges: Sequence[Tuple[str, str]],
+    title: str = "",
+    labels: Optional[bool] = None,
+    edge_labels: bool = False
+) -> None:
+    """在 ax 上画出路网：边为一个 LineCollection，站点为散点"""
+    from matplotlib.collections import LineCollection
+
+    coords = Coordinates(points)
+    start = coords.lookup(u for u, _ in edges)
+    end = coords.lookup(v for _, v in edges)
+    segments = np.stack((coords.xy[start], coords.xy[end]), axis=1)
+
+    ax.add_collection(LineCollection(segments, colors="gray", linewidths=0.8))
+    ax.scatter(coords.xy[:, 0], coords.xy[:, 1], s=40, c="lightblue", edgecolors="steelblue", zorder=3)
+    if labels is None:
+        labels = len(coords.names) <= LABEL_MAX
+    if labels:
+        for name, (x, y) in zip(coords.names, coords.xy):
+            ax.text(x, y, name, fontsize=5, ha="center", va="center")
+    if edge_labels:
+        middle = segments.mean(axis=1)
+        lengths = np.hypot(*(segments[:, 1] - segments[:, 0]).T)
+        for (x, y), length in zip(middle, lengths):
+            ax.text(x, y, f"{length:.2f}", fontsize=5, ha="center", va="center")
+
+    ax.autoscale_view()
+    ax.set_aspect("equal")
+    ax.set_title(title)
+    ax.axis("off")
+
+
+def save_figure(fig: "Figure", output: str, dpi: int) -> str:
+    """用 Agg 画布写出图片，格式由扩展名决定（png、svg、pdf 等），不依赖任何窗口后端"""
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+    FigureCanvasAgg(fig)
+    fig.savefig(output, dpi=dpi)
+    return output
+
+
+def render_routes(
+    df_routes: pd.DataFrame,
+    coords: Coordinates,
+    output: str,
+    shortest: Optional[ShortestPaths] = None,
+    title: str = "Shared Bike Dispatch Routes",
+    labels: Optional[bool] = None,
+    figsize: Tuple[float, float] = (10, 10),
+    dpi: int = 100
+) -> str:
+    """把调度路线图写入文件，返回文件路径"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    draw_routes(fig.add_subplot(), df_routes, coords, shortest, title, labels)
+    return save_figure(fig, output, dpi)
+
+
+def render_network(
+    points: Dict[str, Tuple[float, float]],
+    edges: Sequence[Tuple[str, str]],
+    output: str,
+    title: str = "",
+    labels: Optional[bool] = None,
+    edge_labels: bool = False,
+    figsize: Tuple[float, float] = (10, 8),
+    dpi: int = 150
+) -> str:
+    """把路网图写入文件，返回文件路径"""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize, layout="tight")
+    draw_network(fig.add_subplot(), points, edges, title, labels, edge_labels)
+    return save_figure(fig, output, dpi)
+
+
+def _init_worker(coords: Coordinates, shortest: Optional[ShortestPaths]) -> None:
+    _WORKER["coords"] = coords
+    _WORKER["shortest"] = shortest
+
+
+def _render_task(name: str, df_routes: pd.DataFrame, output: str, options: Dict) -> Tuple[str, str]:
+    return name, render_routes(df_routes, _WORKER["coords"], output, _WORKER["shortest"], **options)
+
+
+def render_batch(
+    plans: Dict[str, pd.DataFrame],
+    coords: Coordinates,
+    out_dir: str,
+    fmt: str = "png",
+    shortest: Optional[ShortestPaths] = None,
+    max_workers: Optional[int] = 1,
+    **options
+) -> Dict[str, str]:
+    """批量渲染多个调度方案，每个方案写出 out_dir/<方案名>.<fmt>
+
+    参数:
+        plans: {方案名: 调度记录}
+        max_workers: 进程数，1 表示在当前进程中依次渲染，None 使用全部 CPU
+        options: 传给 render_routes 的其他参数（title、labels、figsize、dpi）
+
+    返回:
+        {方案名: 文件路径}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    outputs = {name: os.path.join(out_dir, f"{name}.{fmt}") for name in plans}
+    if max_workers == 1:
+        return {
+            name: render_routes(df_routes, coords, outputs[name], shortest, **options)
+            for name, df_routes in plans.items()
+        }
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(coords, shortest)
+    ) as pool:
+        futures = [pool.submit(_render_task, name, df_routes, outputs[name], options)
+                   for name, df_routes in plans.items()]
+        return dict(future.result() for future in futures)
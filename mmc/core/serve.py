@@ -0,0 +1,57 @@
+import os
+import sys
+import argparse
+from typing import List, Optional
+
+from . import DATA_DIR
+from .calc_shortest import add_graph_arguments, load_shortest
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--counts", default=os.path.join(DATA_DIR, "points_number.xlsx"), help="初始站点数量文件")
+    parser.add_argument("--sheet", default="Sheet3", help="站点数量所在 sheet")
+    parser.add_argument("--vehicles", type=int, default=3)
+    parser.add_argument("-a", type=float, default=0.2)
+    parser.add_argument("-b", type=float, default=0.2)
+    parser.add_argument("-c", type=float, default=0.2)
+    parser.add_argument("--planner", choices=["greedy", "lookahead"], default="greedy")
+    parser.add_argument("--assignment", choices=["sequential", "matching"], default="sequential")
+    parser.add_argument("--neighbours", type=int, help="只在最近的 k 个站点中选择目标站（按最短路距离）")
+    parser.add_argument("--http", metavar="HOST:PORT",
+                        help="以本地 HTTP 服务运行（如 127.0.0.1:8765），默认从 stdin 逐行读取 JSON 请求")
+
+
+def run(args: argparse.Namespace) -> None:
+    from .batch import read_counts
+    from .service import ReplanService, serve_http, serve_lines
+
+    shortest = load_shortest(args)
+    df_distance = shortest.matrix_frame()
+    bike_counts = read_counts(args.counts, args.sheet)
+
+    neighbours = None
+    if args.neighbours:
+        from .neighbours import Neighbourhood
+        neighbours = Neighbourhood.from_matrix(df_distance, k=args.neighbours)
+
+    service = ReplanService(
+        df_distance, bike_counts, args.vehicles, args.a, args.b, args.c,
+        planner=args.planner, assignment=args.assignment, neighbours=neighbours
+    )
+
+    if args.http:
+        host, _, port = args.http.rpartition(":")
+        serve_http(service, host or "127.0.0.1", int(port))
+    else:
+        serve_lines(service, sys.stdin, sys.stdout)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="常驻的多车调度规划服务")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
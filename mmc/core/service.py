@@ -0,0 +1,246 @@
+import json
+import time
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, TextIO, Union
+
+from .lookahead import LookaheadPlanner
+from .neighbours import Neighbourhood
+from .sim_dispatch_multi import _check_assignment, _dispatch_steps, _prepare_dispatch, _resolve_planner
+
+
+class ReplanService:
+    """常驻内存的多车调度规划服务，在多次规划之间保留状态
+
+    距离矩阵、优先级引擎（NijEngine / OriginIndex）和车队的位置、载量只在构造时初始化一次
+    （起点选择也只做一次），之后每次收到站点数量的变化量只增量更新受影响站点的行/列项，
+    再从车队当前位置继续规划，不再重新读取矩阵、重建优先级或重新选择起点。
+
+    plan(commit=True) 假定车辆会执行返回的调度，规划后的站点数量、车辆位置和载量成为新的状态；
+    commit=False 只试算，状态保持不变。车辆实际位置或载量与规划不符时用 set_vehicle 校正。
+    """
+
+    def __init__(
+        self,
+        df_distance: pd.DataFrame,
+        bike_counts: Dict[str, float],
+        num_vehicles: int = 3,
+        a: float = 0.2,
+        b: float = 0.2,
+        c: float = 0.2,
+        planner: Union[str, LookaheadPlanner] = "greedy",
+        assignment: str = "sequential",
+        neighbours: Optional[Neighbourhood] = None
+    ):
+        self.planner = _resolve_planner(planner)
+        self.matching = _check_assignment(assignment, self.planner)
+        self.fleet, self.engine, self.index = _prepare_dispatch(
+            df_distance, bike_counts, num_vehicles, a, b, c, neighbours)
+        self.plans = 0  # 已完成的规划次数
+
+    @property
+    def locations(self) -> List[str]:
+        return self.fleet.locations
+
+    def _station(self, name: str) -> int:
+        k = self.fleet.index.get(name)
+        if k is None:
+            raise ValueError(f"未知站点：{name}")
+        return k
+
+    def _promote(self, values) -> None:
+        """整数状态上写入小数（如平均值）时，站点数量和载量一起转换为浮点数组"""
+        fleet = self.fleet
+        dtype = np.result_type(fleet.counts, np.asarray(values))
+        if dtype != fleet.counts.dtype:
+            fleet.counts = fleet.counts.astype(dtype)
+            fleet.loads = fleet.loads.astype(dtype)
+
+    def _assign_counts(self, idx: np.ndarray, values: np.ndarray) -> None:
+        self._promote(values)
+        self.fleet.counts[idx] = values
+
+    def apply_delta(self, delta: Dict[str, float]) -> None:
+        """站点数量加上变化量（如两次规划之间的借还车），{站点: 变化量}"""
+        if not delta:
+            return
+        idx = np.fromiter((self._station(name) for name in delta), dtype=np.int64, count=len(delta))
+        values = np.asarray(list(delta.values()))
+        self._assign_counts(idx, self.fleet.counts[idx] + values)
+        self._sync()
+
+    def set_counts(self, bike_counts: Dict[str, float]) -> None:
+        """直接给出部分站点的最新数量，{站点: 数量}"""
+        if not bike_counts:
+            return
+        idx = np.fromiter((self._station(name) for name in bike_counts), dtype=np.int64, count=len(bike_counts))
+        self._assign_counts(idx, np.asarray(list(bike_counts.values())))
+        self._sync()
+
+    def set_vehicle(self, v: int, position: Optional[str] = None, load: Optional[float] = None) -> None:
+        """校正车辆 v 的实际位置和/或载量"""
+        if not 0 <= v < len(self.fleet.loads):
+            raise ValueError(f"未知车辆：{v}")
+        if position is not None:
+            self.fleet.position[v] = self._station(position)
+        if load is not None:
+            self._promote(load)
+            self.fleet.loads[v] = load
+        self._sync()
+
+    def _sync(self) -> None:
+        """把车队状态中与引擎不一致的站点数量和载量推给引擎（只重算变化的部分）"""
+        counts = self.fleet.counts
+        changed = np.flatnonzero(self.engine.counts != counts)
+        self.engine.update_counts_at(changed, counts[changed])
+        self.engine.update_loads(self.fleet.loads)
+
+    def plan(self, max_steps: int = 5, commit: bool = True, time_budget: Optional[float] = None) -> List[Dict]:
+        """从车队当前状态出发规划最多 max_steps 步，返回调度记录（字段同 iter_dispatch）
+
+        参数:
+            commit: 是否把规划结果作为新的状态
+            time_budget: 规划时间上限（秒），超时后返回已规划的部分
+        """
+        fleet = self.fleet
+        if not commit:
+            saved = (fleet.counts.copy(), fleet.loads.copy(), fleet.position.copy())
+
+        keep_going = None
+        if time_budget is not None:
+            deadline = time.perf_counter() + time_budget
+            keep_going = lambda: time.perf_counter() < deadline
+
+        counts, locations = fleet.counts, fleet.locations
+        as_value = counts.dtype.type
+        records = []
+        for step, v, origin, k, moved_out, moved_in, load, nij in _dispatch_steps(
+                fleet, self.engine, self.index, max_steps, None, keep_going, self.planner, self.matching):
+            records.append({
+                "vehicle_id": int(v),
+                "step": step,
+                "from": locations[origin],
+                "moved_out": as_value(moved_out).item(),
+                "to": locations[k],
+                "moved_in": as_value(moved_in).item(),
+                "Nc_after": load.item(),
+                "nij": float(nij)
+            })
+
+        if not commit:
+            fleet.counts[:], fleet.loads[:], fleet.position[:] = saved
+        # 调度循环最后一步改动的站点还没有推给引擎
+        self._sync()
+        self.plans += 1
+        return records
+
+    def counts(self) -> Dict[str, float]:
+        """当前站点数量 {站点: 数量}"""
+        return dict(zip(self.fleet.locations, self.fleet.counts.tolist()))
+
+    def vehicles(self) -> List[Dict]:
+        """当前车辆状态 [{vehicle_id, position, load}]"""
+        locations = self.fleet.locations
+        return [
+            {"vehicle_id": v, "position": locations[p], "load": load}
+            for v, (p, load) in enumerate(zip(self.fleet.position.tolist(), self.fleet.loads.tolist()))
+        ]
+
+    def handle(self, request: Dict) -> Dict:
+        """处理一条 JSON 请求，stdin 和 HTTP 两种前端共用
+
+        请求字段（均可省略）:
+            op: "plan"（默认）、"update" 只更新状态、"state" 返回当前状态
+            delta: {站点: 变化量}；counts: {站点: 最新数量}
+            vehicles: [{vehicle_id, position?, load?}] 校正车辆状态
+            steps: 规划步数（默认 5）；commit: 是否提交规划结果（默认 true）；time_budget: 秒
+        状态更新先于规划执行。出错时返回 {"ok": false, "error": 错误信息}，状态中已应用的部分不回滚。
+        """
+        start = time.perf_counter()
+        try:
+            op = request.get("op", "plan")
+            if op not in ("plan", "update", "state"):
+                raise ValueError(f"未知的操作：{op}")
+            self.apply_delta(request.get("delta") or {})
+            self.set_counts(request.get("counts") or {})
+            for vehicle in request.get("vehicles") or []:
+                self.set_vehicle(int(vehicle["vehicle_id"]), vehicle.get("position"), vehicle.get("load"))
+
+            response = {"ok": True}
+            if op == "plan":
+                response["plan"] = self.plan(
+                    int(request.get("steps", 5)), bool(request.get("commit", True)), request.get("time_budget"))
+            elif op == "state":
+                response["counts"] = self.counts()
+            response["vehicles"] = self.vehicles()
+        except (KeyError, TypeError, ValueError) as e:
+            response = {"ok": False, "error": str(e)}
+        response["seconds"] = time.perf_counter() - start
+        return response
+
+
+def serve_lines(service: ReplanService, lines: Iterable[str], out: TextIO) -> None:
+    """JSON lines 前端：每行一个请求，每个请求输出一行响应（如 stdin / stdout）"""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("请求必须是 JSON 对象")
+        except ValueError as e:
+            response = {"ok": False, "error": f"无法解析请求：{e}"}
+        else:
+            response = service.handle(request)
+        out.write(json.dumps(response, ensure_ascii=False) + "\n")
+        out.flush()
+
+
+def serve_http(service: ReplanService, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """本地 HTTP 前端：POST /plan、/update、/state 的请求体与 handle 相同，GET /state 返回当前状态
+
+    使用单线程的 HTTPServer，请求依次处理，不会并发修改服务状态。
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, status: int, response: Dict) -> None:
+            body = json.dumps(response, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _handle(self, request: Dict) -> None:
+            request.setdefault("op", self.path.strip("/") or "plan")
+            response = service.handle(request)
+            self._respond(200 if response["ok"] else 400, response)
+
+        def do_GET(self) -> None:
+            if self.path.rstrip("/") != "/state":
+                self._respond(404, {"ok": False, "error": f"未知路径：{self.path}"})
+                return
+            self._handle({"op": "state"})
+
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(request, dict):
+                    raise ValueError("请求必须是 JSON 对象")
+            except ValueError as e:
+                self._respond(400, {"ok": False, "error": f"无法解析请求：{e}"})
+                return
+            self._handle(request)
+
+        def log_message(self, format: str, *args) -> None:
+            pass
+
+    with HTTPServer((host, port), Handler) as server:
+        print(f"调度服务已启动：http://{host}:{server.server_address[1]}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,548 @@
+import os
+import json
+import math
+import heapq
+import hashlib
+import uuid
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    from scipy.sparse import csr_matrix
+
+# 图的稠密度（边数 / N²）超过该值时改用 Floyd–Warshall，否则用多源 Dijkstra
+DENSE_THRESHOLD = 0.3
+
+# 二进制距离矩阵缓存的格式版本，格式变化时递增使旧缓存失效
+CACHE_VERSION = 2
+
+# edges/points 变化的边数不超过该值时，在旧缓存上增量更新，否则全部重新计算
+INCREMENTAL_MAX_EDGES = 64
+
+
+# 计算距离
+def euclidean_distance(p1, p2):
+    return math.sqrt((p1[0] - p2[0]) ** 2 + (p1[1] - p2[1]) ** 2)
+
+
+def build_graph(points, edges):
+    graph = {name: [] for name in points}
+    for name1, name2 in edges:
+        dist = euclidean_distance(points[name1], points[name2])
+        graph[name1].append((name2, dist))
+        graph[name2].append((name1, dist))
+    return graph
+
+
+# Dijkstra 算法：从一个点出发，对每一个点找最短距离，并进行比较，找所有最短路径
+def dijkstra_all(graph, start):
+    queue = [(0, start)]
+    distances = {node: float('inf') for node in graph}
+    previous = {node: None for node in graph}
+    distances[start] = 0
+    visited = set()
+
+    while queue:
+        current_dist, current_node = heapq.heappop(queue)
+        # 跳过已确定最短距离的点（堆中的过期条目）
+        if current_node in visited:
+            continue
+        visited.add(current_node)
+
+        for neighbor, weight in graph[current_node]:
+            distance = current_dist + weight
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current_node
+                heapq.heappush(queue, (distance, neighbor))
+
+    return distances, previous
+
+
+def build_adjacency(
+    points: Dict[str, Tuple[float, float]],
+    edges: Iterable[Tuple[str, str]]
+) -> Tuple["csr_matrix", List[str]]:
+    """由站点坐标和相邻站点对构造 CSR 稀疏邻接矩阵（无向，边权为欧氏距离）
+
+    返回:
+        (邻接矩阵, 与矩阵行列对应的站点名列表)
+    """
+    from scipy.sparse import csr_matrix
+
+    names = list(points)
+    index = {name: k for k, name in enumerate(names)}
+    pairs = [(index[u], index[v]) for u, v in edges]
+    n = len(names)
+    if not pairs:
+        return csr_matrix((n, n)), names
+
+    pairs = np.asarray(pairs, dtype=np.int64)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    # 两个方向都加入，重复的站点对只保留一条，避免 CSR 构造时权重被累加
+    rows = np.concatenate((pairs[:, 0], pairs[:, 1]))
+    cols = np.concatenate((pairs[:, 1], pairs[:, 0]))
+    keys = np.unique(rows * n + cols)
+    rows, cols = keys // n, keys % n
+
+    coords = np.asarray([points[name] for name in names], dtype=np.float64)
+    weights = np.hypot(*(coords[rows] - coords[cols]).T)
+    return csr_matrix((weights, (rows, cols)), shape=(n, n)), names
+
+
+def all_pairs(adjacency: "csr_matrix", method: str = "auto") -> Tuple[np.ndarray, np.ndarray]:
+    """一次调用计算全源最短路距离矩阵和前驱矩阵
+
+    method 为 "auto" 时按图的稠密度在 Dijkstra("D") 和 Floyd–Warshall("FW") 之间选择。
+
+    返回:
+        (距离矩阵，不可达为 inf; int32 前驱矩阵，pred[i, j] 为 i 到 j 路径上 j 的前一站，没有时为 -1)
+    """
+    from scipy.sparse.csgraph import shortest_path
+
+    n = adjacency.shape[0]
+    if method == "auto":
+        density = adjacency.nnz / max(n * n, 1)
+        method = "FW" if density > DENSE_THRESHOLD else "D"
+    dist, pred = shortest_path(adjacency, method=method, directed=False, return_predecessors=True)
+    pred = pred.astype(np.int32)
+    pred[pred < 0] = -1
+    return dist, pred
+
+
+def changed_edges(old: "csr_matrix", new: "csr_matrix") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """比较两个无向邻接矩阵，返回权重不同（含新增、删除）的边 (i, j, 新权重)，i < j，删除的边权重为 inf"""
+    n = old.shape[0]
+
+    def upper(adjacency):
+        coo = adjacency.tocoo()
+        keep = coo.row < coo.col
+        keys = coo.row[keep].astype(np.int64) * n + coo.col[keep]
+        order = np.argsort(keys)
+        return keys[order], coo.data[keep][order]
+
+    old_keys, old_w = upper(old)
+    new_keys, new_w = upper(new)
+    keys = np.union1d(old_keys, new_keys)
+    before = np.full(len(keys), np.inf)
+    after = np.full(len(keys), np.inf)
+    before[np.searchsorted(keys, old_keys)] = old_w
+    after[np.searchsorted(keys, new_keys)] = new_w
+    changed = before != after
+    return keys[changed] // n, keys[changed] % n, after[changed]
+
+
+class ShortestPaths:
+    """全源最短路结果
+
+    矩阵形式和 From/To/Distance 长表都由同一份结果生成；
+    同时保存每个起点的最短路树（前驱矩阵），按需还原实际经过的站点序列。
+    保存了邻接矩阵时可以用 update_edge 增量地加入、删除单条边或修改边权。
+    """
+
+    def __init__(
+        self,
+        names: List[str],
+        dist: np.ndarray,
+        pred: Optional[np.ndarray] = None,
+        adjacency: Optional["csr_matrix"] = None
+    ):
+        self.names = list(names)
+        self.index = {name: k for k, name in enumerate(self.names)}
+        self.dist = dist
+        self.pred = pred
+        self.adjacency = adjacency
+
+    @classmethod
+    def compute(
+        cls,
+        points: Dict[str, Tuple[float, float]],
+        edges: Iterable[Tuple[str, str]],
+        method: str = "auto"
+    ) -> "ShortestPaths":
+        adjacency, names = build_adjacency(points, edges)
+        dist, pred = all_pairs(adjacency, method)
+        return cls(names, dist, pred, adjacency)
+
+    def edge_weight(self, start: str, end: str) -> float:
+        """两站点之间直接相连的边的权重，不相连时为 inf"""
+        if self.adjacency is None:
+            raise ValueError("没有保存邻接矩阵")
+        i, j = self.index[start], self.index[end]
+        row = slice(self.adjacency.indptr[i], self.adjacency.indptr[i + 1])
+        hit = np.flatnonzero(self.adjacency.indices[row] == j)
+        return float(self.adjacency.data[row][hit[0]]) if len(hit) else math.inf
+
+    def update_edge(self, start: str, end: str, weight: Optional[float]) -> int:
+        """加入一条边、修改边权或删除边（weight 为 None 或 inf），只重算受影响的起点
+
+        边变短或新增时，只有经过这条边能缩短到其某个端点距离的起点受影响；
+        边变长或删除时，只有最短路树（前驱矩阵）经过这条边的起点受影响。
+        受影响的起点用 Dijkstra（indices=受影响起点）重算整行距离和前驱，其余行保持不变。
+
+        返回:
+            重算的起点数
+        """
+        if self.adjacency is None or self.pred is None:
+            raise ValueError("没有保存邻接矩阵和前驱矩阵，无法增量更新，请重新计算")
+        i, j = self.index[start], self.index[end]
+        if i == j:
+            raise ValueError(f"边的两个端点相同：{start}")
+        old = self.edge_weight(start, end)
+        new = math.inf if weight is None else float(weight)
+        if new < 0:
+            raise ValueError("边权不能为负")
+        if new == old:
+            return 0
+
+        self._writable()
+        dist, pred = self.dist, self.pred
+        if new < old:
+            # 边变短或新增：只有经过这条边能缩短到其某个端点距离的起点受影响
+            affected = np.flatnonzero((dist[:, i] + new < dist[:, j]) | (dist[:, j] + new < dist[:, i]))
+        else:
+            # 边变长或删除：只有最短路树经过这条边的起点受影响
+            affected = np.flatnonzero((pred[:, j] == i) | (pred[:, i] == j))
+
+        self._set_edge(i, j, new)
+
+        if len(affected) == 0:
+            return 0
+        if new < old:
+            self._shorten(affected, i, j, new)
+        else:
+            # 树中离起点较远的端点，其子树中的站点距离才可能变化
+            child = np.where(pred[affected, j] == i, j, i)
+            self._repair(affected, child)
+        return len(affected)
+
+    def _set_edge(self, i: int, j: int, weight: float) -> None:
+        """在邻接矩阵中设置无向边 (i, j) 的权重，inf 表示删除
+
+        直接修改 CSR 的三元组，保留显式存储的 0 权重边（重合站点之间的边），
+        经 lil 格式赋值会把权重为 0 的边当作不存在而丢掉。
+        """
+        from scipy.sparse import csr_matrix
+
+        adjacency = self.adjacency
+        n = adjacency.shape[0]
+        rows = np.repeat(np.arange(n), np.diff(adjacency.indptr))
+        cols, data = adjacency.indices, adjacency.data
+        keep = ~(((rows == i) & (cols == j)) | ((rows == j) & (cols == i)))
+        rows, cols, data = rows[keep], cols[keep], data[keep]
+        if not math.isinf(weight):
+            rows = np.concatenate((rows, [i, j]))
+            cols = np.concatenate((cols, [j, i]))
+            data = np.concatenate((data, [weight, weight]))
+        self.adjacency = csr_matrix((data, (rows, cols)), shape=adjacency.shape)
+
+    def _shorten(self, affected: np.ndarray, i: int, j: int, weight: float) -> None:
+        """边 (i, j) 变短：新的最短路至多经过该边一次，等于 起点→i→j→终点 或 起点→j→i→终点 与原距离中的较小者"""
+        dist, pred = self.dist, self.pred
+        row_i, row_j = np.array(dist[i], dtype=np.float64), np.array(dist[j], dtype=np.float64)
+        pred_i, pred_j = np.array(pred[i]), np.array(pred[j])
+        pred_i[i], pred_j[j] = j, i
+        old = dist[affected]
+        via_i = dist[affected, i][:, None] + weight + row_j[None, :]
+        via_j = dist[affected, j][:, None] + weight + row_i[None, :]
+        first = via_i <= via_j
+        best = np.where(first, via_i, via_j)
+        better = best < old
+        dist[affected] = np.where(better, best, old)
+        pred[affected] = np.where(better, np.where(first, pred_j[None, :], pred_i[None, :]), pred[affected])
+
+    def _repair(self, affected: np.ndarray, child: np.ndarray) -> None:
+        """边变长或删除后，修复受影响起点的最短路
+
+        只有最短路经过 child（边在树中的下端）的站点距离可能变化，其余站点的距离和前驱仍然有效。
+        每个起点的待修复站点先由相邻的有效站点给出初始距离，再在待修复站点之间继续松弛；
+        所有起点的待修复站点合成一个互不相连的大图，挂在同一个虚拟源点下，用一次 Dijkstra 求解。
+        """
+        from scipy.sparse import csr_matrix
+        from scipy.sparse.csgraph import dijkstra
+
+        dist, pred = self.dist, self.pred
+        adjacency = self.adjacency
+        n = len(self.names)
+        # 原距离等于 起点→child→站点 的站点（容差覆盖 float32 缓存的舍入误差）
+        old = dist[affected]
+        with np.errstate(invalid="ignore"):
+            through = np.abs(dist[affected, child][:, None] + dist[child] - old) <= 1e-6 * old
+        # 0 权重边的两端距离相同，起点本身也可能满足上式，起点的距离始终为 0，不参与修复
+        through[np.arange(len(affected)), affected] = False
+        rows, cols = np.nonzero(through)
+        keys = rows * n + cols  # 按行优先有序，用于查找待修复站点的编号
+        m = len(rows)
+
+        # 展开每个待修复站点的所有相邻站点
+        starts = adjacency.indptr[cols]
+        degree = adjacency.indptr[cols + 1] - starts
+        owner = np.repeat(np.arange(m), degree)
+        offset = np.arange(degree.sum()) - np.repeat(np.cumsum(degree) - degree, degree)
+        edge = np.repeat(starts, degree) + offset
+        neighbour = adjacency.indices[edge]
+        weight = adjacency.data[edge]
+        row = rows[owner]
+        inside = through[row, neighbour]
+
+        # 虚拟源点到每个待修复站点：经相邻有效站点进入的最短距离，同时记下从哪个站点进入
+        entry = ~inside
+        value = old[row[entry], neighbour[entry]] + weight[entry]
+        order = np.lexsort((value, owner[entry]))
+        target, first = np.unique(owner[entry][order], return_index=True)
+        init = value[order][first]
+        entry_from = neighbour[entry][order][first]
+        reachable = np.isfinite(init)
+        target, init, entry_from = target[reachable], init[reachable], entry_from[reachable]
+
+        src = np.concatenate((np.searchsorted(keys, row[inside] * n + neighbour[inside]), np.full(len(target), m)))
+        dst = np.concatenate((owner[inside], target))
+        graph = csr_matrix((np.concatenate((weight[inside], init)), (src, dst)), shape=(m + 1, m + 1))
+        new_dist, new_pred = dijkstra(graph, directed=True, indices=m, return_predecessors=True)
+
+        parent = np.full(m, -1, dtype=np.int64)
+        via = new_pred[:m]
+        internal = (via >= 0) & (via < m)
+        parent[internal] = cols[via[internal]]
+        from_entry = np.full(m, -1, dtype=np.int64)
+        from_entry[target] = entry_from
+        parent[via == m] = from_entry[via == m]
+
+        dist[affected[rows], cols] = new_dist[:m]
+        pred[affected[rows], cols] = parent
+
+    def _writable(self) -> None:
+        """内存映射的只读缓存在第一次修改前复制到内存"""
+        if isinstance(self.dist, np.memmap) or not self.dist.flags.writeable:
+            self.dist = np.array(self.dist, dtype=np.float64)
+        if isinstance(self.pred, np.memmap) or not self.pred.flags.writeable:
+            self.pred = np.array(self.pred, dtype=np.int32)
+
+    def update_graph(
+        self,
+        points: Dict[str, Tuple[float, float]],
+        edges: Iterable[Tuple[str, str]],
+        max_edges: Optional[int] = None
+    ) -> Optional[int]:
+        """按新的站点坐标和相邻站点对增量更新：找出增删或权重变化的边，逐条调用 update_edge
+
+        站点集合或顺序变化、没有邻接矩阵、或变化的边数超过 max_edges 时不做任何修改，返回 None；
+        否则返回变化的边数。
+        """
+        if self.adjacency is None or self.pred is None or list(points) != self.names:
+            return None
+        adjacency, _ = build_adjacency(points, edges)
+        rows, cols, weights = changed_edges(self.adjacency, adjacency)
+        if max_edges is not None and len(rows) > max_edges:
+            return None
+        for i, j, weight in zip(rows.tolist(), cols.tolist(), weights.tolist()):
+            self.update_edge(self.names[i], self.names[j], weight)
+        return len(rows)
+
+    def path_indices(self, i: int, j: int) -> List[int]:
+        """由前驱矩阵还原 i 到 j 的站点下标序列（含起终点），不可达时返回空列表
+
+        只沿起点 i 的最短路树回溯，复杂度为路径长度，不重新搜索。
+        """
+        if self.pred is None:
+            raise ValueError("没有保存前驱矩阵，无法还原路径")
+        if i == j:
+            return [i]
+        row = self.pred[i]
+        if row[j] < 0:
+            return []
+        nodes = [j]
+        while nodes[-1] != i:
+            nodes.append(int(row[nodes[-1]]))
+        nodes.reverse()
+        return nodes
+
+    def path(self, start: str, end: str) -> List[str]:
+        """起点到终点实际经过的站点名序列（含起终点），不可达时返回空列表"""
+        nodes = self.path_indices(self.index[start], self.index[end])
+        return [self.names[k] for k in nodes]
+
+    def matrix_frame(self, decimals: Optional[int] = None) -> pd.DataFrame:
+        """站点 × 站点的距离矩阵（不四舍五入时直接引用内部数组，不复制）"""
+        dist = self.dist if decimals is None else np.round(self.dist, decimals)
+        return pd.DataFrame(dist, index=self.names, columns=self.names, copy=False)
+
+    def long_frame(self) -> pd.DataFrame:
+        """所有两点之间的最短路径距离长表（不含起终点相同的行）"""
+        return pd.concat(self.long_chunks(), ignore_index=True)
+
+    def long_chunks(self, rows: int = 1_000_000, decimals: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """按起点分块产出长表，每块约 rows 行，N² 行的长表不必一次放进内存"""
+        n = len(self.names)
+        names = np.asarray(self.names, dtype=object)
+        block = max(rows // max(n - 1, 1), 1)
+        if n == 0:
+            yield pd.DataFrame({"From": [], "To": [], "Distance": []})
+            return
+        for first in range(0, n, block):
+            sources = np.arange(first, min(first + block, n))
+            start = np.repeat(sources, n)
+            end = np.tile(np.arange(n), len(sources))
+            keep = start != end
+            start, end = start[keep], end[keep]
+            dist = self.dist[start, end]
+            if decimals is not None:
+                dist = np.round(dist, decimals)
+            yield pd.DataFrame({
+                "From": names[start],
+                "To": names[end],
+                "Distance": dist
+            })
+
+    def save(self, cache_dir: str, source_hash: str) -> None:
+        """写出二进制缓存：float32 距离矩阵、int32 前驱矩阵、邻接矩阵和站点名索引
+
+        每次保存使用新的文件名（dist.<版本>.npy 等），最后原子地替换 meta.json 切换到新文件，
+        从不覆盖已有的矩阵文件：本进程或其他进程仍以内存映射方式打开的旧缓存不受影响
+        （Windows 上被映射的文件不能被替换或删除）。旧文件在切换后尽量删除，仍被映射而删除失败的留到下次保存时再删。
+        """
+        os.makedirs(cache_dir, exist_ok=True)
+        tag = uuid.uuid4().hex[:12]
+        files = {"dist": f"dist.{tag}.npy"}
+        np.save(os.path.join(cache_dir, files["dist"]), np.asarray(self.dist, dtype=np.float32))
+        if self.pred is not None:
+            files["pred"] = f"pred.{tag}.npy"
+            np.save(os.path.join(cache_dir, files["pred"]), np.asarray(self.pred, dtype=np.int32))
+        if self.adjacency is not None:
+            from scipy.sparse import save_npz
+            files["adj"] = f"adj.{tag}.npz"
+            save_npz(os.path.join(cache_dir, files["adj"]), self.adjacency)
+
+        # 元数据最后写入，中途失败时 meta.json 仍指向完整的旧缓存
+        meta = {"version": CACHE_VERSION, "hash": source_hash, "names": self.names, "files": files}
+        tmp_path = os.path.join(cache_dir, f"tmp.{tag}.meta.json")
+        _write_json(tmp_path, meta)
+        os.replace(tmp_path, os.path.join(cache_dir, "meta.json"))
+        _remove_stale(cache_dir, set(files.values()))
+
+    @classmethod
+    def load(cls, cache_dir: str, source_hash: Optional[str] = None) -> Optional["ShortestPaths"]:
+        """以内存映射方式读取二进制缓存，缓存不存在或与输入哈希不一致时返回 None"""
+        meta_path = os.path.join(cache_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            return None
+        if source_hash is not None and meta.get("hash") != source_hash:
+            return None
+        files = meta["files"]
+        dist = np.load(os.path.join(cache_dir, files["dist"]), mmap_mode="r")
+        pred = np.load(os.path.join(cache_dir, files["pred"]), mmap_mode="r") if "pred" in files else None
+        adjacency = None
+        if "adj" in files:
+            from scipy.sparse import load_npz
+            adjacency = load_npz(os.path.join(cache_dir, files["adj"])).tocsr()
+        return cls(meta["names"], dist, pred, adjacency)
+
+
+def _remove_stale(cache_dir: str, keep: Iterable[str]) -> None:
+    """删除 meta.json 不再引用的缓存文件，仍被映射（Windows）等原因删除失败的跳过"""
+    for name in os.listdir(cache_dir):
+        if name in keep or not name.startswith(("dist.", "pred.", "adj.", "tmp.")):
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError:
+            pass
+
+
+def _write_json(path: str, data: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def read_graph(
+    points_path: str,
+    edges_path: str,
+    points_sheet: Union[str, int] = 0,
+    edges_sheet: Union[str, int] = "Sheet1"
+) -> Tuple[Dict[str, Tuple[float, float]], List[Tuple[str, str]]]:
+    """读取站点坐标和相邻站点对 Excel"""
+    df_points = pd.read_excel(points_path, sheet_name=points_sheet)
+    df_edges = pd.read_excel(edges_path, sheet_name=edges_sheet)
+    points = dict(zip(df_points["name"], zip(df_points["x"], df_points["y"])))
+    edges = list(zip(df_edges["from"], df_edges["to"]))
+    return points, edges
+
+
+def graph_hash(*paths: str, extra: Iterable[str] = ()) -> str:
+    """图输入文件内容（及读取参数）的 SHA-256，用于判断缓存是否过期"""
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    for item in extra:
+        digest.update(str(item).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def cached_shortest_paths(
+    points_path: str,
+    edges_path: str,
+    cache_dir: Optional[str] = None,
+    points_sheet: Union[str, int] = 0,
+    edges_sheet: Union[str, int] = "Sheet1",
+    method: str = "auto"
+) -> ShortestPaths:
+    """读取最短路缓存，只有 points/edges 内容变化时才重新计算
+
+    缓存默认放在 edges 文件同目录的 shortest_cache 文件夹中，距离矩阵以内存映射方式加载，
+    启动时不再需要解析 shortest_matrix.xlsx。
+    站点不变、只有少数边变化（不超过 INCREMENTAL_MAX_EDGES 条，如某条路封闭或新开通）时，
+    在旧缓存上增量更新受影响的起点，不重新计算全部站点。
+    """
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(edges_path)), "shortest_cache")
+    source_hash = graph_hash(points_path, edges_path, extra=(points_sheet, edges_sheet))
+    shortest = ShortestPaths.load(cache_dir, source_hash)
+    if shortest is None:
+        points, edges = read_graph(points_path, edges_path, points_sheet, edges_sheet)
+        previous = ShortestPaths.load(cache_dir)
+        if previous is not None and previous.update_graph(points, edges, INCREMENTAL_MAX_EDGES) is not None:
+            previous.save(cache_dir, source_hash)
+        else:
+            ShortestPaths.compute(points, edges, method).save(cache_dir, source_hash)
+        shortest = ShortestPaths.load(cache_dir, source_hash)
+    return shortest
+
+
+def shared_matrix_file(distance, tmp_dir: str) -> Tuple[str, List[str]]:
+    """返回 (可内存映射的 .npy 路径, 站点名)，供多进程只读共享距离矩阵
+
+    distance 为 ShortestPaths 缓存时直接复用缓存文件，否则在 tmp_dir 中写一份临时文件。
+    """
+    if isinstance(distance, ShortestPaths):
+        if isinstance(distance.dist, np.memmap) and distance.dist.filename:
+            return distance.dist.filename, distance.names
+        distance = distance.matrix_frame()
+    path = os.path.join(tmp_dir, "dist.npy")
+    np.save(path, distance.to_numpy(dtype=np.float64))
+    return path, list(distance.index)
+
+
+def load_shared_matrix(path: str, names: List[str]) -> pd.DataFrame:
+    """以内存映射方式只读加载 shared_matrix_file 写出的距离矩阵"""
+    dist = np.load(path, mmap_mode="r")
+    return pd.DataFrame(dist, index=names, columns=names, copy=False)
+
+
+def attach_paths(df_routes: pd.DataFrame, shortest: ShortestPaths, sep: str = "→") -> pd.DataFrame:
+    """为调度记录增加 path 列，列出每段调度实际经过的站点"""
+    df_routes = df_routes.copy()
+    if df_routes.empty:
+        df_routes["path"] = []
+        return df_routes
+    df_routes["path"] = [
+        sep.join(shortest.path(i, j))
+        for i, j in zip(df_routes["from"], df_routes["to"])
+    ]
+    return df_routes
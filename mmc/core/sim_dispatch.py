@@ -1,39 +1,19 @@
 import pandas as pd
 
+from .instrument import logger
+from .priority import NijEngine, OriginIndex
+
 '''
 这里运行结果会出现step1从车源充足点到不足点的情况，是因为没有设置出发点
 Nc不能及时更新，所以在第一步判断时，Nc为默认值0，使得调度车对于补充车辆的优先级高
 优化模型可参考dispatch_sim_tri.py中的select_starting_points
 '''
 
-def calculate_nij_matrix(df_distance, bike_counts, Nc, a, b, c):
-    nij_list = []
-    locations = list(bike_counts.keys())
-    counts = list(bike_counts.values())
-    df_distance = df_distance.loc[locations]
-    
-    for i in locations:
-        for j in locations:
-            if i == j:
-                continue
-            try:
-                tij = df_distance.loc[i, j] / 416.7  # m/min
-                Ni = bike_counts[i]
-                Nj = bike_counts[j]
-                nij = a / tij + b * (Ni - Nj) / 25 + c * (2*Nj / (Nc+0.001)) / 25
-                nij_list.append({
-                    "from": i,
-                    "to": j,
-                    "tij": tij,
-                    "Ni": Ni,
-                    "Nj": Nj,
-                    "Nc": Nc,
-                    "nij": nij
-                })
-            except KeyError:
-                continue
-
-    return sorted(nij_list, key=lambda x: x["nij"], reverse=True)
+def calculate_nij_matrix(df_distance, bike_counts, Nc, a, b, c, top_k=None):
+    engine = NijEngine(df_distance, list(bike_counts.keys()), a, b, c, mode="single")
+    engine.set_counts(bike_counts)
+    engine.set_loads([Nc])
+    return engine.records(top_k)
 
 def perform_dispatch(i, j, Nc, bike_counts, max_capacity=20):
     N_i = bike_counts[i]
@@ -58,47 +38,81 @@ def perform_dispatch(i, j, Nc, bike_counts, max_capacity=20):
     
     return Nc, moved_out, moved_in
 
-def simulate_dispatch_from_nij(df_distance, bike_counts, a=0.2, b=0.2, c=0.2, Nc_init=0, max_steps=10, max_capacity=20, start_point=None):
+def simulate_dispatch_from_nij(df_distance, bike_counts, a=0.2, b=0.2, c=0.2, Nc_init=0, max_steps=10, max_capacity=20, start_point=None, instrument=None):
+    # instrument: 可选的 instrument.Instrumentation，记录各阶段耗时和每一步的调度统计
+    timing = instrument is not None
+    if timing:
+        clock = instrument.clock
     Nc = Nc_init
     route = []
 
+    engine = NijEngine(df_distance, list(bike_counts.keys()), a, b, c, mode="single")
+    engine.set_counts(bike_counts)
+    engine.set_loads([Nc])
+    index = OriginIndex(engine)
+    locations = engine.locations
+
     # 如果没有指定起点，根据 nij 最大值自动选择
     if start_point is None:
-        nij_init = calculate_nij_matrix(df_distance, bike_counts, Nc, a, b, c)
-        print(nij_init[0]["from"])
+        nij_init = engine.records(1)
         if not nij_init:
-            print("没有可用的调度路径。")
+            logger.warning("没有可用的调度路径。")
             return pd.DataFrame()
         start_point = nij_init[0]["from"]
+        logger.debug("起点：%s", start_point)
 
     current_location = start_point
 
     for step in range(max_steps):
-        nij_sorted = calculate_nij_matrix(df_distance, bike_counts, Nc, a, b, c)
+        if timing:
+            t0 = clock()
+            scanned = index.scanned
+        engine.update_loads([Nc])
 
         # 只考虑从当前点出发的路径
-        nij_sorted = [r for r in nij_sorted if r["from"] == current_location]
-
-        for record in nij_sorted:
-            i, j = record["from"], record["to"]
-            Nc_new, moved_out, moved_in = perform_dispatch(i, j, Nc, bike_counts, max_capacity)
-            print(f"[STEP {step+1}] {i} → {j}, moved_out={moved_out}, moved_in={moved_in}, Nc={Nc_new}, N_i={bike_counts[i]}, N_j={bike_counts[j]}")
-            
-            Nc = Nc_new
-            route.append({
-                    "from": i,
-                    "N_i": bike_counts[i],
-                    "moved_out": moved_out,
-                    "to": j,
-                    "N_j": bike_counts[j],
-                    "moved_in": moved_in,
-                    "tij": record["tij"],
-                    "Nc": Nc,
-                    "step": step + 1
-            })
-            current_location = j
+        origin = engine.index.get(current_location)
+        if origin is None:
             break
-        else:
+        if timing:
+            t1 = clock()
+            instrument.add_time("priority", t1 - t0)
+        k, _ = index.best(origin)
+        if timing:
+            t2 = clock()
+            instrument.add_time("candidates", t2 - t1)
+        if k < 0:
             break
 
+        i, j = locations[origin], locations[k]
+        Nc_new, moved_out, moved_in = perform_dispatch(i, j, Nc, bike_counts, max_capacity)
+        logger.debug("[STEP %s] %s → %s, moved_out=%s, moved_in=%s, Nc=%s, N_i=%s, N_j=%s",
+                     step + 1, i, j, moved_out, moved_in, Nc_new, bike_counts[i], bike_counts[j])
+
+        Nc = Nc_new
+        engine.update_counts(bike_counts, (i, j))
+        if timing:
+            instrument.add_time("dispatch", clock() - t2)
+            instrument.count("steps")
+            instrument.count("moves")
+            instrument.count("candidates_scanned", index.scanned - scanned)
+            instrument.step({
+                "step": step + 1,
+                "candidates_scanned": index.scanned - scanned,
+                "moves": 1,
+                "bikes_moved": moved_out + moved_in,
+                "seconds": clock() - t0
+            })
+        route.append({
+                "from": i,
+                "N_i": bike_counts[i],
+                "moved_out": moved_out,
+                "to": j,
+                "N_j": bike_counts[j],
+                "moved_in": moved_in,
+                "tij": engine.tij[origin, k],
+                "Nc": Nc,
+                "step": step + 1
+        })
+        current_location = j
+
     return pd.DataFrame(route)
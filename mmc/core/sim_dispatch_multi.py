@@ -1,10 +1,16 @@
+import time
 import pandas as pd
-from typing import List, Dict, Tuple
-import networkx as nx
+from typing import Callable, Iterator, List, Dict, Tuple, Optional, Union
 import numpy as np
-import matplotlib.pyplot as plt
+
+from .assignment import assign_targets
+from .fleet import MAX_CAPACITY, Fleet, RouteBuffer
+from .instrument import Instrumentation, logger
+from .lookahead import LookaheadPlanner
+from .neighbours import Neighbourhood
+from .priority import NijEngine, OriginIndex
+from .shortest import ShortestPaths
 # 多车调度模型
-MAX_CAPACITY = 20
 
 def select_starting_points(bike_counts: Dict[str, int], vehicles: List[Dict], df_distance: pd.DataFrame):
     """为每辆车选择合理的起点并动态计算初始载量 Nc"""
@@ -34,7 +40,8 @@ def calculate_nij_matrix(
     Nc_list: List[int],
     a: float = 0.2,
     b: float = 0.2,
-    c: float = 0.2
+    c: float = 0.2,
+    top_k: Optional[int] = None
 ) -> List[Dict]:
     """计算所有站点对的调度优先级nij（支持多车Nc输入）
     
@@ -43,37 +50,15 @@ def calculate_nij_matrix(
         bike_counts: 各站点自行车数量（正为富余，负为短缺）
         Nc_list: 所有调度车的当前载量列表
         a, b, c: 权重参数
+        top_k: 只返回nij最大的前k个调度对，None表示全部返回
     
     返回:
         按nij降序排序的调度对列表
     """
-    nij_list = []
-    locations = list(bike_counts.keys())
-    
-    for i in locations:
-        for j in locations:
-            if i == j:
-                continue
-            try:
-                tij = df_distance.loc[i, j] / 416.7  # 时间（分钟）
-                Ni, Nj = bike_counts[i], bike_counts[j]
-                
-                # 多车情况下选择最优Nc（使nij最大）
-                best_nij = -float('inf')
-                for Nc in Nc_list:
-                    nij = a/tij + b*(Nc-Nj)/25 + c*(2*Nj/(Nc+0.001))/25
-                    if nij > best_nij:
-                        best_nij = nij
-                
-                nij_list.append({
-                    "from": i, "to": j,
-                    "tij": tij, "Ni": Ni, "Nj": Nj,
-                    "nij": best_nij
-                })
-            except KeyError:
-                continue
-                
-    return sorted(nij_list, key=lambda x: x["nij"], reverse=True)
+    engine = NijEngine(df_distance, list(bike_counts.keys()), a, b, c)
+    engine.set_counts(bike_counts)
+    engine.set_loads(Nc_list)
+    return engine.records(top_k)
 
 
 def perform_dispatch(
@@ -116,120 +101,288 @@ def perform_dispatch(
     return Nc, moved_out, moved_in
 
 
-def multi_vehicle_dispatch(
+def _prepare_dispatch(
     df_distance: pd.DataFrame,
     bike_counts: Dict[str, int],
-    num_vehicles: int = 3,
-    max_steps: int = 100,
-    a: float = 0.2,
-    b: float = 0.2,
-    c: float = 0.2
-) -> pd.DataFrame:
-    """多车协同调度主函数
-    对于a, b, c参数，这里不再设限制，可以根据实际情况调整
-    """
+    num_vehicles: int,
+    a: float,
+    b: float,
+    c: float,
+    neighbours: Optional[Neighbourhood] = None
+) -> Tuple[Fleet, NijEngine, OriginIndex]:
+    """初始化车辆与站点状态以及优先级引擎"""
+    # 站点用整数下标，数量和载量保存在数组中
+    locations = list(bike_counts.keys())
+    fleet = Fleet(locations, bike_counts, num_vehicles, MAX_CAPACITY)
+    fleet.select_starting_points()
     
-    # 初始化车辆状态
-    vehicles = [
-        {"id": k, "Nc": 0, "location": None, "route": []}
-        for k in range(num_vehicles)
-    ]
+    # 距离矩阵只转换一次，之后每一步只增量更新发生变化的站点和载量
+    engine = NijEngine(df_distance, locations, a, b, c)
+    engine.set_counts(fleet.counts)
+    engine.set_loads(fleet.loads)
+    if neighbours is not None:
+        neighbours = neighbours.reordered(locations)
+    return fleet, engine, OriginIndex(engine, neighbours=neighbours)
+
+
+def _resolve_planner(planner: Union[str, LookaheadPlanner]) -> Optional[LookaheadPlanner]:
+    """planner 参数转换为规划器对象，"greedy" 对应 None（使用 OriginIndex 贪心选择）"""
+    if isinstance(planner, LookaheadPlanner):
+        return planner
+    if planner == "greedy":
+        return None
+    if planner == "lookahead":
+        return LookaheadPlanner()
+    raise ValueError(f"未知的规划方式：{planner}")
+
+
+def _check_assignment(assignment: str, planner: Optional[LookaheadPlanner]) -> bool:
+    """检查 assignment 参数，返回是否使用整步匹配"""
+    if assignment not in ("sequential", "matching"):
+        raise ValueError(f"未知的分配方式：{assignment}")
+    if assignment == "matching" and planner is not None:
+        raise ValueError("matching 分配方式只能与 greedy 规划一起使用")
+    return assignment == "matching"
+
+
+def _dispatch_steps(
+    fleet: Fleet,
+    engine: NijEngine,
+    index: OriginIndex,
+    max_steps: int,
+    instrument: Optional[Instrumentation] = None,
+    keep_going: Optional[Callable[[], bool]] = None,
+    planner: Optional[LookaheadPlanner] = None,
+    matching: bool = False
+) -> Iterator[Tuple]:
+    """多车调度主循环，每决定一次调度就产出一条下标形式的记录
+    
+    产出:
+        (step, 车辆, 出发站下标, 目标站下标, 取车数量, 卸车数量, 调度后载量, nij)
+    keep_going: 每次为车辆选择目标站前调用，返回 False 时立即结束调度
+    planner: 前瞻规划器，None 时每次取 nij 最大的可行目标站
+    matching: 每一步开始时用 assign_targets 为所有车辆同时分配目标站，代替逐车选择
+    """
+    counts, loads, position = fleet.counts, fleet.loads, fleet.position
+    locations = fleet.locations
+    touched = set()
     
-    select_starting_points(bike_counts, vehicles, df_distance)
+    timing = instrument is not None
+    if timing:
+        clock = instrument.clock
     
-    all_routes = []
     step = 0
     
     while step < max_steps:
         step += 1
         
-        active_vehicles = [v for v in vehicles if (v["Nc"] < MAX_CAPACITY) or (v["Nc"] > 0)]
+        active_vehicles = np.flatnonzero((loads < MAX_CAPACITY) | (loads > 0))
         
-        if not active_vehicles:
+        if len(active_vehicles) == 0:
             break
         
-        # 计算全局优先级
-        Nc_list = [v["Nc"] for v in vehicles]
-        nij_sorted = calculate_nij_matrix(df_distance, bike_counts, Nc_list, a, b, c)
+        if timing:
+            t0 = clock()
+            scanned, moves, bikes = index.scanned, 0, 0
+        
+        # 更新全局优先级：只重算上一步被调度改动的站点和载量变化的车辆
+        changed = np.fromiter(touched, dtype=np.intp)
+        engine.update_counts_at(changed, counts[changed])
+        engine.update_loads(loads)
+        touched = set()
         
-        for vehicle in active_vehicles:
-            current_loc = vehicle["location"]
-            valid_pairs = []
-            for pair in nij_sorted:
-                i, j = pair["from"], pair["to"]
-                if i !=current_loc:
-                    continue
-                if (vehicle["Nc"] < MAX_CAPACITY and bike_counts[i] > 0) or \
-                   (vehicle["Nc"] > 0 and bike_counts[j] < 0):
-                    valid_pairs.append(pair)
+        if timing:
+            t1 = clock()
+            instrument.add_time("priority", t1 - t0)
+        
+        if matching:
+            targets, target_nij, scanned_targets = assign_targets(
+                engine, counts, loads, position, active_vehicles, MAX_CAPACITY, index.neighbours)
+            index.scanned += scanned_targets
+            if timing:
+                t2 = clock()
+                instrument.add_time("candidates", t2 - t1)
+        
+        for n, v in enumerate(active_vehicles):
+            if keep_going is not None and not keep_going():
+                return
+            origin = position[v]
             
-            if not valid_pairs:
-                continue
+            if matching:
+                k, best_nij = targets[n], target_nij[n]
+                if timing:
+                    t2 = clock()
+            else:
+                # 可行性：当前点可取车则所有目标站都可行，否则只能去短缺站卸车
+                allowed = None
+                if not (loads[v] < MAX_CAPACITY and counts[origin] > 0):
+                    if loads[v] <= 0:
+                        continue
+                    allowed = lambda cand: counts[cand] < 0
+                
+                if timing:
+                    t1 = clock()
+                if planner is None:
+                    k, best_nij = index.best(origin, allowed)
+                else:
+                    k, best_nij = planner.best(engine, counts, loads, v, origin)
+                if timing:
+                    t2 = clock()
+                    instrument.add_time("candidates", t2 - t1)
             
-            best_pair = valid_pairs[0]
-            i, j = best_pair["from"], best_pair["to"]
+            if k < 0:
+                continue
             
             # 执行调度
-            Nc_new, moved_out, moved_in = perform_dispatch(i, j, vehicle["Nc"], bike_counts)
-            print(f"车辆{vehicle['id']}调度：{i} -> {j}, moved_in： {moved_in}，Nc_new：{Nc_new}")
-            vehicle["Nc"] = Nc_new
-            vehicle["location"] = j
-            vehicle["route"].append({
+            moved_out, moved_in = fleet.dispatch(v, origin, k)
+            if timing:
+                instrument.add_time("dispatch", clock() - t2)
+                moves += 1
+                bikes += moved_out + moved_in
+            logger.debug("车辆%s调度：%s -> %s, moved_in： %s，Nc_new：%s",
+                         v, locations[origin], locations[k], moved_in, loads[v])
+            touched.update((origin, k))
+            yield step, v, origin, k, moved_out, moved_in, loads[v], best_nij
+        
+        if timing:
+            instrument.count("steps")
+            instrument.count("moves", moves)
+            instrument.count("candidates_scanned", index.scanned - scanned)
+            instrument.step({
                 "step": step,
-                "from": i, 
-                "moved_out": moved_out,
-                "to": j,
-                "moved_in": moved_in,
-                "Nc_after": vehicle["Nc"],
-                "nij": best_pair["nij"]
+                "active_vehicles": len(active_vehicles),
+                "candidates_scanned": index.scanned - scanned,
+                "moves": moves,
+                "bikes_moved": bikes,
+                "seconds": clock() - t0
             })
+        
+        # 本步没有任何调度时状态不再变化，后续步骤也不会有调度
+        if not touched:
+            break
+
+
+def iter_dispatch(
+    df_distance: pd.DataFrame,
+    bike_counts: Dict[str, int],
+    num_vehicles: int = 3,
+    max_steps: int = 100,
+    a: float = 0.2,
+    b: float = 0.2,
+    c: float = 0.2,
+    time_budget: Optional[float] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    instrument: Optional[Instrumentation] = None,
+    planner: Union[str, LookaheadPlanner] = "greedy",
+    assignment: str = "sequential",
+    neighbours: Optional[Neighbourhood] = None
+) -> Iterator[Dict]:
+    """逐条产出调度记录的多车调度，调度规则与 multi_vehicle_dispatch 完全相同
     
-    # 整理所有车辆的调度记录
-    for v in vehicles:
-        for r in v["route"]:
-            all_routes.append({
-                "vehicle_id": v["id"],
-                **r
-            })
+    每决定一次调度就产出一条记录（字段与 multi_vehicle_dispatch 结果表的列相同），
+    调用方可以边规划边下发；函数本身不保存已产出的记录，内存占用与步数无关。
+    bike_counts 随每条记录原地更新，任何时刻都反映已产出调度之后的站点数量。
+    
+    参数:
+        time_budget: 规划时间上限（秒），超时后不再产出新的调度
+        should_stop: 每次为车辆选择目标站前调用，返回 True 时结束调度
+        planner, assignment, neighbours: 规划、分配方式和邻近站点表，同 multi_vehicle_dispatch
+        其余参数同 multi_vehicle_dispatch
+    
+    提前结束也可以直接对生成器调用 close() 或停止迭代。
+    """
+    planner = _resolve_planner(planner)
+    matching = _check_assignment(assignment, planner)
+    fleet, engine, index = _prepare_dispatch(df_distance, bike_counts, num_vehicles, a, b, c, neighbours)
+    # 起点装车已经改变了站点数量
+    fleet.write_back(bike_counts)
+    counts, locations = fleet.counts, fleet.locations
+    # 记录中的数量转换为 Python 数值，便于直接序列化
+    as_value = counts.dtype.type
+    
+    keep_going = None
+    if time_budget is not None or should_stop is not None:
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        
+        def keep_going() -> bool:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return False
+            return should_stop is None or not should_stop()
+    
+    for step, v, origin, k, moved_out, moved_in, load, nij in _dispatch_steps(
+            fleet, engine, index, max_steps, instrument, keep_going, planner, matching):
+        i, j = locations[origin], locations[k]
+        bike_counts[i] = counts[origin].item()
+        bike_counts[j] = counts[k].item()
+        yield {
+            "vehicle_id": int(v),
+            "step": step,
+            "from": i,
+            "moved_out": as_value(moved_out).item(),
+            "to": j,
+            "moved_in": as_value(moved_in).item(),
+            "Nc_after": load.item(),
+            "nij": float(nij)
+        }
+
+
+def multi_vehicle_dispatch(
+    df_distance: pd.DataFrame,
+    bike_counts: Dict[str, int],
+    num_vehicles: int = 3,
+    max_steps: int = 100,
+    a: float = 0.2,
+    b: float = 0.2,
+    c: float = 0.2,
+    instrument: Optional[Instrumentation] = None,
+    planner: Union[str, LookaheadPlanner] = "greedy",
+    assignment: str = "sequential",
+    neighbours: Optional[Neighbourhood] = None
+) -> pd.DataFrame:
+    """多车协同调度主函数
+    对于a, b, c参数，这里不再设限制，可以根据实际情况调整
+    instrument: 可选的性能埋点，记录各阶段耗时和每一步的候选数、调度次数、搬运车辆数
+    planner: "greedy" 每次取 nij 最大的目标站；"lookahead" 或 LookaheadPlanner(depth, beam_width)
+        用束搜索前瞻若干步，按单位行驶时间消除的不平衡量选择下一站，计算量随 depth × beam_width 增加
+    assignment: "sequential" 同一步内车辆按编号依次选择目标站；"matching" 每一步对所有车辆
+        求解一次 车辆 × 站点 的最大权匹配（每个站点可接纳的车数受其富余/短缺量限制），
+        避免多车追逐同一个短缺站，结果与车辆顺序无关；只能与 greedy 规划一起使用
+    neighbours: 可选的邻近站点表（Neighbourhood.from_points / from_matrix），每辆车先只在
+        邻近站点中选择目标站，没有可行目标站时再考虑全部站点；lookahead 规划不使用
+    需要边规划边取结果时使用 iter_dispatch
+    """
+    planner = _resolve_planner(planner)
+    matching = _check_assignment(assignment, planner)
+    fleet, engine, index = _prepare_dispatch(df_distance, bike_counts, num_vehicles, a, b, c, neighbours)
+    routes = RouteBuffer(capacity=num_vehicles * min(max_steps, 64), dtype=fleet.counts.dtype)
+    for record in _dispatch_steps(fleet, engine, index, max_steps, instrument,
+                                  planner=planner, matching=matching):
+        routes.append(*record)
     
-    return pd.DataFrame(all_routes)
+    # 站点数量写回原字典，整理所有车辆的调度记录
+    fleet.write_back(bike_counts)
+    return routes.to_frame(fleet.locations)
 
 
-def plot_vehicle_routes(df_routes, coord_file):
+def plot_vehicle_routes(df_routes, coord_file, shortest: Optional[ShortestPaths] = None, output: Optional[str] = None):
     """
     画出所有调度车经过的路径，只包含实际经过的点。
     
     参数：
     - df_routes: 调度记录 DataFrame，包含 vehicle_id、from、to 等字段
-    - coord_file: 坐标 Excel 文件路径，包含 name, x, y 三列
+    - coord_file: 坐标 Excel 文件路径，包含 name, x, y 三列（读取结果按文件修改时间缓存）
+    - shortest: 可选的最短路结果，提供时按实际道路经过的中间站点画线
+    - output: 图片输出路径（.png / .svg 等），给出时用 Agg 直接写入文件，不打开窗口
+    
+    批量输出多个方案的图片使用 render.render_batch。
     """
-    df_coords = pd.read_excel(coord_file)
-    df_coords.set_index("name", inplace=True)
-
-    used_points = set(df_routes['from']).union(set(df_routes['to']))
-    df_coords_filtered = df_coords.loc[df_coords.index.intersection(used_points)]
-
-    plt.figure(figsize=(10, 10))
-
-    # 为每辆车画出路径
-    for vehicle_id in df_routes["vehicle_id"].unique():
-        df_v = df_routes[df_routes["vehicle_id"] == vehicle_id]
-        x_vals, y_vals = [], []
-
-        for _, row in df_v.iterrows():
-            x_vals.append(df_coords.loc[row["from"], "x"])
-            y_vals.append(df_coords.loc[row["from"], "y"])
-            x_vals.append(df_coords.loc[row["to"], "x"])
-            y_vals.append(df_coords.loc[row["to"], "y"])
-        
-        plt.plot(x_vals, y_vals, marker='o', label=f"Vehicle {vehicle_id}")
-
-    for name, row in df_coords_filtered.iterrows():
-        plt.text(row["x"] + 10, row["y"] + 10, name, fontsize=8)
+    from .render import draw_routes, load_coordinates, render_routes
+    
+    coords = load_coordinates(coord_file)
+    if output is not None:
+        return render_routes(df_routes, coords, output, shortest)
 
-    plt.xlabel("x")
-    plt.ylabel("y")
-    plt.title("Shared Bike Dispatch Routes")
-    plt.legend()
-    plt.grid(True)
-    plt.show()
\ No newline at end of file
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(10, 10))
+    draw_routes(ax, df_routes, coords, shortest)
+    plt.show()
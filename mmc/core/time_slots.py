@@ -0,0 +1,124 @@
+import os
+import tempfile
+import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from .priority import slot_nij_table
+from .shortest import ShortestPaths, load_shared_matrix, shared_matrix_file
+
+# 按顺序写出时暂存的已完成时间段结果最多占用的字节数
+BUFFER_BYTES = 256 << 20
+
+# 子进程内只读共享的距离矩阵
+_WORKER: Dict = {}
+
+
+def _init_worker(dist_path: str, names: List[str]) -> None:
+    _WORKER["df_distance"] = load_shared_matrix(dist_path, names)
+
+
+def check_slot(time_slot: str, df_supply: pd.DataFrame, df_demand: Optional[pd.DataFrame]) -> Optional[str]:
+    """检查时间段的供需 sheet，有问题时返回提示信息"""
+    if df_demand is None:
+        return f"[警告] 时间段 {time_slot} 无匹配的需求数据，跳过"
+    if 'location' not in df_supply or 'supply' not in df_supply:
+        return f"[警告] supply sheet '{time_slot}' 缺少必要列"
+    if 'location' not in df_demand or 'demand' not in df_demand:
+        return f"[警告] demand sheet '{time_slot}' 缺少必要列"
+    return None
+
+
+def _slot_task(
+    time_slot: str,
+    df_supply: pd.DataFrame,
+    df_demand: pd.DataFrame,
+    a: float,
+    b: float,
+    c: float
+) -> Tuple[str, Optional[pd.DataFrame]]:
+    supply_dict = dict(zip(df_supply['location'], df_supply['supply']))
+    demand_dict = dict(zip(df_demand['location'], df_demand['demand']))
+    df_nij = slot_nij_table(
+        _WORKER["df_distance"], supply_dict, demand_dict,
+        df_supply['location'], df_demand['location'], a, b, c
+    )
+    return time_slot, df_nij
+
+
+def nij_by_time(
+    distance: Union[ShortestPaths, pd.DataFrame],
+    supply_sheets: Dict[str, pd.DataFrame],
+    demand_sheets: Dict[str, pd.DataFrame],
+    write: Callable[[str, pd.DataFrame], None],
+    a: float = 0.6,
+    b: float = 0.2,
+    c: float = 0.2,
+    max_workers: Optional[int] = None,
+    max_buffer_bytes: Optional[int] = BUFFER_BYTES
+) -> None:
+    """并行计算所有时间段的 nij 表，按时间段顺序交给 write 写出
+
+    参数:
+        distance: 距离矩阵（ShortestPaths 缓存或 DataFrame），各进程以内存映射方式只读共享
+        supply_sheets, demand_sheets: {时间段: 供给/需求表}，与 supply.xlsx/demand.xlsx 的 sheet 对应
+        write: 写出回调 write(时间段, nij表)，按 supply_sheets 中时间段的顺序调用
+        a, b, c: 权重参数
+        max_workers: 进程数，默认使用全部 CPU
+        max_buffer_bytes: 已算完但还不能写出（前面的时间段未完成）的 nij 表最多占用的字节数，
+            超过后暂停提交新的时间段；None 表示只按 2 × 进程数 个时间段限制。
+            内存峰值约为 max_buffer_bytes 加上正在计算的各时间段的结果（每个不超过 供给点数 × 需求点数 行）
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        dist_path, names = shared_matrix_file(distance, tmp_dir)
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(dist_path, names)
+        ) as pool:
+            tasks = []
+            for time_slot, df_supply in supply_sheets.items():
+                df_demand = demand_sheets.get(time_slot)
+                message = check_slot(time_slot, df_supply, df_demand)
+                if message:
+                    print(message)
+                    continue
+                tasks.append((time_slot, df_supply, df_demand))
+
+            # 结果按时间段顺序写出：先完成的时间段暂存在 finished 中，等前面的时间段写出后再写；
+            # 最多提前 window 个时间段提交，暂存的结果超过 max_buffer_bytes 时不再提交新的时间段
+            # （下一个要写出的时间段总是已经提交，不会因此停住）
+            window = 2 * (max_workers or os.cpu_count() or 1)
+            running = {}  # {future: 时间段序号}
+            finished = {}  # {时间段序号: (时间段, nij表)}
+            buffered = 0  # finished 中 nij 表占用的字节数
+            submitted = written = 0
+            while written < len(tasks):
+                while (submitted < len(tasks) and submitted - written < window
+                       and (max_buffer_bytes is None or buffered < max_buffer_bytes)):
+                    running[pool.submit(_slot_task, *tasks[submitted], a, b, c)] = submitted
+                    submitted += 1
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    finished[running.pop(future)] = result
+                    buffered += _nbytes(result[1])
+                while written in finished:
+                    result = finished.pop(written)
+                    buffered -= _nbytes(result[1])
+                    _write_slot(write, *result)
+                    written += 1
+
+
+def _nbytes(df_nij: Optional[pd.DataFrame]) -> int:
+    return 0 if df_nij is None else int(df_nij.memory_usage(index=True, deep=True).sum())
+
+
+def _write_slot(write: Callable[[str, pd.DataFrame], None], time_slot: str, df_nij: Optional[pd.DataFrame]) -> None:
+    print(f"处理时间段：{time_slot}")
+    if df_nij is None:
+        print(f"[跳过] 时间段 {time_slot} 缺少有效供需点")
+    elif df_nij.empty:
+        print(f"[无结果] 时间段 {time_slot} 没有有效的 nij")
+    else:
+        write(time_slot, df_nij)
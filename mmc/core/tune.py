@@ -0,0 +1,64 @@
+import os
+import argparse
+from typing import List, Optional
+
+from . import DATA_DIR
+from .calc_shortest import add_format_argument, add_graph_arguments, load_shortest
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    add_graph_arguments(parser)
+    parser.add_argument("--counts", default=os.path.join(DATA_DIR, "points_number.xlsx"),
+                        help="站点数量文件，每个 sheet 是一个需求快照")
+    parser.add_argument("--sheets", nargs="+", help="只使用这些 sheet，默认全部")
+    parser.add_argument("--samples", type=int, default=0,
+                        help="每个快照附近另外抽取的需求样本数（montecarlo.sample_around），用于逐次减半等需要较多快照的搜索")
+    parser.add_argument("--output", default=os.path.join(DATA_DIR, "tune_weights.xlsx"), help="各候选权重的评估结果")
+    add_format_argument(parser)
+    parser.add_argument("--method", choices=["random", "grid", "halving"], default="random")
+    parser.add_argument("--trials", type=int, default=60, help="random / halving 的候选数")
+    parser.add_argument("--grid", type=float, nargs="+", default=[0.0, 0.2, 0.4, 0.6, 0.8, 1.0],
+                        help="grid 搜索中 a、b、c 的取值")
+    parser.add_argument("--eta", type=int, default=3, help="halving 每轮保留 1/eta 的候选")
+    parser.add_argument("--vehicles", type=int, default=3)
+    parser.add_argument("--horizon", type=float, default=60.0, help="每次评估的调度时长（分钟）")
+    parser.add_argument("--resolution", type=float, default=0.01, help="权重取整精度")
+    parser.add_argument("--workers", type=int, help="进程数，默认使用全部 CPU")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def run(args: argparse.Namespace) -> None:
+    from .batch import read_snapshots
+    from .output import write_table
+    from .tuning import tune_weights
+
+    shortest = load_shortest(args)
+    snapshots = read_snapshots(args.counts)
+    if args.sheets:
+        snapshots = {sheet: snapshots[sheet] for sheet in args.sheets}
+    if args.samples:
+        from .montecarlo import sample_around
+        for n, (sheet, bike_counts) in enumerate(list(snapshots.items())):
+            samples = sample_around(bike_counts, args.samples, seed=args.seed + n)
+            for k, row in enumerate(samples.to_dict("records")):
+                snapshots[f"{sheet}#{k}"] = row
+
+    best, df_trials = tune_weights(
+        shortest, snapshots, args.method, args.trials, args.grid, args.eta,
+        args.vehicles, args.horizon, args.resolution, args.workers, args.seed
+    )
+    write_table(df_trials, args.output, args.format)
+    print(df_trials.head(10).to_string(index=False))
+    print("最优权重：a={:.2f}，b={:.2f}，c={:.2f}（{} 个快照）".format(*best, len(snapshots)))
+    print(f"评估结果已保存：{args.output}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="搜索 nij 权重 a、b、c")
+    add_arguments(parser)
+    run(parser.parse_args(argv))
+
+
+# 多进程在 Windows 上以 spawn 方式启动，主程序必须放在 __main__ 保护下
+if __name__ == "__main__":
+    main()
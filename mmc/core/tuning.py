@@ -0,0 +1,219 @@
+import math
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .cache import LRUCache, matrix_hash, names_hash
+from .events import event_dispatch
+from .shortest import ShortestPaths, load_shared_matrix, shared_matrix_file
+
+# 权重 (a, b, c)
+Weights = Tuple[float, float, float]
+
+# 评估结果缓存：{(矩阵哈希, 快照哈希, 车辆数, 模拟时长, 权重): 指标}，同一进程内的多次调参共用
+RESULTS = LRUCache(maxsize=100_000)
+
+# 子进程内只读共享的距离矩阵（由 _init_worker 以内存映射方式加载，不随任务序列化）
+_WORKER: Dict = {}
+
+
+def normalise_weights(a: float, b: float, c: float, resolution: Optional[float] = 0.01) -> Weights:
+    """把权重缩放到 a + b + c = 1，并按 resolution 取整
+
+    nij 对 (a, b, c) 是线性的，权重同乘一个正数时各站点对的 nij 大小顺序不变，调度结果也不变，
+    因此只需在 a + b + c = 1 的单纯形上搜索；取整后相近的候选落在同一个缓存键上，不再重复评估。
+    """
+    total = a + b + c
+    if min(a, b, c) < 0 or total <= 0:
+        raise ValueError(f"权重必须非负且不全为 0：{(a, b, c)}")
+    a, b = a / total, b / total
+    if resolution:
+        a = round(round(a / resolution) * resolution, 10)
+        b = round(min(round(b / resolution) * resolution, 1 - a), 10)
+    return a, b, round(1 - a - b, 10)
+
+
+def grid_candidates(values: Sequence[float], resolution: Optional[float] = 0.01) -> List[Weights]:
+    """a、b、c 各取 values 中的值组成的网格，归一化后去重（如 (0.2, 0.2, 0.2) 与 (0.6, 0.6, 0.6) 相同）"""
+    candidates = {
+        normalise_weights(a, b, c, resolution)
+        for a in values for b in values for c in values
+        if a + b + c > 0
+    }
+    return sorted(candidates)
+
+
+def random_candidates(n: int, resolution: Optional[float] = 0.01, seed: Optional[int] = 0) -> List[Weights]:
+    """在单纯形 a + b + c = 1 上均匀随机抽取 n 组权重（Dirichlet(1, 1, 1)），取整后去重"""
+    rng = np.random.default_rng(seed)
+    candidates = dict.fromkeys(normalise_weights(*w, resolution) for w in rng.dirichlet(np.ones(3), n))
+    return list(candidates)
+
+
+def evaluate_weights(
+    df_distance: pd.DataFrame,
+    bike_counts: Dict[str, float],
+    weights: Weights,
+    num_vehicles: int = 3,
+    horizon: float = 60.0
+) -> Dict[str, float]:
+    """在一个需求快照上按给定权重做 horizon 分钟的事件驱动调度，返回调度效果指标
+
+    搜索目标就是剩余失衡量 imbalance_after（调度结束时各站 |数量| 之和），越小越好；
+    不除以实际行驶时间，否则绕远路的权重反而更优。实际行驶时间的效率见
+    rebalanced_per_minute（每行驶一分钟减少的失衡量）。
+    """
+    counts = dict(bike_counts)
+    a, b, c = weights
+    _, df_vehicles, summary = event_dispatch(df_distance, counts, num_vehicles, horizon, a=a, b=b, c=c)
+    busy = float(df_vehicles["busy_minutes"].sum())
+    rebalanced = summary["imbalance_before"] - summary["imbalance_after"]
+    return {
+        "imbalance_before": summary["imbalance_before"],
+        "imbalance_after": summary["imbalance_after"],
+        "busy_minutes": busy,
+        "rebalanced_per_minute": rebalanced / busy if busy > 0 else 0.0,
+        "events": summary["events"]
+    }
+
+
+def _init_worker(dist_path: str, names: List[str]) -> None:
+    _WORKER["df_distance"] = load_shared_matrix(dist_path, names)
+
+
+def _evaluate_task(bike_counts: Dict[str, float], weights: Weights, num_vehicles: int, horizon: float) -> Dict:
+    return evaluate_weights(_WORKER["df_distance"], bike_counts, weights, num_vehicles, horizon)
+
+
+def _snapshot_hash(bike_counts: Dict[str, float]) -> str:
+    return names_hash([f"{name}={value!r}" for name, value in bike_counts.items()])
+
+
+class _Evaluator:
+    """按 (权重, 快照) 评估并缓存，未命中的组合在进程池中并行计算"""
+
+    def __init__(self, distance, snapshots, num_vehicles, horizon, max_workers):
+        self.distance = distance
+        self.df_distance = distance.matrix_frame() if isinstance(distance, ShortestPaths) else distance
+        self.snapshots = snapshots
+        self.num_vehicles = num_vehicles
+        self.horizon = horizon
+        self.max_workers = max_workers
+        matrix_key = matrix_hash(self.df_distance)
+        self.keys = {
+            name: (matrix_key, _snapshot_hash(counts), num_vehicles, float(horizon))
+            for name, counts in snapshots.items()
+        }
+
+    def __call__(self, candidates: Sequence[Weights], names: Sequence[str]) -> pd.DataFrame:
+        """评估 候选权重 × 快照，返回每个组合一行的指标表"""
+        pairs = [(w, name) for w in candidates for name in names]
+        results = {pair: RESULTS.get((*self.keys[pair[1]], pair[0])) for pair in pairs}
+        missing = [pair for pair, result in results.items() if result is None]
+
+        args = [(self.snapshots[name], w, self.num_vehicles, self.horizon) for w, name in missing]
+        if self.max_workers == 1 or len(missing) <= 1:
+            computed = [evaluate_weights(self.df_distance, *task) for task in args]
+        else:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                dist_path, matrix_names = shared_matrix_file(self.distance, tmp_dir)
+                with ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(dist_path, matrix_names)
+                ) as pool:
+                    computed = list(pool.map(_evaluate_task, *zip(*args), chunksize=max(len(args) // 64, 1)))
+
+        for pair, result in zip(missing, computed):
+            RESULTS.put((*self.keys[pair[1]], pair[0]), result)
+            results[pair] = result
+
+        return pd.DataFrame([
+            {"a": w[0], "b": w[1], "c": w[2], "snapshot": name, **results[w, name]}
+            for w, name in pairs
+        ])
+
+
+def _rank(df_evals: pd.DataFrame) -> pd.DataFrame:
+    """各候选权重在已评估快照上的平均指标，按剩余失衡量升序，相同时行驶时间少的在前"""
+    df = df_evals.groupby(["a", "b", "c"], sort=False).agg(
+        snapshots=("snapshot", "nunique"),
+        imbalance_after=("imbalance_after", "mean"),
+        busy_minutes=("busy_minutes", "mean"),
+        rebalanced_per_minute=("rebalanced_per_minute", "mean")
+    ).reset_index()
+    return df.sort_values(["imbalance_after", "busy_minutes"], kind="stable", ignore_index=True)
+
+
+def _best(df_trials: pd.DataFrame) -> Weights:
+    a, b, c = df_trials.loc[0, ["a", "b", "c"]].tolist()
+    return a, b, c
+
+
+def tune_weights(
+    distance: Union[ShortestPaths, pd.DataFrame],
+    snapshots: Dict[str, Dict[str, float]],
+    method: str = "random",
+    n_trials: int = 60,
+    grid_values: Sequence[float] = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+    eta: int = 3,
+    num_vehicles: int = 3,
+    horizon: float = 60.0,
+    resolution: Optional[float] = 0.01,
+    max_workers: Optional[int] = None,
+    seed: Optional[int] = 0
+) -> Tuple[Weights, pd.DataFrame]:
+    """搜索使剩余失衡量（horizon 分钟调度后各站 |数量| 之和，见 evaluate_weights）最小的 nij 权重 (a, b, c)
+
+    参数:
+        distance: 距离矩阵（ShortestPaths 缓存或 DataFrame），多进程时各进程以内存映射方式只读共享
+        snapshots: {快照名: 站点数量字典}，如 batch.read_snapshots 读取的各 sheet，
+            也可以加入 montecarlo.sample_around 抽取的样本；剩余失衡量取各快照的平均值
+        method: "grid" 评估 grid_values 组成的网格；"random" 在单纯形上随机抽取 n_trials 组；
+            "halving" 逐次减半：n_trials 组随机候选先只在少量快照上评估，每轮保留 1/eta 的候选，
+            快照数乘以 eta，直到用上全部快照
+        num_vehicles, horizon: 调度车辆数和模拟时长（分钟）
+        resolution: 权重取整精度，相近的候选共用缓存结果
+        max_workers: 进程数，1 表示在当前进程中依次评估，None 使用全部 CPU
+
+    返回:
+        (最优权重, 各候选的平均指标表)，表按平均剩余失衡量 imbalance_after 升序（相同时按平均行驶时间 busy_minutes 升序），snapshots 列为该候选评估过的快照数；
+        评估结果缓存在 RESULTS 中，重复或取整后相同的 (权重, 快照) 不再计算
+    """
+    if not snapshots:
+        raise ValueError("至少需要一个需求快照")
+    evaluate = _Evaluator(distance, snapshots, num_vehicles, horizon, max_workers)
+    names = list(snapshots)
+
+    if method == "grid":
+        candidates = grid_candidates(grid_values, resolution)
+    elif method in ("random", "halving"):
+        candidates = random_candidates(n_trials, resolution, seed)
+    else:
+        raise ValueError(f"未知的搜索方法：{method}")
+
+    if method != "halving":
+        df_trials = _rank(evaluate(candidates, names))
+        return _best(df_trials), df_trials
+
+    # 逐次减半：快照顺序随机打乱，每轮在前 r 个快照上评估（前几轮的结果从缓存取得）
+    order = [names[k] for k in np.random.default_rng(seed).permutation(len(names))]
+    rungs = max(math.ceil(math.log(len(candidates), eta)), 1)
+    r = max(len(order) // eta ** (rungs - 1), 1)
+    rounds = []
+    while True:
+        df_rung = _rank(evaluate(candidates, order[:r]))
+        rounds.append(df_rung)
+        if r >= len(order):
+            break
+        keep = math.ceil(len(candidates) / eta)
+        candidates = [tuple(w) for w in df_rung.loc[:keep - 1, ["a", "b", "c"]].to_numpy().tolist()]
+        r = min(r * eta, len(order))
+
+    # 每个候选只保留评估快照最多的一轮
+    df_trials = pd.concat(rounds[::-1], ignore_index=True).drop_duplicates(["a", "b", "c"])
+    df_trials = df_trials.sort_values(["snapshots", "imbalance_after", "busy_minutes"], ascending=[False, True, True],
+                                      kind="stable", ignore_index=True)
+    return _best(df_trials), df_trials
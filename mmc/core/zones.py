@@ -0,0 +1,306 @@
+import tempfile
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .fleet import MAX_CAPACITY, Fleet, RouteBuffer
+from .priority import NijEngine, OriginIndex, distance_array
+from .shortest import ShortestPaths, load_shared_matrix, shared_matrix_file
+from .sim_dispatch_multi import _dispatch_steps, _prepare_dispatch
+
+# 车辆状态：(所在站点, 载量)
+VehicleState = Tuple[str, float]
+
+# 子进程内只读共享的距离矩阵（由 _init_worker 以内存映射方式加载，不随任务序列化）
+_WORKER: Dict = {}
+
+
+def _finite_distance(df_distance: pd.DataFrame, locations: Sequence[str]) -> np.ndarray:
+    dist = distance_array(df_distance, locations)
+    return np.where(np.isnan(dist), np.inf, dist)
+
+
+def zones_from_groups(
+    groups: Dict[str, Sequence[str]],
+    df_distance: pd.DataFrame,
+    locations: Optional[Sequence[str]] = None
+) -> Dict[str, List[str]]:
+    """由人工给定的分区（如 case2.GROUPS）得到覆盖全部站点的分区
+
+    分区中不存在的站点被忽略；不属于任何分区的站点（如路口 C1、C2…）并入到该分区站点平均距离最近的分区。
+    """
+    locations = list(df_distance.index) if locations is None else list(locations)
+    position = {name: k for k, name in enumerate(locations)}
+    zones = {zone: [name for name in members if name in position] for zone, members in groups.items()}
+    zones = {zone: members for zone, members in zones.items() if members}
+    if not zones:
+        raise ValueError("分区中没有任何已知站点")
+
+    assigned = {name for members in zones.values() for name in members}
+    rest = [name for name in locations if name not in assigned]
+    if rest:
+        dist = _finite_distance(df_distance, locations)
+        rest_idx = np.asarray([position[name] for name in rest])
+        # 到各分区站点的平均距离（不可达为 inf）
+        mean = np.stack([
+            dist[np.ix_(rest_idx, [position[name] for name in members])].mean(axis=1)
+            for members in zones.values()
+        ], axis=1)
+        names = list(zones)
+        for name, zone in zip(rest, np.argmin(mean, axis=1)):
+            zones[names[zone]].append(name)
+    return zones
+
+
+def cluster_zones(
+    n_zones: int,
+    df_distance: Optional[pd.DataFrame] = None,
+    points: Optional[Dict[str, Tuple[float, float]]] = None,
+    locations: Optional[Sequence[str]] = None,
+    max_iter: int = 100,
+    seed: int = 0
+) -> Dict[str, List[str]]:
+    """k-medoids 聚类分区：按最短路距离矩阵，或没有矩阵时按站点坐标的直线距离
+
+    初始中心用 k-medoids++ 方式选取（固定随机种子，结果可复现），之后交替执行
+    “站点归入最近的中心”和“每个分区重新选取到区内其他站点距离之和最小的站点作为中心”，直到中心不再变化。
+
+    返回:
+        {"zone0": [站点...], ...}，按中心的站点顺序编号
+    """
+    if df_distance is not None:
+        locations = list(df_distance.index) if locations is None else list(locations)
+        dist = _finite_distance(df_distance, locations)
+    elif points is not None:
+        locations = list(points) if locations is None else list(locations)
+        xy = np.asarray([points[name] for name in locations], dtype=np.float64)
+        dist = np.hypot(*(xy[:, None, :] - xy[None, :, :]).transpose(2, 0, 1))
+    else:
+        raise ValueError("df_distance 和 points 至少给出一个")
+    n = len(locations)
+    if not 1 <= n_zones <= n:
+        raise ValueError(f"分区数必须在 1 到站点数 {n} 之间")
+
+    # 不可达的站点对按最大有限距离的两倍处理，避免 inf 使中心选择失效
+    finite = np.isfinite(dist)
+    dist = np.where(finite, dist, 2 * dist[finite].max() if finite.any() else 1.0)
+
+    rng = np.random.default_rng(seed)
+    medoids = [int(rng.integers(n))]
+    for _ in range(1, n_zones):
+        nearest = dist[:, medoids].min(axis=1)
+        weights = nearest ** 2
+        total = weights.sum()
+        if total <= 0:
+            medoids.append(int(np.setdiff1d(np.arange(n), medoids)[0]))
+        else:
+            medoids.append(int(rng.choice(n, p=weights / total)))
+    medoids = np.asarray(medoids)
+
+    for _ in range(max_iter):
+        label = np.argmin(dist[:, medoids], axis=1)
+        label[medoids] = np.arange(n_zones)
+        updated = medoids.copy()
+        for z in range(n_zones):
+            members = np.flatnonzero(label == z)
+            updated[z] = members[np.argmin(dist[np.ix_(members, members)].sum(axis=1))]
+        if np.array_equal(updated, medoids):
+            break
+        medoids = updated
+
+    label = np.argmin(dist[:, medoids], axis=1)
+    label[medoids] = np.arange(n_zones)
+    order = np.argsort(medoids, kind="stable")
+    return {f"zone{n}": [locations[k] for k in np.flatnonzero(label == z)] for n, z in enumerate(order)}
+
+
+def allocate_vehicles(zone_imbalance: Dict[str, float], num_vehicles: int) -> Dict[str, int]:
+    """按各分区失衡量（区内 |数量| 之和）分配车辆，最大余数法取整；失衡量为 0 的分区不分配车辆
+
+    车辆数少于需要车辆的分区数时，失衡量最大的分区各得一辆。
+    """
+    names = list(zone_imbalance)
+    weight = np.asarray([zone_imbalance[name] for name in names], dtype=np.float64)
+    share = np.zeros(len(names), dtype=np.int64)
+    if num_vehicles <= 0 or weight.sum() <= 0:
+        return dict(zip(names, share.tolist()))
+
+    need = np.flatnonzero(weight > 0)
+    if num_vehicles <= len(need):
+        top = need[np.argsort(-weight[need], kind="stable")[:num_vehicles]]
+        share[top] = 1
+        return dict(zip(names, share.tolist()))
+
+    # 每个需要调度的分区至少一辆，其余按失衡量比例分配
+    share[need] = 1
+    quota = weight / weight.sum() * (num_vehicles - len(need))
+    share += np.floor(quota).astype(np.int64)
+    remainder = num_vehicles - share.sum()
+    if remainder > 0:
+        share[np.argsort(-(quota - np.floor(quota)), kind="stable")[:remainder]] += 1
+    return dict(zip(names, share.tolist()))
+
+
+def _run_fleet(fleet: Fleet, engine: NijEngine, max_steps: int) -> Tuple[pd.DataFrame, List[VehicleState]]:
+    """运行调度循环，返回调度记录和车辆的最终状态"""
+    routes = RouteBuffer(capacity=len(fleet.loads) * min(max_steps, 64), dtype=fleet.counts.dtype)
+    for record in _dispatch_steps(fleet, engine, OriginIndex(engine), max_steps):
+        routes.append(*record)
+    state = [(fleet.locations[p], load) for p, load in zip(fleet.position.tolist(), fleet.loads.tolist())]
+    return routes.to_frame(fleet.locations), state
+
+
+def _solve_zone(
+    df_distance: pd.DataFrame,
+    counts: Dict[str, float],
+    num_vehicles: int,
+    max_steps: int,
+    a: float,
+    b: float,
+    c: float
+) -> Tuple[pd.DataFrame, Dict[str, float], List[VehicleState]]:
+    """单个分区内的多车调度（规则同 multi_vehicle_dispatch），counts 原地更新"""
+    # 只取区内的子矩阵，引擎和缓存的规模与分区大小有关，与全网站点数无关
+    stations = list(counts)
+    df_distance = df_distance.reindex(index=stations, columns=stations)
+    fleet, engine, _ = _prepare_dispatch(df_distance, counts, num_vehicles, a, b, c)
+    df_routes, state = _run_fleet(fleet, engine, max_steps)
+    fleet.write_back(counts)
+    return df_routes, counts, state
+
+
+def _zone_fleets(
+    bike_counts: Dict[str, float],
+    zones: Dict[str, Sequence[str]],
+    num_vehicles: int
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, int]]:
+    """各分区的站点数量和分到的车辆数"""
+    zone_counts = {
+        zone: {name: bike_counts[name] for name in members if name in bike_counts}
+        for zone, members in zones.items()
+    }
+    vehicles = allocate_vehicles(
+        {zone: float(np.abs(list(counts.values())).sum()) if counts else 0.0
+         for zone, counts in zone_counts.items()},
+        num_vehicles
+    )
+    return zone_counts, vehicles
+
+
+def zone_starting_points(
+    bike_counts: Dict[str, float],
+    zones: Dict[str, Sequence[str]],
+    num_vehicles: int,
+    max_capacity: int = MAX_CAPACITY
+) -> List[str]:
+    """hierarchical_dispatch 在调度前的站点数量 bike_counts 上为各车辆（按全局编号）选择的起点站
+
+    各分区按区内站点数量分别选择起点（Fleet.select_starting_points），供 montecarlo.check_replay /
+    evaluate_plan 重放分区调度方案。
+    """
+    zone_counts, vehicles = _zone_fleets(bike_counts, zones, num_vehicles)
+    starts = []
+    for zone, counts in zone_counts.items():
+        if vehicles[zone] > 0:
+            fleet = Fleet(list(counts), counts, vehicles[zone], max_capacity)
+            fleet.select_starting_points()
+            starts.extend(fleet.locations[k] for k in fleet.position)
+    return starts
+
+
+def _init_worker(dist_path: str, names: List[str]) -> None:
+    _WORKER["df_distance"] = load_shared_matrix(dist_path, names)
+
+
+def _zone_task(zone: str, counts: Dict[str, float], num_vehicles: int, params: Dict):
+    return (zone, *_solve_zone(_WORKER["df_distance"], counts, num_vehicles, **params))
+
+
+def hierarchical_dispatch(
+    distance: Union[ShortestPaths, pd.DataFrame],
+    bike_counts: Dict[str, float],
+    zones: Dict[str, Sequence[str]],
+    num_vehicles: int = 3,
+    max_steps: int = 100,
+    a: float = 0.2,
+    b: float = 0.2,
+    c: float = 0.2,
+    transfer_steps: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """分区分层的多车调度：各分区内部独立调度（多进程并行），再做一次跨区转运
+
+    1. 按各分区失衡量分配车辆（allocate_vehicles），每个分区只在区内站点之间调度（规则同
+       multi_vehicle_dispatch），规模从 N² 降到各分区站点数的平方之和，各分区在进程池中并行求解；
+    2. 区内调度后仍有富余或短缺的站点（区内供需总量不平衡的部分）组成一个小的跨区转运问题：
+       所有车辆从区内调度结束时的位置、带着当时的载量，在这些站点之间继续调度。
+
+    参数:
+        distance: 距离矩阵（ShortestPaths 缓存或 DataFrame），各进程以内存映射方式只读共享
+        zones: {分区名: 站点列表}，来自 zones_from_groups 或 cluster_zones，每个站点只能属于一个分区
+        transfer_steps: 跨区转运的最大步数，默认与 max_steps 相同，0 表示不做跨区转运
+        max_workers: 进程数，1 表示在当前进程中依次求解，None 使用全部 CPU
+        其余参数同 multi_vehicle_dispatch
+
+    返回:
+        调度记录，列同 multi_vehicle_dispatch，另有 zone（跨区转运为 "transfer"）列；
+        vehicle_id 为全局编号，step 在跨区转运阶段接着区内的最大步数。
+        bike_counts 原地更新为调度后的站点数量。
+    """
+    owner = {}
+    for zone, members in zones.items():
+        for name in members:
+            if name in owner:
+                raise ValueError(f"站点 {name} 同时属于分区 {owner[name]} 和 {zone}")
+            owner[name] = zone
+    zone_counts, vehicles = _zone_fleets(bike_counts, zones, num_vehicles)
+    params = {"max_steps": max_steps, "a": a, "b": b, "c": c}
+    tasks = [(zone, counts, vehicles[zone]) for zone, counts in zone_counts.items() if vehicles[zone] > 0]
+
+    df_distance = None
+    if max_workers == 1 or len(tasks) <= 1:
+        df_distance = distance.matrix_frame() if isinstance(distance, ShortestPaths) else distance
+        results = [(zone, *_solve_zone(df_distance, counts, n, **params)) for zone, counts, n in tasks]
+    else:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dist_path, names = shared_matrix_file(distance, tmp_dir)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(dist_path, names)
+            ) as pool:
+                futures = [pool.submit(_zone_task, zone, counts, n, params) for zone, counts, n in tasks]
+                results = [future.result() for future in futures]
+
+    frames, state = [], []
+    for zone, df_routes, counts, zone_state in results:
+        bike_counts.update(counts)
+        if not df_routes.empty:
+            frames.append(df_routes.assign(vehicle_id=df_routes["vehicle_id"] + len(state), zone=zone))
+        state.extend(zone_state)
+
+    # 跨区转运：只在仍有富余或短缺的站点（以及车辆所在站点）之间调度
+    transfer_steps = max_steps if transfer_steps is None else transfer_steps
+    residual = [name for name, value in bike_counts.items() if name in owner and value != 0]
+    if transfer_steps > 0 and state and residual:
+        if df_distance is None:
+            df_distance = distance.matrix_frame() if isinstance(distance, ShortestPaths) else distance
+        stations = list(dict.fromkeys(residual + [name for name, _ in state]))
+        fleet = Fleet(stations, bike_counts, len(state))
+        fleet.position[:] = [fleet.index[name] for name, _ in state]
+        loads = np.asarray([load for _, load in state])
+        dtype = np.result_type(fleet.counts, loads)
+        fleet.counts, fleet.loads = fleet.counts.astype(dtype), loads.astype(dtype)
+        engine = NijEngine(df_distance.reindex(index=stations, columns=stations), stations, a, b, c)
+        engine.set_counts(fleet.counts)
+        engine.set_loads(fleet.loads)
+        df_routes, _ = _run_fleet(fleet, engine, transfer_steps)
+        fleet.write_back(bike_counts)
+        if not df_routes.empty:
+            last_step = max((int(df["step"].max()) for df in frames), default=0)
+            frames.append(df_routes.assign(step=df_routes["step"] + last_step, zone="transfer"))
+
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from mmc.core.shortest import ShortestPaths
+
+
+def random_city(n=40, seed=0, low=-30, high=40):
+    """随机站点（欧氏距离 × 随机绕行系数的连通路网）和站点富余/短缺数量"""
+    rng = np.random.default_rng(seed)
+    points = {f"S{k}": tuple(rng.uniform(0, 3000, 2)) for k in range(n)}
+    edges = [(f"S{k}", f"S{k + 1}") for k in range(n - 1)]
+    edges += [(f"S{a}", f"S{b}") for a, b in rng.integers(0, n, (2 * n, 2)) if a != b]
+    shortest = ShortestPaths.compute(points, edges)
+    bike_counts = dict(zip(shortest.names, rng.integers(low, high, n).tolist()))
+    return shortest, bike_counts
+
+
+@pytest.fixture
+def make_city():
+    return random_city
+
+
+@pytest.fixture
+def city():
+    """(距离矩阵 DataFrame, 站点数量)"""
+    shortest, bike_counts = random_city()
+    return shortest.matrix_frame(), bike_counts
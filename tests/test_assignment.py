@@ -0,0 +1,92 @@
+"""整步匹配分配 assign_targets 的测试"""
+import itertools
+
+import numpy as np
+import pytest
+
+from mmc.core.assignment import _top_stable, assign_targets, max_weight_matching, station_slots
+from mmc.core.instrument import Instrumentation
+from mmc.core.priority import NijEngine
+from mmc.core.sim_dispatch_multi import multi_vehicle_dispatch
+
+
+def test_matching_prefers_more_feasible_pairs_with_negative_scores():
+    # 全部匹配的权重之和为 -30，放弃第 3 行时可行部分为 +20：仍应匹配全部 3 行
+    score = np.array([
+        [10.0, -10.0, -np.inf],
+        [-np.inf, 10.0, -10.0],
+        [-10.0, -np.inf, -np.inf],
+    ])
+    rows, cols = max_weight_matching(score)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 1), (1, 2), (2, 0)]
+
+
+def test_matching_without_feasible_pairs():
+    rows, cols = max_weight_matching(np.full((2, 3), -np.inf))
+    assert len(rows) == len(cols) == 0
+
+
+def test_top_stable_matches_stable_sort():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        scores = rng.integers(-3, 3, 30).astype(np.float64)
+        scores[rng.random(30) < 0.3] = -np.inf
+        width = int(rng.integers(1, 35))
+        expected = np.argsort(-scores, kind="stable")[:width]
+        np.testing.assert_array_equal(_top_stable(scores, width), expected)
+
+
+def brute_force(engine, counts, loads, position, vehicles, max_capacity):
+    """枚举所有分配，返回 (分到目标站的车辆数, nij 之和) 的最大值"""
+    n = len(counts)
+    slots = station_slots(counts, max_capacity)
+    options = []
+    for v in vehicles:
+        origin = position[v]
+        if loads[v] < max_capacity and counts[origin] > 0:
+            feasible = engine.valid[origin]
+        elif loads[v] > 0:
+            feasible = engine.valid[origin] & (counts < 0)
+        else:
+            feasible = np.zeros(n, dtype=bool)
+        scores = engine.row_scores(origin)
+        options.append([(-1, 0.0)] + [(j, scores[j]) for j in np.flatnonzero(feasible)])
+    best = (0, 0.0)
+    for choice in itertools.product(*options):
+        used = np.bincount([j for j, _ in choice if j >= 0], minlength=n)
+        if (used > slots).any():
+            continue
+        value = (sum(j >= 0 for j, _ in choice), sum(s for _, s in choice))
+        best = max(best, value)
+    return best
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_assign_targets_is_optimal(make_city, seed):
+    shortest, bike_counts = make_city(n=7, seed=seed, low=-25, high=25)
+    rng = np.random.default_rng(seed)
+    # b、c 较大时 nij 多为负值
+    engine = NijEngine(shortest.matrix_frame(), shortest.names, 0.1, 1.0, 1.0)
+    counts = engine.counts_vector(bike_counts).astype(np.float64)
+    loads = rng.integers(-5, 21, 3).astype(np.float64)
+    position = rng.integers(0, len(counts), 3)
+    vehicles = np.arange(3)
+    engine.set_counts(bike_counts)
+    engine.set_loads(loads)
+
+    targets, target_nij, scanned = assign_targets(engine, counts, loads, position, vehicles, 20)
+    acting = ((loads < 20) & (counts[position] > 0)) | (loads > 0)
+    assert scanned == acting.sum() * len(counts)
+    count, total = brute_force(engine, counts, loads, position, vehicles, 20)
+    assert (targets >= 0).sum() == count
+    assert target_nij[targets >= 0].sum() == pytest.approx(total)
+    assert np.bincount(targets[targets >= 0], minlength=len(counts)).max(initial=0) <= \
+        station_slots(counts, 20).max()
+
+
+def test_matching_reports_scanned_candidates(city):
+    df_distance, bike_counts = city
+    instrument = Instrumentation()
+    multi_vehicle_dispatch(df_distance, dict(bike_counts), 3, 10, instrument=instrument, assignment="matching")
+    assert instrument.counters["candidates_scanned"] > 0
+    assert all(step["candidates_scanned"] > 0 for step in instrument.steps if step["moves"])
@@ -0,0 +1,49 @@
+"""LRUCache 与 matrix_hash 的测试"""
+import numpy as np
+import pandas as pd
+
+from mmc.core.cache import LRUCache, matrix_hash
+
+
+def test_lru_evicts_by_count_and_bytes():
+    cache = LRUCache(maxsize=2, max_bytes=None)
+    for k in range(3):
+        cache.put(k, np.zeros(1))
+    assert 0 not in cache and len(cache) == 2
+
+    cache = LRUCache(maxsize=None, max_bytes=100)
+    cache.put("a", np.zeros(10))  # 80 字节
+    cache.get("a")
+    cache.put("b", np.zeros(10))
+    assert "a" not in cache and "b" in cache
+    cache.put("big", np.zeros(100))  # 单个条目超过上限时仍保留最近的一条
+    assert list(cache._data) == ["big"] and cache.nbytes == 800
+    assert cache.info()["hits"] == 1
+
+
+def frame(values):
+    names = [f"S{k}" for k in range(values.shape[0])]
+    return pd.DataFrame(values, index=names, columns=names, copy=False)
+
+
+def test_matrix_hash_depends_on_content_dtype_and_names():
+    values = np.random.default_rng(0).uniform(0, 1000, (30, 30))
+    base = matrix_hash(frame(values))
+    assert matrix_hash(frame(values.copy())) == base
+    # 存储顺序不影响哈希
+    assert matrix_hash(frame(np.asfortranarray(values))) == base
+    assert matrix_hash(frame(values.astype(np.float32))) != base
+
+    changed = values.copy()
+    changed[3, 4] += 1
+    assert matrix_hash(frame(changed)) != base
+    renamed = frame(values).rename(index={"S0": "X"}, columns={"S0": "X"})
+    assert matrix_hash(renamed) != base
+
+
+def test_matrix_hash_memmap(tmp_path):
+    values = np.random.default_rng(1).uniform(0, 1000, (20, 20))
+    np.save(tmp_path / "dist.npy", values)
+    mapped = np.load(tmp_path / "dist.npy", mmap_mode="r")
+    assert matrix_hash(frame(mapped)) == matrix_hash(frame(values))
+
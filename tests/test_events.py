@@ -0,0 +1,39 @@
+"""事件驱动调度 event_dispatch 的统计指标测试"""
+import numpy as np
+import pytest
+
+from mmc.core.events import event_dispatch
+
+
+@pytest.mark.parametrize("horizon", [5.0, 20.0])
+def test_horizon_caps_makespan_and_utilisation(city, horizon):
+    df_distance, bike_counts = city
+    df_routes, df_vehicles, summary = event_dispatch(df_distance, dict(bike_counts), 5, horizon)
+    assert not df_routes.empty
+    assert (df_routes["depart"] <= horizon).all()
+    assert summary["makespan"] == horizon
+    assert summary["last_arrival"] == pytest.approx(df_routes["arrive"].max())
+    assert (df_vehicles["busy_minutes"] <= horizon + 1e-9).all()
+    assert (df_vehicles["idle_minutes"] >= -1e-9).all()
+    assert (df_vehicles["utilisation"] <= 1 + 1e-9).all()
+
+
+def test_without_horizon_makespan_is_last_arrival(city):
+    df_distance, bike_counts = city
+    df_routes, df_vehicles, summary = event_dispatch(df_distance, dict(bike_counts), 5)
+    assert summary["makespan"] == summary["last_arrival"] == pytest.approx(df_routes["arrive"].max())
+    assert summary["time_to_rebalance"] <= summary["makespan"]
+    np.testing.assert_allclose(
+        df_vehicles["busy_minutes"],
+        (df_routes["arrive"] - df_routes["depart"]).groupby(df_routes["vehicle_id"]).sum()
+        .reindex(df_vehicles["vehicle_id"], fill_value=0.0))
+
+
+def test_starting_pickups_count_at_time_zero(city):
+    df_distance, bike_counts = city
+    # 没有短缺站：起点装满后无处卸车，只有 0 时刻的起点装车减少了失衡量
+    surplus = {name: abs(count) + 25 for name, count in bike_counts.items()}
+    df_routes, _, summary = event_dispatch(df_distance, surplus, 3, 30.0)
+    assert df_routes.empty
+    assert summary["imbalance_after"] == summary["imbalance_before"] - 3 * 20
+    assert summary["time_to_rebalance"] == 0.0
@@ -0,0 +1,59 @@
+"""调度方案重放（montecarlo.replay_plan / check_replay / evaluate_plan）的测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from mmc.core.events import event_dispatch
+from mmc.core.montecarlo import check_replay, evaluate_plan, starting_points
+from mmc.core.sim_dispatch_multi import multi_vehicle_dispatch
+from mmc.core.zones import cluster_zones, hierarchical_dispatch, zone_starting_points
+
+PLANNERS = {
+    "steps": lambda df, counts, nv: multi_vehicle_dispatch(df, counts, nv, 50),
+    "matching": lambda df, counts, nv: multi_vehicle_dispatch(df, counts, nv, 50, assignment="matching"),
+    "lookahead": lambda df, counts, nv: multi_vehicle_dispatch(df, counts, nv, 50, planner="lookahead"),
+    "events": lambda df, counts, nv: event_dispatch(df, counts, nv)[0],
+}
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("num_vehicles", [3, 30])
+@pytest.mark.parametrize("kind", list(PLANNERS))
+def test_replay_reproduces_planner(make_city, seed, num_vehicles, kind):
+    shortest, bike_counts = make_city(seed=seed)
+    residual = dict(bike_counts)
+    df_routes = PLANNERS[kind](shortest.matrix_frame(), residual, num_vehicles)
+    check_replay(df_routes, bike_counts, residual, starting_points(bike_counts, num_vehicles))
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_replay_reproduces_zone_plan(make_city, seed, max_workers):
+    shortest, bike_counts = make_city(seed=seed)
+    zones = cluster_zones(3, shortest.matrix_frame())
+    residual = dict(bike_counts)
+    df_routes = hierarchical_dispatch(shortest, residual, zones, 6, 50, max_workers=max_workers)
+    assert (df_routes["zone"] == "transfer").any()
+    check_replay(df_routes, bike_counts, residual, zone_starting_points(bike_counts, zones, 6))
+
+
+def test_replay_detects_wrong_starts(make_city):
+    shortest, bike_counts = make_city()
+    residual = dict(bike_counts)
+    df_routes = multi_vehicle_dispatch(shortest.matrix_frame(), residual, 3, 50)
+    # 数量最少的站点作为起点：起点装车量不同，重放结果不一致
+    starts = sorted(bike_counts, key=bike_counts.get)[:3]
+    with pytest.raises(ValueError):
+        check_replay(df_routes, bike_counts, residual, starts)
+
+
+def test_moved_excludes_starting_pickups(make_city):
+    shortest, bike_counts = make_city()
+    residual = dict(bike_counts)
+    df_routes = multi_vehicle_dispatch(shortest.matrix_frame(), residual, 3, 50)
+    starts = starting_points(bike_counts, 3)
+    per_sample, _, _ = evaluate_plan(df_routes, pd.DataFrame([bike_counts]), starts)
+    row = per_sample.iloc[0]
+    assert row["bikes_moved"] == (df_routes["moved_out"] + df_routes["moved_in"]).sum()
+    assert row["bikes_loaded_at_start"] == sum(min(bike_counts[name], 20) for name in starts)
+    assert row["imbalance_after"] == np.abs(list(residual.values())).sum()
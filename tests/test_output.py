@@ -0,0 +1,74 @@
+"""分块表格输出（output.write_table / TableSet）的往返测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from mmc.core.output import TableSet, write_table
+
+
+def sample_frame(rows=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "From": [f"站点{k}" for k in rng.integers(0, 50, rows)],
+        "To": [f"站点{k}" for k in rng.integers(0, 50, rows)],
+        "Distance": rng.uniform(0, 5000, rows),
+        "step": rng.integers(0, 100, rows),
+    })
+
+
+def split(df, chunks):
+    bounds = np.linspace(0, len(df), chunks + 1).astype(int)
+    return (df.iloc[start:end] for start, end in zip(bounds, bounds[1:]))
+
+
+def read_back(path, fmt, sheet_name="Sheet1"):
+    if fmt == "csv":
+        return pd.read_csv(path, encoding="utf-8-sig")
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_excel(path, sheet_name=sheet_name)
+
+
+@pytest.mark.parametrize("fmt,suffix", [("csv", ".csv"), ("parquet", ".parquet"), ("excel", ".xlsx")])
+@pytest.mark.parametrize("chunks", [1, 4])
+def test_chunked_round_trip(tmp_path, fmt, suffix, chunks):
+    df = sample_frame()
+    path = str(tmp_path / f"table{suffix}")
+    data = df if chunks == 1 else split(df, chunks)
+    assert write_table(data, path, sheet_name="长表") == len(df)
+    pd.testing.assert_frame_equal(read_back(path, fmt, "长表"), df, check_exact=False, rtol=1e-12)
+
+
+def test_parquet_chunks_are_row_groups(tmp_path):
+    import pyarrow.parquet as pq
+
+    df = sample_frame()
+    path = str(tmp_path / "table.parquet")
+    write_table(split(df, 3), path)
+    assert pq.ParquetFile(path).num_row_groups == 3
+
+
+def test_format_argument_overrides_extension(tmp_path):
+    df = sample_frame(10)
+    path = str(tmp_path / "table.out")
+    write_table(df, path, "parquet")
+    pd.testing.assert_frame_equal(pd.read_parquet(path), df)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet", "excel"])
+def test_table_set_round_trip(tmp_path, fmt):
+    tables = {"早高峰": sample_frame(20, 1), "午高峰": sample_frame(30, 2)}
+    path = str(tmp_path / ("nij.xlsx" if fmt == "excel" else "nij"))
+    with TableSet(path, fmt) as table_set:
+        for name, df in tables.items():
+            table_set.write(name, df)
+    for name, df in tables.items():
+        pd.testing.assert_frame_equal(read_back(table_set.paths[name], fmt, name), df,
+                                      check_exact=False, rtol=1e-12)
+
+
+def test_table_set_sanitises_file_names(tmp_path):
+    with TableSet(str(tmp_path / "nij"), "csv") as table_set:
+        table_set.write("7:00-9:00", sample_frame(5))
+    assert table_set.paths["7:00-9:00"].endswith("7_00-9_00.csv")
+    pd.testing.assert_frame_equal(read_back(table_set.paths["7:00-9:00"], "csv"), sample_frame(5))
@@ -0,0 +1,33 @@
+"""路线图渲染 render 的测试"""
+import subprocess
+import sys
+
+import pandas as pd
+
+from mmc.core.render import Coordinates, render_batch, route_segments
+
+
+def test_import_does_not_load_matplotlib():
+    code = ("import sys, mmc.core.render, mmc.core.sim_dispatch_multi; "
+            "assert not any(m.startswith('matplotlib') for m in sys.modules)")
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def routes():
+    return pd.DataFrame({"vehicle_id": [0, 0, 1], "from": ["a", "b", "c"], "to": ["b", "c", "a"]})
+
+
+def test_route_segments():
+    coords = Coordinates({"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (1.0, 1.0)})
+    segments, vehicle, stations = route_segments(routes(), coords)
+    assert segments.shape == (3, 2, 2)
+    assert vehicle.tolist() == [0, 0, 1]
+    assert stations.tolist() == [0, 1, 2]
+
+
+def test_render_batch_writes_images(tmp_path):
+    coords = Coordinates({"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (1.0, 1.0)})
+    outputs = render_batch({"plan": routes(), "empty": routes().iloc[:0]}, coords, str(tmp_path), "png")
+    for path in outputs.values():
+        with open(path, "rb") as f:
+            assert f.read(8) == b"\x89PNG\r\n\x1a\n"
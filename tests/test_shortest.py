@@ -0,0 +1,161 @@
+"""ShortestPaths 增量更新与二进制缓存的测试"""
+import os
+
+import numpy as np
+import pytest
+
+from mmc.core.shortest import ShortestPaths, _remove_stale, all_pairs
+
+
+def random_graph(n=60, extra=120, seed=0, coincident=False):
+    """随机站点坐标（环 + 随机边，保证连通），coincident 时 s1 与 s0 重合（0 权重边）"""
+    rng = np.random.default_rng(seed)
+    points = {f"s{k}": tuple(rng.uniform(0, 1000, 2)) for k in range(n)}
+    if coincident:
+        points["s1"] = points["s0"]
+    edges = [(f"s{k}", f"s{(k + 1) % n}") for k in range(n)]
+    edges += [(f"s{a}", f"s{b}") for a, b in rng.integers(0, n, (extra, 2)) if a != b]
+    return points, edges
+
+
+def assert_matches_fresh(sp, exact_pred=True):
+    """距离与在当前邻接矩阵上重新计算的 all_pairs 一致，前驱矩阵给出的路径都是最短路"""
+    dist, pred = all_pairs(sp.adjacency)
+    np.testing.assert_allclose(sp.dist, dist, rtol=1e-9, atol=1e-9)
+    if exact_pred:
+        np.testing.assert_array_equal(sp.pred, pred)
+        return
+    # 有等长路径（0 权重边）时前驱不唯一，只检查每条路径的长度等于最短距离
+    weights = sp.adjacency.toarray()
+    n = len(sp.names)
+    for i in range(n):
+        for j in range(n):
+            nodes = sp.path_indices(i, j)
+            if np.isinf(dist[i, j]):
+                assert nodes == []
+                continue
+            length = sum(weights[u, v] for u, v in zip(nodes, nodes[1:]))
+            assert length == pytest.approx(dist[i, j], abs=1e-9)
+
+
+def pick_edges(sp, rng, k):
+    rows, cols = np.nonzero(np.triu(sp.adjacency.toarray() > 0))
+    chosen = rng.choice(len(rows), k, replace=False)
+    return [(sp.names[rows[c]], sp.names[cols[c]]) for c in chosen]
+
+
+def pick_non_edges(sp, rng, k):
+    rows, cols = np.nonzero(np.triu(sp.adjacency.toarray() == 0, 1))
+    chosen = rng.choice(len(rows), k, replace=False)
+    return [(sp.names[rows[c]], sp.names[cols[c]]) for c in chosen]
+
+
+def test_decrease():
+    sp = ShortestPaths.compute(*random_graph())
+    rng = np.random.default_rng(1)
+    for start, end in pick_edges(sp, rng, 20):
+        sp.update_edge(start, end, sp.edge_weight(start, end) * rng.uniform(0.05, 0.9))
+        assert_matches_fresh(sp)
+
+
+def test_increase():
+    sp = ShortestPaths.compute(*random_graph())
+    rng = np.random.default_rng(2)
+    for start, end in pick_edges(sp, rng, 20):
+        sp.update_edge(start, end, sp.edge_weight(start, end) * rng.uniform(1.5, 20))
+        assert_matches_fresh(sp)
+
+
+def test_add_edges():
+    sp = ShortestPaths.compute(*random_graph())
+    rng = np.random.default_rng(3)
+    for start, end in pick_non_edges(sp, rng, 20):
+        sp.update_edge(start, end, rng.uniform(1, 500))
+        assert_matches_fresh(sp)
+
+
+def test_remove_edges():
+    sp = ShortestPaths.compute(*random_graph())
+    rng = np.random.default_rng(4)
+    for start, end in pick_edges(sp, rng, 20):
+        sp.update_edge(start, end, None)
+        assert sp.edge_weight(start, end) == np.inf
+        assert_matches_fresh(sp)
+
+
+def test_disconnect_and_reconnect():
+    points = {"a": (0.0, 0.0), "b": (1.0, 0.0), "c": (3.0, 0.0)}
+    sp = ShortestPaths.compute(points, [("a", "b"), ("b", "c")])
+    assert sp.update_edge("b", "c", None) == 3
+    assert np.isinf(sp.dist[0, 2]) and sp.path("a", "c") == []
+    assert_matches_fresh(sp)
+    sp.update_edge("a", "c", 5.0)
+    assert sp.path("b", "c") == ["b", "a", "c"]
+    assert_matches_fresh(sp)
+
+
+def test_zero_weight_edges():
+    sp = ShortestPaths.compute(*random_graph(n=30, extra=40, coincident=True))
+    assert sp.edge_weight("s0", "s1") == 0.0
+    rng = np.random.default_rng(5)
+    for _ in range(40):
+        a, b = rng.choice(len(sp.names), 2, replace=False)
+        r = rng.random()
+        weight = None if r < 0.3 else (0.0 if r < 0.5 else rng.uniform(0, 1500))
+        sp.update_edge(sp.names[a], sp.names[b], weight)
+        assert_matches_fresh(sp, exact_pred=False)
+
+
+def test_update_graph_matches_compute():
+    points, edges = random_graph()
+    sp = ShortestPaths.compute(points, edges)
+    new_edges = edges[5:] + [("s0", "s30"), ("s7", "s40")]
+    assert sp.update_graph(points, new_edges) == len(
+        set(map(frozenset, edges)) ^ set(map(frozenset, new_edges)))
+    fresh = ShortestPaths.compute(points, new_edges)
+    np.testing.assert_allclose(sp.dist, fresh.dist, rtol=1e-9)
+    np.testing.assert_array_equal(sp.pred, fresh.pred)
+    assert sp.update_graph(points, edges, max_edges=1) is None
+
+
+def test_save_load_round_trip(tmp_path):
+    sp = ShortestPaths.compute(*random_graph())
+    sp.save(str(tmp_path), "h1")
+    assert ShortestPaths.load(str(tmp_path), "other") is None
+    loaded = ShortestPaths.load(str(tmp_path), "h1")
+    assert loaded.names == sp.names
+    np.testing.assert_allclose(loaded.dist, sp.dist.astype(np.float32))
+    np.testing.assert_array_equal(loaded.pred, sp.pred)
+    assert (loaded.adjacency != sp.adjacency).nnz == 0
+
+    # 内存映射的缓存第一次修改时复制到内存，不改动缓存文件
+    start, end = sp.names[0], sp.names[1]
+    loaded.update_edge(start, end, None)
+    assert not isinstance(loaded.dist, np.memmap)
+    np.testing.assert_allclose(ShortestPaths.load(str(tmp_path), "h1").dist, sp.dist.astype(np.float32))
+
+
+def test_save_switches_files_and_removes_stale(tmp_path):
+    cache_dir = str(tmp_path)
+    sp = ShortestPaths.compute(*random_graph())
+    sp.save(cache_dir, "h1")
+    first = ShortestPaths.load(cache_dir, "h1")
+    old_files = set(os.listdir(cache_dir)) - {"meta.json"}
+    assert len(old_files) == 3
+
+    sp.update_edge(sp.names[0], sp.names[1], None)
+    sp.save(cache_dir, "h2")
+    new_files = set(os.listdir(cache_dir)) - {"meta.json"}
+    # 新缓存使用新文件名，旧文件已删除（Windows 上仍被映射的旧文件会留到下次保存）
+    assert len(new_files) == 3 and not new_files & old_files
+    assert ShortestPaths.load(cache_dir, "h1") is None
+    np.testing.assert_allclose(ShortestPaths.load(cache_dir, "h2").dist, sp.dist.astype(np.float32))
+    # 旧的内存映射仍然可读
+    assert first.dist.shape == sp.dist.shape
+
+
+def test_remove_stale_keeps_referenced_and_foreign_files(tmp_path):
+    for name in ("dist.a.npy", "dist.b.npy", "pred.b.npy", "tmp.c.meta.json", "meta.json", "notes.txt"):
+        (tmp_path / name).write_bytes(b"")
+    _remove_stale(str(tmp_path), {"dist.a.npy"})
+    assert sorted(os.listdir(tmp_path)) == ["dist.a.npy", "meta.json", "notes.txt"]
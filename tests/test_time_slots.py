@@ -0,0 +1,34 @@
+"""各时间段 nij 表 nij_by_time 的测试"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from mmc.core.time_slots import nij_by_time
+
+
+def slot_sheets(names, n_slots=12, seed=0):
+    rng = np.random.default_rng(seed)
+    supply, demand = {}, {}
+    for t in range(n_slots):
+        k = int(rng.integers(3, len(names) // 2))
+        supply[f"{t:02d}-{t + 1:02d}"] = pd.DataFrame({"location": names[:k], "supply": rng.integers(1, 30, k)})
+        demand[f"{t:02d}-{t + 1:02d}"] = pd.DataFrame({"location": names[k:2 * k], "demand": rng.integers(1, 30, k)})
+    return supply, demand
+
+
+@pytest.mark.parametrize("max_buffer_bytes", [None, 1])
+def test_slots_written_in_order(city, max_buffer_bytes):
+    df_distance, _ = city
+    supply, demand = slot_sheets(list(df_distance.index))
+    demand.pop("03-04")  # 缺少需求数据的时间段跳过
+    written = {}
+    nij_by_time(df_distance, supply, demand, written.__setitem__,
+                max_workers=3, max_buffer_bytes=max_buffer_bytes)
+    assert list(written) == [slot for slot in supply if slot in demand]
+
+    # 与单进程的结果相同
+    serial = {}
+    nij_by_time(df_distance, supply, demand, serial.__setitem__, max_workers=1)
+    assert list(serial) == list(written)
+    for slot, df in written.items():
+        pd.testing.assert_frame_equal(df, serial[slot])
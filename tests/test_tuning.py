@@ -0,0 +1,40 @@
+"""nij 权重搜索 tuning 的测试"""
+import pytest
+
+from mmc.core.tuning import RESULTS, evaluate_weights, grid_candidates, normalise_weights, tune_weights
+
+
+def test_normalise_weights():
+    assert normalise_weights(0.6, 0.6, 0.6) == normalise_weights(0.2, 0.2, 0.2)
+    assert sum(normalise_weights(0.3, 0.5, 0.9)) == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        normalise_weights(0, 0, 0)
+
+
+def test_grid_candidates_are_unique():
+    candidates = grid_candidates([0.0, 0.5, 1.0])
+    assert len(candidates) == len(set(candidates))
+    assert all(sum(w) == pytest.approx(1.0) for w in candidates)
+
+
+def test_evaluate_weights_reports_plain_residual_imbalance(city):
+    df_distance, bike_counts = city
+    result = evaluate_weights(df_distance, dict(bike_counts), (0.4, 0.3, 0.3), 3, 30.0)
+    assert "score" not in result
+    assert result["imbalance_after"] <= result["imbalance_before"]
+    if result["busy_minutes"] > 0:
+        assert result["rebalanced_per_minute"] == pytest.approx(
+            (result["imbalance_before"] - result["imbalance_after"]) / result["busy_minutes"])
+
+
+@pytest.mark.parametrize("method", ["grid", "random", "halving"])
+def test_tune_weights_ranks_by_residual_imbalance(make_city, method):
+    RESULTS.clear()
+    shortest, _ = make_city(n=20)
+    snapshots = {f"s{k}": make_city(n=20, seed=k)[1] for k in range(4)}
+    best, df_trials = tune_weights(shortest, snapshots, method, n_trials=6, grid_values=(0.0, 1.0),
+                                   eta=2, horizon=20.0, max_workers=1)
+    assert best == tuple(df_trials.loc[0, ["a", "b", "c"]])
+    full = df_trials[df_trials["snapshots"] == len(snapshots)]
+    assert full["imbalance_after"].is_monotonic_increasing
+    assert best == tuple(full.iloc[0][["a", "b", "c"]])